@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import main as compiler_cli
+from benchmarks.synthetic import DEFAULT_SHAPE, generate_program
+from compiler.cache import write_atomic
+
+# Valores que recorre cada parámetro en el barrido (los demás quedan en DEFAULT_SHAPE).
+SWEEPS = {
+    'quick': {
+        'globals': [1, 2, 4, 8],
+        'nesting_depth': [1, 2, 3],
+        'ladder_length': [1, 2, 4],
+        'temps_per_branch': [0, 1, 2],
+        'comparison_density': [1, 2, 4],
+    },
+    'full': {
+        'globals': [1, 2, 4, 8, 16, 32],
+        'nesting_depth': [1, 2, 3, 4, 5],
+        'ladder_length': [1, 2, 4, 8, 16],
+        'temps_per_branch': [0, 1, 2, 4, 8],
+        'comparison_density': [1, 2, 4, 8],
+    },
+}
+
+# Métricas de cada punto que forman las curvas y que se pueden limitar en el presupuesto.
+METRICS = ['wall_seconds', 'cpu_seconds', 'peak_memory_bytes', 'output_bytes', 'ast_nodes',
+           'flattened_tuple_nodes', 'distinct_subexpressions', 'cse_definitions', 'existential_vars', 'constraints']
+
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "budgets.json")
+DEFAULT_RESULTS = os.path.join("output", "benchmarks", "compiler_scaling.json")
+
+def run_point(shape, workdir, seed=0):
+    """
+    Genera el programa sintético de la forma dada, lo compila con --profile
+    (sin caché) y devuelve sus métricas.
+
+    Args:
+        shape (dict): Parámetros sobre DEFAULT_SHAPE.
+        workdir (str): Directorio temporal donde se escriben el .c y su 'output/'.
+
+    Returns:
+        dict: {'shape', 'status', métricas de METRICS, 'phases'} o el error.
+    """
+    full_shape = {**DEFAULT_SHAPE, **shape}
+    name = "synthetic_" + "_".join(str(full_shape[k]) for k in DEFAULT_SHAPE)
+    source_path = os.path.join(workdir, f"{name}.c")
+    write_atomic(source_path, generate_program(full_shape, seed))
+
+    args = compiler_cli.build_cli_parser().parse_args([source_path, "--profile", "--no-cache"])
+    cwd = os.getcwd()
+    try:
+        result = compiler_cli.compile_in_worker(args, source_path, cwd=workdir)
+    finally:
+        os.chdir(cwd)
+    if result['status'] != 'ok':
+        return {'shape': full_shape, 'status': 'error', 'error': result['error']}
+
+    with open(os.path.join(workdir, result['profile']), encoding="utf-8") as f:
+        profile = json.load(f)
+    point = {
+        'shape': full_shape,
+        'status': 'ok',
+        'wall_seconds': profile['total_wall_seconds'],
+        'cpu_seconds': profile['total_cpu_seconds'],
+        'peak_memory_bytes': profile['peak_memory_bytes'],
+        'output_bytes': sum(profile['artifact_bytes'].values()),
+        'phases': {p['name']: p['wall_seconds'] for p in profile['phases']},
+    }
+    point.update({k: profile['counters'][k] for k in METRICS if k in profile['counters']})
+    return point
+
+def run_sweep(sweep, workdir, seed=0):
+    """
+    Barrido de un parámetro cada vez: para cada parámetro, una curva con un
+    punto por valor.
+
+    Returns:
+        dict: {parámetro: [punto, ...]}
+    """
+    curves = {}
+    for knob, values in sweep.items():
+        curves[knob] = []
+        for value in values:
+            point = run_point({knob: value}, workdir, seed)
+            curves[knob].append(point)
+            _print_point(knob, value, point)
+    return curves
+
+def check_budget(budget, workdir, seed=0):
+    """
+    Compila cada programa de referencia del presupuesto y compara sus métricas
+    con los máximos configurados.
+
+    Args:
+        budget (dict): {'entries': [{'name', 'shape', 'max': {métrica: límite}}]}.
+
+    Returns:
+        tuple: (resultados por entrada, lista de mensajes de regresión)
+    """
+    results = []; violations = []
+    for entry in budget['entries']:
+        point = run_point(entry['shape'], workdir, seed)
+        results.append({'name': entry['name'], **point})
+        if point['status'] != 'ok':
+            violations.append(f"{entry['name']}: la compilación ha fallado ({point['error']})")
+            print(f"  [ERROR] {entry['name']}")
+            continue
+        exceeded = [f"{entry['name']}: {metric} = {point[metric]} supera el presupuesto de {limit}"
+                    for metric, limit in entry['max'].items() if point.get(metric, 0) > limit]
+        violations.extend(exceeded)
+        print(f"  {'[ERROR]' if exceeded else '[OK]   '} {entry['name']} "
+              f"({', '.join(f'{m}: {point.get(m)}/{limit}' for m, limit in entry['max'].items())})")
+    return results, violations
+
+def main():
+    """Punto de entrada: python -m benchmarks.compiler_scaling"""
+    cli_parser = argparse.ArgumentParser(description="Benchmarks de escalado del compilador Diophantus.")
+    cli_parser.add_argument("--grid", choices=sorted(SWEEPS), default="quick",
+                            help="Rejilla de parámetros a recorrer (por defecto: quick).")
+    cli_parser.add_argument("--seed", type=int, default=0, help="Semilla de los programas sintéticos.")
+    cli_parser.add_argument("--output", default=DEFAULT_RESULTS,
+                            help=f"Ruta del JSON de resultados (por defecto: {DEFAULT_RESULTS}).")
+    cli_parser.add_argument("--budget", default=DEFAULT_BUDGET,
+                            help="Presupuesto de complejidad a comprobar (por defecto: benchmarks/budgets.json).")
+    cli_parser.add_argument("--no-sweep", action="store_true", help="Comprueba solo el presupuesto.")
+    cli_parser.add_argument("--no-budget", action="store_true", help="Ejecuta solo el barrido.")
+    args = cli_parser.parse_args()
+
+    print(f"--- [Benchmarks] Escalado del compilador (rejilla '{args.grid}', semilla {args.seed}) ---")
+    start = time.perf_counter()
+    report = {'grid': args.grid, 'seed': args.seed, 'base_shape': DEFAULT_SHAPE}
+    violations = []
+    with tempfile.TemporaryDirectory(prefix="diophantus_bench_") as workdir:
+        if not args.no_sweep:
+            report['curves'] = run_sweep(SWEEPS[args.grid], workdir, args.seed)
+        if not args.no_budget:
+            with open(args.budget, encoding="utf-8") as f:
+                budget = json.load(f)
+            print(f"\n--- [Benchmarks] Comprobando el presupuesto de complejidad ({args.budget}) ---")
+            report['budget'], violations = check_budget(budget, workdir, args.seed)
+    report['wall_seconds'] = round(time.perf_counter() - start, 3)
+    report['budget_violations'] = violations
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    write_atomic(args.output, json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    print(f"\n--- [Benchmarks] Resultados guardados en: {args.output} ({report['wall_seconds']:.1f} s) ---")
+
+    if violations:
+        print(f"\n--- ERROR: REGRESIÓN DE COMPLEJIDAD ---", file=sys.stderr)
+        for message in violations:
+            print(f"  - {message}", file=sys.stderr)
+        sys.exit(1)
+
+def _print_point(knob, value, point):
+    if point['status'] != 'ok':
+        print(f"  {knob:<18} = {value:<3} ERROR: {point['error']}")
+        return
+    print(f"  {knob:<18} = {value:<3} {point['wall_seconds']:8.3f} s  {point['peak_memory_bytes'] / 1024**2:8.2f} MB  "
+          f"{point['output_bytes']:>10} B  {point['flattened_tuple_nodes']:>8} nodos  {point['constraints']:>6} restricciones")
+
+if __name__ == "__main__":
+    main()
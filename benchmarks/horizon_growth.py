@@ -0,0 +1,76 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+from compiler import api
+from compiler import composition
+from compiler import equation_exporter
+from compiler import generator
+from compiler import parser
+from compiler.cache import write_atomic
+
+DEFAULT_HORIZONS = [1, 2, 4, 8, 16, 32, 64]
+
+def measure_horizon(f_function, state_vars, input_vars, k, polynomial=False):
+    """
+    Tamaño de F^k: nodos del DAG, nodos del árbol expandido, definiciones C_n,
+    bytes de la entrada del intérprete y, con `polynomial`, ecuaciones y
+    variables existenciales del sistema polinómico.
+    """
+    start = time.perf_counter()
+    composed = composition.compose_function(f_function, state_vars, input_vars, k)
+    composed_f, composed_defs = composed.export()
+    point = composed.stats()
+    point['compose_seconds'] = round(time.perf_counter() - start, 4)
+    point['cse_definitions'] = len(composed_defs)
+    exporter = equation_exporter.EquationExporter(composed_f, composed_f, composed_defs, state_vars)
+    point['interpreter_bytes'] = len(exporter.export_optimized_for_interpreter().encode("utf-8"))
+    point['interpreter_bytes_per_tick'] = round(point['interpreter_bytes'] / k, 1)
+    if polynomial:
+        with contextlib.redirect_stdout(io.StringIO()):
+            poly_system, poly_info = api.convert_to_polynomial_system(composed_f, composed_defs, True, False, 0)
+        point['equations'] = poly_info['num_equations']
+        point['existential_vars'] = poly_info['existential_vars_count']
+    return point
+
+def main():
+    """Punto de entrada: python -m benchmarks.horizon_growth examples/pong.c"""
+    cli_parser = argparse.ArgumentParser(description="Crecimiento de F^k con el horizonte k.")
+    cli_parser.add_argument("input_file", help="Programa C compatible.")
+    cli_parser.add_argument("--horizons", default=",".join(map(str, DEFAULT_HORIZONS)),
+                            help=f"Valores de k separados por comas (por defecto: {','.join(map(str, DEFAULT_HORIZONS))}).")
+    cli_parser.add_argument("--polynomial", action="store_true",
+                            help="Convierte también cada F^k al sistema polinómico (más lento).")
+    cli_parser.add_argument("--output", help="Ruta del JSON de resultados (por defecto: output/benchmarks/<programa>_horizon.json).")
+    args = cli_parser.parse_args()
+
+    horizons = [int(k) for k in args.horizons.split(",")]
+    if any(k < 1 for k in horizons):
+        print("--- ERROR: Los horizontes deben ser enteros >= 1.", file=sys.stderr)
+        sys.exit(1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast_map = parser.parse_c_file(args.input_file)
+        f_function, input_vars = generator.generate_function(ast_map)
+
+    print(f"--- [Benchmarks] Crecimiento de F^k: {args.input_file} ---")
+    points = []
+    for k in horizons:
+        point = measure_horizon(f_function, ast_map['state_vars'], input_vars, k, args.polynomial)
+        points.append(point)
+        extra = f"  {point['equations']:>7} ecuaciones" if args.polynomial else ""
+        print(f"  k = {k:<5} {point['dag_nodes']:>8} nodos  {point['cse_definitions']:>6} C_n  "
+              f"{point['interpreter_bytes']:>10} B ({point['interpreter_bytes_per_tick']:>9.1f} B/tick)  "
+              f"{point['compose_seconds']:>8.3f} s{extra}")
+
+    output = args.output or os.path.join(
+        "output", "benchmarks", f"{os.path.splitext(os.path.basename(args.input_file))[0]}_horizon.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    write_atomic(output, json.dumps({'file': args.input_file, 'points': points}, indent=2, ensure_ascii=False) + "\n")
+    print(f"--- [Benchmarks] Resultados guardados en: {output} ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from compiler.cache import write_atomic
+from interpreter.interpreter import EquationEngine
+from interpreter import native, vectorized
+from interpreter.partial_eval import parse_assignments
+
+DEFAULT_TICKS = 2000
+# Ticks que se repiten con tracemalloc activo para medir la memoria por tick
+# (tracemalloc ralentiza la evaluación, así que no se mezcla con los tiempos).
+ALLOCATION_SAMPLE_TICKS = 200
+PERCENTILES = [50, 90, 99]
+
+def available_backends():
+    """
+    Motores de evaluación disponibles en esta instalación.
+
+    Returns:
+        dict: {nombre: función(ruta del .txt) -> objeto con compute_next_state()}
+    """
+    backends = {
+        'reference': EquationEngine,
+    }
+    if native.find_c_compiler():
+        backends['native'] = lambda path: EquationEngine(path, backend='native')
+    if vectorized.np is not None:
+        backends['levels'] = lambda path: EquationEngine(path, backend='levels')
+    backends['threads'] = lambda path: EquationEngine(path, backend='threads')
+    return backends
+
+def random_trace(inputs, ticks, seed=0):
+    """
+    Traza de entrada aleatoria y reproducible. 'kbhit' vale 0 o 1 y el resto
+    de entradas son códigos ASCII, a 0 en los fotogramas sin tecla pulsada.
+    """
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(ticks):
+        pressed = rng.random() < 0.5
+        frame = {}
+        for name in inputs:
+            if name == 'kbhit':
+                frame[name] = int(pressed)
+            else:
+                frame[name] = rng.randint(32, 126) if pressed else 0
+        trace.append(frame)
+    return trace
+
+def load_trace(path):
+    """Traza grabada: una lista JSON de diccionarios de entradas, o uno por línea (JSON Lines)."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def run_backend(engine, initial_state, trace, ticks):
+    """
+    Ejecuta `ticks` pasos del motor recorriendo la traza de forma cíclica.
+
+    Returns:
+        dict: ticks/s, percentiles de latencia por tick, memoria por tick y
+        el estado final (para comprobar que todos los motores coinciden).
+
+    Raises:
+        ValueError: Si `ticks` es menor que 1 o la traza está vacía.
+    """
+    if ticks < 1:
+        raise ValueError("El número de ticks debe ser al menos 1.")
+    if not trace:
+        raise ValueError("La traza de entradas está vacía.")
+    state = dict(initial_state)
+    latencies = []
+    start = time.perf_counter()
+    for tick in range(ticks):
+        tick_start = time.perf_counter_ns()
+        state.update(engine.compute_next_state(state, trace[tick % len(trace)]))
+        latencies.append(time.perf_counter_ns() - tick_start)
+    elapsed = time.perf_counter() - start
+    final_state = dict(state)
+
+    # Memoria: pico de bytes reservados durante cada tick, sobre una muestra.
+    sample = min(ticks, ALLOCATION_SAMPLE_TICKS)
+    state = dict(initial_state)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for tick in range(sample):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            state.update(engine.compute_next_state(state, trace[tick % len(trace)]))
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'ticks': ticks,
+        'seconds': round(elapsed, 6),
+        'ticks_per_second': round(ticks / elapsed, 2) if elapsed else None,
+        'latency_us': {
+            **{f"p{p}": round(_percentile(latencies, p) / 1000, 3) for p in PERCENTILES},
+            'max': round(latencies[-1] / 1000, 3),
+            'mean': round(sum(latencies) / len(latencies) / 1000, 3),
+        },
+        'alloc_peak_bytes_per_tick': {
+            'mean': round(sum(peaks) / len(peaks), 1) if peaks else 0,
+            'max': max(peaks, default=0),
+        },
+        'final_state': final_state,
+    }
+
+def _percentile(sorted_values, p):
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def main():
+    """Punto de entrada: python -m benchmarks.interpreter_throughput <archivo>_interpreter_input.txt"""
+    cli_parser = argparse.ArgumentParser(description="Benchmark de rendimiento del intérprete de ecuaciones.")
+    cli_parser.add_argument("input_file", help="Archivo *_interpreter_input.txt generado por el compilador.")
+    cli_parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help=f"Pasos a simular (por defecto: {DEFAULT_TICKS}).")
+    cli_parser.add_argument("--trace", help="Traza de entradas grabada (JSON o JSON Lines). Sin ella, se generan al azar.")
+    cli_parser.add_argument("--seed", type=int, default=0, help="Semilla de la traza aleatoria.")
+    cli_parser.add_argument("--state", default="{}",
+                            help="Estado inicial en JSON, p. ej. '{\"b\": 40}' (las variables omitidas valen 0).")
+    cli_parser.add_argument("--backends", help="Motores a medir, separados por comas (por defecto: todos los disponibles).")
+    cli_parser.add_argument("--specialize", action="append", default=[], type=parse_assignments,
+                            help="Añade a cada motor una variante especializada para esos valores de entrada, "
+                                 "p. ej. 'kbhit=0' (se puede repetir).")
+    cli_parser.add_argument("--profile-equations", action="store_true",
+                            help="Repite la simulación con el perfil por ecuación del motor de referencia y escribe "
+                                 "el informe (.txt) y las pilas plegadas para flamegraph (.folded).")
+    cli_parser.add_argument("--output", help="Ruta del JSON de resultados (por defecto: output/benchmarks/<programa>_throughput.json).")
+    args = cli_parser.parse_args()
+
+    if args.ticks < 1:
+        print("--- ERROR: --ticks debe ser un entero >= 1.", file=sys.stderr)
+        sys.exit(1)
+    backends = available_backends()
+    selected = args.backends.split(",") if args.backends else list(backends)
+    unknown = [name for name in selected if name not in backends]
+    if unknown:
+        print(f"--- ERROR: Motores no disponibles: {', '.join(unknown)} (disponibles: {', '.join(backends)})", file=sys.stderr)
+        sys.exit(1)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        inputs = EquationEngine(args.input_file).get_input_variables()
+    trace = load_trace(args.trace) if args.trace else random_trace(inputs, args.ticks, args.seed)
+    if not trace:
+        print(f"--- ERROR: La traza {args.trace} no contiene ningún fotograma.", file=sys.stderr)
+        sys.exit(1)
+    print(f"--- [Benchmarks] Intérprete: {args.input_file} ({args.ticks} ticks, entradas: {', '.join(inputs) or '-'}) ---")
+
+    results = {}
+    schedule = None
+    for name in selected:
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = backends[name](args.input_file)
+        with engine:
+            with contextlib.redirect_stdout(io.StringIO()):
+                variants = [engine.add_specialization(known) for known in args.specialize]
+            schedule = schedule or engine.get_schedule_stats()
+            initial_state = {var: 0 for var in engine.get_state_variables()}
+            initial_state.update(json.loads(args.state))
+            results[name] = run_backend(engine, initial_state, trace, args.ticks)
+            if variants:
+                results[name]['variants'] = variants
+                results[name]['variant_usage'] = engine.get_cache_stats()
+        r = results[name]
+        print(f"  {name:<12} {r['ticks_per_second']:>12,.1f} ticks/s   p50 {r['latency_us']['p50']:>9.1f} µs   "
+              f"p99 {r['latency_us']['p99']:>9.1f} µs   {r['alloc_peak_bytes_per_tick']['mean']:>10.0f} B/tick")
+
+    for variant in variants:
+        print(f"  - Variante {variant['name']}: {variant['equations_before']} -> {variant['equations_after']} ecuaciones, "
+              f"{variant['nodes_before']} -> {variant['nodes_after']} nodos")
+
+    if schedule:
+        print(f"  - Plan por niveles: {schedule['levels']} niveles de anchura {schedule['level_widths']}, "
+              f"camino crítico de {schedule['critical_path_nodes']} de {schedule['total_nodes']} nodos")
+
+    final_states = {json.dumps(r['final_state'], sort_keys=True) for r in results.values()}
+    if len(final_states) > 1:
+        print("  - AVISO: Los motores no llegan al mismo estado final.", file=sys.stderr)
+
+    output = args.output or os.path.join(
+        "output", "benchmarks", f"{os.path.basename(args.input_file).replace('_interpreter_input.txt', '')}_throughput.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    report = {
+        'file': args.input_file,
+        'ticks': args.ticks,
+        'trace': args.trace or f"random (seed {args.seed})",
+        'inputs': inputs,
+        'specialize': args.specialize,
+        'schedule': schedule,
+        'python': sys.version.split()[0],
+        'backends': results,
+        'backends_agree': len(final_states) <= 1,
+    }
+    write_atomic(output, json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    print(f"--- [Benchmarks] Resultados guardados en: {output} ---")
+
+    if args.profile_equations:
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = EquationEngine(args.input_file, profile=True)
+        state = {var: 0 for var in engine.get_state_variables()}
+        state.update(json.loads(args.state))
+        for tick in range(args.ticks):
+            state.update(engine.compute_next_state(state, trace[tick % len(trace)]))
+        base_path = os.path.splitext(output)[0]
+        engine.write_profile(f"{base_path}_equations.txt", f"{base_path}_equations.folded")
+        print(engine.profile_report(top=10))
+        print(f"--- [Benchmarks] Perfil por ecuación guardado en: {base_path}_equations.txt (.folded) ---")
+
+if __name__ == "__main__":
+    main()
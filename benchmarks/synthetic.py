@@ -0,0 +1,130 @@
+import random
+
+# Forma por defecto de un programa sintético. Cada parámetro controla una
+# dimensión de la complejidad que atraviesa el pipeline:
+#   globals:            variables de estado (una ecuación de F por cada una).
+#   nesting_depth:      profundidad de los 'if' anidados dentro de cada rama.
+#   ladder_length:      ramas de la cadena if / else if / ... / else de cada variable.
+#   temps_per_branch:   variables auxiliares declaradas en cada rama.
+#   comparison_density: comparaciones por condición (unidas con && y ||).
+# Cada fotograma lee una tecla (kbhit/getch): el subconjunto de C solo tiene
+# esas dos fuentes de entrada, así que más lecturas serían la misma entrada.
+DEFAULT_SHAPE = {
+    'globals': 4,
+    'nesting_depth': 1,
+    'ladder_length': 2,
+    'temps_per_branch': 1,
+    'comparison_density': 1,
+}
+
+_COMPARISONS = ['==', '!=', '<', '>', '<=', '>=']
+_ARITHMETIC = ['+', '-']
+
+class SyntheticProgram:
+    """
+    Genera programas C compatibles (bucle único, estado global, sin funciones
+    de usuario) cuya complejidad se controla con los parámetros de DEFAULT_SHAPE.
+
+    El programa es determinista para una forma y una semilla dadas: el mismo
+    punto de la rejilla de benchmarks compila siempre el mismo código.
+    """
+    def __init__(self, shape=None, seed=0):
+        """
+        Args:
+            shape (dict, opcional): Parámetros a sobrescribir sobre DEFAULT_SHAPE.
+            seed (int): Semilla del generador de constantes y operadores.
+        """
+        unknown = set(shape or {}) - set(DEFAULT_SHAPE)
+        if unknown:
+            raise ValueError(f"Parámetros de forma desconocidos: {sorted(unknown)}")
+        self.shape = {**DEFAULT_SHAPE, **(shape or {})}
+        self.rng = random.Random(seed)
+        self.globals = [f"s{i}" for i in range(max(1, self.shape['globals']))]
+        self.inputs = ["k0"]
+        self._temp_counter = 0
+        self._lines = []
+
+    def generate(self):
+        """
+        Punto de entrada. Devuelve el código fuente C del programa.
+        """
+        self._lines = []
+        self._temp_counter = 0
+        initial = ", ".join(f"{name} = {self.rng.randint(0, 20)}" for name in self.globals)
+        self._emit(0, "#include <stdio.h>")
+        self._emit(0, "#include <conio.h>")
+        self._emit(0, "")
+        self._emit(0, f"int {initial};")
+        self._emit(0, "")
+        self._emit(0, "int main() {")
+        self._emit(1, "for (;;) {")
+
+        for name in self.inputs:
+            self._emit(2, f"char {name} = 0;")
+            self._emit(2, "if (kbhit()) {")
+            self._emit(3, f"{name} = getch();")
+            self._emit(2, "}")
+
+        for name in self.globals:
+            self._emit(2, f"int {name}_next = {name};")
+            self._emit_ladder(2, name, self.shape['nesting_depth'])
+
+        # Commit de estado al final del fotograma
+        for name in self.globals:
+            self._emit(2, f"{name} = {name}_next;")
+        self._emit(2, 'printf("%d\\n", s0);')
+        self._emit(1, "}")
+        self._emit(1, "return 0;")
+        self._emit(0, "}")
+        return "\n".join(self._lines) + "\n"
+
+    # --- Métodos de Ayuda Internos ---
+
+    def _emit(self, indent, text):
+        self._lines.append("    " * indent + text)
+
+    def _emit_ladder(self, indent, target, depth):
+        """Cadena if / else if / else que asigna <target>_next en cada rama."""
+        branches = max(1, self.shape['ladder_length'])
+        for i in range(branches):
+            if i == 0:
+                self._emit(indent, f"if ({self._condition()}) {{")
+            elif i < branches - 1:
+                self._emit(indent, f"}} else if ({self._condition()}) {{")
+            else:
+                self._emit(indent, "} else {")
+            self._emit_branch(indent + 1, target, depth)
+        self._emit(indent, "}")
+
+    def _emit_branch(self, indent, target, depth):
+        temps = []
+        for _ in range(self.shape['temps_per_branch']):
+            name = f"t{self._temp_counter}"
+            self._temp_counter += 1
+            self._emit(indent, f"int {name} = {self._arithmetic(temps)};")
+            temps.append(name)
+        if depth > 1:
+            self._emit_ladder(indent, target, depth - 1)
+        else:
+            self._emit(indent, f"{target}_next = {self._arithmetic(temps)};")
+
+    def _condition(self):
+        terms = []
+        for i in range(max(1, self.shape['comparison_density'])):
+            left = self.rng.choice(self.globals + self.inputs)
+            right = self.rng.randint(0, 127) if left in self.inputs else self.rng.randint(0, 20)
+            terms.append(f"{left} {self.rng.choice(_COMPARISONS)} {right}")
+        condition = terms[0]
+        for term in terms[1:]:
+            condition = f"({condition}) {self.rng.choice(['&&', '||'])} ({term})"
+        return condition
+
+    def _arithmetic(self, temps):
+        """Suma o resta de un operando disponible (global o auxiliar) y una constante."""
+        operand = self.rng.choice(self.globals + temps)
+        return f"{operand} {self.rng.choice(_ARITHMETIC)} {self.rng.randint(1, 5)}"
+
+
+def generate_program(shape=None, seed=0):
+    """Atajo: código C del programa sintético con la forma dada."""
+    return SyntheticProgram(shape, seed).generate()
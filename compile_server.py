@@ -0,0 +1,344 @@
+import argparse
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import main as compiler_cli
+
+# --- CONFIGURACIÓN DEL SERVIDOR ---
+# Directorio privado (0700) del usuario para el socket y el token.
+RUNTIME_DIR = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or
+                           os.path.join(os.path.expanduser("~"), ".cache"), "diophantus")
+# Por defecto, socket Unix con modo 0600: solo su propietario puede conectarse.
+DEFAULT_SOCKET = os.path.join(RUNTIME_DIR, "compile_server.sock")
+# En TCP cualquier usuario local puede conectarse, así que cada petición lleva
+# el token que el servidor escribe en este fichero (modo 0600).
+DEFAULT_TOKEN_FILE = os.path.join(RUNTIME_DIR, "compile_server.token")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7878
+DEFAULT_WORKERS = 2
+# Peticiones admitidas a la vez (en ejecución o en cola) por cada trabajador.
+MAX_QUEUED_PER_WORKER = 4
+
+class CompileServer:
+    """
+    Servidor de compilación de larga duración.
+
+    Arrancar Python, importar clang.cindex y crear un Index domina el tiempo de
+    compilación de los programas pequeños. El servidor mantiene un pool acotado
+    de procesos trabajadores, cada uno con libclang cargado, su propio Index y
+    una caché en memoria de las fases ya calculadas, y atiende peticiones
+    concurrentes por un socket local: un socket Unix con modo 0600 (por
+    defecto) o TCP en localhost con un token.
+
+    Protocolo: una petición JSON por línea y una respuesta JSON por línea.
+        {"cmd": "compile", "file": "/ruta/abs/prog.c", "cwd": "/ruta",
+         "options": ["--reduce-degree"], "artifacts": false, "output": false}
+        {"cmd": "ping"}    {"cmd": "stats"}    {"cmd": "shutdown"}
+    En TCP, cada petición incluye además "token". La respuesta a 'compile' es
+    el resumen de main.compile_in_worker (rutas, tamaños, recuentos y tiempos)
+    y, si se pide, el contenido de los artefactos.
+
+    El servidor escribe los artefactos con los permisos de su propietario, así
+    que 'cwd' y 'file' deben pertenecer al usuario que hace la petición (el
+    del otro extremo del socket Unix, o el dueño del token en TCP).
+    """
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=compiler_cli.init_worker)
+        self.slots = threading.BoundedSemaphore(workers * MAX_QUEUED_PER_WORKER)
+        self.cli_parser = compiler_cli.build_cli_parser()
+        self.stats = {'requests': 0, 'compiled': 0, 'failed': 0, 'rejected': 0}
+        self._stats_lock = threading.Lock()
+        self.server = None
+        self.token = None
+
+    def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, token_file=DEFAULT_TOKEN_FILE):
+        """
+        Atiende peticiones hasta recibir 'shutdown' (o Ctrl+C).
+
+        Args:
+            unix_socket (str, opcional): Ruta del socket Unix; sin ella, TCP en
+                host:port con un token nuevo escrito en `token_file`.
+        """
+        handler = self._make_handler()
+        if unix_socket:
+            _ensure_private_dir(os.path.dirname(os.path.abspath(unix_socket)))
+            if os.path.lexists(unix_socket):
+                if not stat.S_ISSOCK(os.lstat(unix_socket).st_mode):
+                    raise FileExistsError(f"{unix_socket} existe y no es un socket")
+                os.remove(unix_socket)
+            # El socket se crea ya con modo 0600 (sin ventana en la que otro
+            # usuario pueda conectarse).
+            old_umask = os.umask(0o177)
+            try:
+                self.server = socketserver.ThreadingUnixStreamServer(unix_socket, handler)
+            finally:
+                os.umask(old_umask)
+            os.chmod(unix_socket, 0o600)
+            address = unix_socket
+        else:
+            self.token = secrets.token_hex(32)
+            _write_private_file(token_file, self.token + "\n")
+            self.server = socketserver.ThreadingTCPServer((host, port), handler)
+            address = f"{host}:{self.server.server_address[1]} (token en {token_file})"
+        self.server.daemon_threads = True
+        # Arrancar los trabajadores (y cargar libclang) antes de la primera petición.
+        list(self.executor.map(_warm_up, range(self.workers)))
+        print(f"--- [Server] Servidor de compilación escuchando en {address} ({self.workers} procesos) ---")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            self.executor.shutdown(cancel_futures=True)
+            if unix_socket and os.path.exists(unix_socket):
+                os.remove(unix_socket)
+            if self.token and os.path.exists(token_file):
+                os.remove(token_file)
+            print("--- [Server] Finalizado ---")
+
+    def handle_request(self, request, peer_uid=None):
+        """
+        Procesa una petición ya decodificada y devuelve la respuesta.
+
+        Args:
+            peer_uid (int, opcional): Usuario del otro extremo del socket Unix.
+        """
+        if self.token is not None:
+            if not hmac.compare_digest(str(request.get('token', '')), self.token):
+                return {'status': 'error', 'error': "No autorizado: token ausente o incorrecto."}
+            # Solo el propietario del servidor puede leer el fichero del token.
+            peer_uid = os.getuid() if hasattr(os, "getuid") else None
+        cmd = request.get('cmd', 'compile')
+        if cmd == 'ping':
+            return {'status': 'ok'}
+        if cmd == 'stats':
+            with self._stats_lock:
+                return {'status': 'ok', 'workers': self.workers, **self.stats}
+        if cmd == 'shutdown':
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {'status': 'ok'}
+        if cmd != 'compile':
+            return {'status': 'error', 'error': f"Comando desconocido: '{cmd}'"}
+        return self._compile(request, peer_uid)
+
+    # --- Métodos de Ayuda Internos ---
+
+    def _compile(self, request, peer_uid):
+        self._count('requests')
+        if not self.slots.acquire(blocking=False):
+            self._count('rejected')
+            return {'status': 'busy', 'error': "El servidor está saturado; reintente más tarde."}
+        try:
+            if 'file' not in request or 'cwd' not in request:
+                return {'status': 'error', 'error': "Faltan los campos 'file' y 'cwd'."}
+            try:
+                _check_request_paths(request, peer_uid)
+            except (OSError, ValueError) as e:
+                return {'status': 'error', 'error': f"Petición rechazada: {e}"}
+            try:
+                args, unknown = self.cli_parser.parse_known_args([request['file']] + list(request.get('options', [])))
+            except SystemExit:
+                return {'status': 'error', 'error': "Opciones de compilación no válidas."}
+            if unknown:
+                return {'status': 'error', 'error': f"Opciones desconocidas: {' '.join(unknown)}"}
+            future = self.executor.submit(compiler_cli.compile_in_worker, args, request['file'],
+                                          request['cwd'], request.get('output', False))
+            result = future.result()
+        finally:
+            self.slots.release()
+
+        self._count('compiled' if result['status'] == 'ok' else 'failed')
+        if result['status'] == 'ok' and request.get('artifacts'):
+            cwd = request['cwd']
+            result['artifacts'] = {}
+            for key in ('tex_path', 'interpreter_path', 'polynomial_path'):
+                if not result.get(key):
+                    continue  # artefacto no pedido (--emit)
+                with open(os.path.join(cwd, result[key]), encoding="utf-8") as f:
+                    result['artifacts'][key] = f.read()
+        return result
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                peer_uid = _peer_uid(self.connection)
+                for raw in self.rfile:
+                    if not raw.strip():
+                        continue
+                    try:
+                        response = server.handle_request(json.loads(raw), peer_uid)
+                    except Exception as e:
+                        response = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+                    self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode('utf-8'))
+                    self.wfile.flush()
+
+        return Handler
+
+
+def _warm_up(_):
+    return os.getpid()
+
+def _peer_uid(connection):
+    """Usuario del otro extremo de un socket Unix (SO_PEERCRED), o None en TCP."""
+    if connection.family != getattr(socket, "AF_UNIX", None):
+        return None
+    if hasattr(socket, "SO_PEERCRED"):
+        credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", credentials)[1]
+    # Sin SO_PEERCRED, el modo 0600 del socket solo deja conectar al propietario.
+    return os.getuid()
+
+def _check_request_paths(request, peer_uid):
+    """
+    Comprueba que el directorio de trabajo y el fichero de la petición existen
+    y pertenecen al usuario que la hace (el servidor escribirá en 'cwd/output').
+
+    Raises:
+        ValueError, OSError: Si no es así.
+    """
+    cwd = request['cwd']
+    if not os.path.isabs(cwd) or not os.path.isdir(cwd):
+        raise ValueError(f"'cwd' debe ser un directorio con ruta absoluta: {cwd}")
+    path = os.path.join(cwd, request['file'])
+    if not os.path.isfile(path):
+        raise ValueError(f"No existe el archivo: {path}")
+    if peer_uid is None or not hasattr(os, "getuid"):
+        return
+    for kind, target in (("El directorio", cwd), ("El archivo", path)):
+        if os.stat(target).st_uid != peer_uid:
+            raise PermissionError(f"{kind} {target} no pertenece al usuario que hace la petición")
+
+def _ensure_private_dir(path):
+    """Crea el directorio con modo 0700 y comprueba que es del usuario actual."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{path} no es un directorio del usuario actual")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+def _write_private_file(path, content):
+    """Escribe un fichero legible solo por su propietario (modo 0600)."""
+    _ensure_private_dir(os.path.dirname(os.path.abspath(path)))
+    if os.path.lexists(path):
+        os.remove(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def read_token(token_file=DEFAULT_TOKEN_FILE):
+    """Token del servidor TCP (lo escribe 'serve --tcp')."""
+    with open(token_file, encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def send_request(request, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, timeout=None,
+                 token_file=DEFAULT_TOKEN_FILE):
+    """
+    Cliente: envía una petición al servidor y devuelve su respuesta (dict). En
+    TCP (sin `unix_socket`) añade el token leído de `token_file`.
+    """
+    if not unix_socket:
+        request = {**request, 'token': read_token(token_file)}
+    if unix_socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = unix_socket
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = (host, port)
+    with sock:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        sock.sendall((json.dumps(request) + "\n").encode('utf-8'))
+        with sock.makefile("rb") as stream:
+            return json.loads(stream.readline())
+
+
+def main():
+    """CLI: 'serve' arranca el servidor; 'compile', 'ping', 'stats' y 'shutdown' son el cliente."""
+    cli_parser = argparse.ArgumentParser(description="Servidor de compilación Diophantus.")
+    cli_parser.add_argument("--socket", default=DEFAULT_SOCKET,
+                            help=f"Ruta del socket Unix (por defecto: {DEFAULT_SOCKET}).")
+    cli_parser.add_argument("--tcp", action="store_true",
+                            help="Usar TCP en --host:--port en lugar del socket Unix. Las peticiones se autentican "
+                                 "con el token que el servidor escribe en --token-file.")
+    cli_parser.add_argument("--host", default=DEFAULT_HOST, help=f"Host TCP (por defecto: {DEFAULT_HOST}).")
+    cli_parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Puerto TCP (por defecto: {DEFAULT_PORT}).")
+    cli_parser.add_argument("--token-file", default=DEFAULT_TOKEN_FILE,
+                            help=f"Fichero del token en modo TCP (por defecto: {DEFAULT_TOKEN_FILE}).")
+    commands = cli_parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Arranca el servidor.")
+    serve_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                              help=f"Procesos de compilación (por defecto: {DEFAULT_WORKERS}).")
+
+    compile_parser = commands.add_parser("compile", help="Compila un archivo en el servidor. Las demás "
+                                         "opciones (p. ej. --reduce-degree) se pasan a main.py.")
+    compile_parser.add_argument("input_file", help="La ruta al archivo .c compatible.")
+    compile_parser.add_argument("--artifacts", action="store_true",
+                                help="Imprime el contenido de los artefactos en lugar de solo sus rutas.")
+    compile_parser.add_argument("--quiet", action="store_true", help="No mostrar la salida del compilador.")
+
+    for command in ("ping", "stats", "shutdown"):
+        commands.add_parser(command)
+    # Las opciones que el cliente no reconoce son opciones de main.py y se reenvían al servidor.
+    args, options = cli_parser.parse_known_args()
+    if options and args.command != "compile":
+        cli_parser.error(f"argumentos no reconocidos: {' '.join(options)}")
+    use_tcp = args.tcp or not hasattr(socket, "AF_UNIX")
+    connection = {'host': args.host, 'port': args.port, 'unix_socket': None if use_tcp else args.socket,
+                  'token_file': args.token_file}
+
+    if args.command == "serve":
+        CompileServer(max(1, args.workers)).serve(**connection)
+        return
+
+    if args.command == "compile":
+        request = {'cmd': 'compile', 'file': os.path.abspath(args.input_file), 'cwd': os.getcwd(),
+                   'options': options, 'artifacts': args.artifacts, 'output': not args.quiet}
+    else:
+        request = {'cmd': args.command}
+
+    try:
+        response = send_request(request, **connection)
+    except OSError as e:
+        print(f"--- ERROR: No se pudo contactar con el servidor de compilación: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command != "compile":
+        print(json.dumps(response, indent=2, ensure_ascii=False))
+    else:
+        if response.get('output'):
+            print(response.pop('output'), end="")
+        artifacts = response.pop('artifacts', None)
+        if artifacts:
+            for content in artifacts.values():
+                print(content)
+        elif response['status'] == 'ok':
+            print(f"  -> {response['tex_path']}\n  -> {response['interpreter_path']} ({response['seconds']:.3f} s)")
+        if response['status'] != 'ok':
+            print(f"--- ERROR: {response.get('error')}", file=sys.stderr)
+    if response.get('status') != 'ok':
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from compiler.api import Compilation, compile_program
@@ -0,0 +1,280 @@
+"""
+API de biblioteca del compilador: compile_program() devuelve un objeto
+Compilation cuyos artefactos se calculan la primera vez que se piden y se
+reutilizan después. Pedir solo el texto del intérprete no ejecuta la
+conversión a polinomios ni genera el informe LaTeX.
+
+    from compiler import compile_program
+    program = compile_program("examples/pong.c")
+    program.interpreter_text    # análisis, generación y optimización
+    program.latex               # además, sistema polinómico y ecuación única
+"""
+import os
+from functools import cached_property
+
+from compiler import constraint_optimizer
+from compiler import degree_reducer
+from compiler import equation_exporter
+from compiler import generator
+from compiler import invariants
+from compiler import optimizer
+from compiler import polynomial_converter
+from compiler import slicing
+from compiler import sparse_polynomial
+
+# Límite por ecuación para la expansión de C_n en la sección "sin optimizar" del informe.
+DEFAULT_MAX_EXPANDED_BYTES = 4096
+# Límite de términos para la expansión canónica de la ecuación única P=0.
+DEFAULT_MAX_MASTER_TERMS = 200000
+
+# Artefactos que se pueden pedir (Compilation.artifact y --emit del CLI).
+ARTIFACTS = ['function', 'optimized', 'polynomial_system', 'polynomial', 'latex', 'interpreter']
+
+def compile_program(path_or_source, **options):
+    """
+    Args:
+        path_or_source (str): Ruta de un .c o el propio código C (se considera
+            código si contiene saltos de línea o llaves).
+        **options: Ver Compilation.
+
+    Returns:
+        Compilation: Sin ninguna fase ejecutada todavía.
+    """
+    return Compilation(path_or_source, **options)
+
+def convert_to_polynomial_system(optimized_f, sub_defs, optimize_constraints, reduce_degree, max_master_terms,
+                                 memo=None):
+    """
+    Fase 4 completa: conversión a polinomios, simplificación, reducción de grado
+    opcional y estadísticas de la ecuación única.
+
+    Args:
+        memo (ConversionCache, opcional): Conversiones por ecuación de
+            compilaciones anteriores (modo --watch).
+
+    Returns:
+        tuple: (poly_system, poly_converter_info)
+    """
+    poly_conv = polynomial_converter.PolynomialConverter(optimized_f, sub_defs, memo)
+    poly_system = poly_conv.convert()
+    poly_converter_info = {
+        'existential_vars_count': poly_conv.existential_vars_count,
+        'num_equations': len(poly_system)
+    }
+    if optimize_constraints:
+        constraint_opt = constraint_optimizer.ConstraintOptimizer(poly_system)
+        poly_system = constraint_opt.optimize()
+        poly_converter_info['existential_vars_count'] = constraint_opt.existential_vars_count
+        poly_converter_info['num_equations'] = len(poly_system)
+        poly_converter_info['constraint_optimization'] = constraint_opt.get_stats()
+    if reduce_degree:
+        reducer = degree_reducer.DegreeReducer(poly_system, poly_converter_info['existential_vars_count'])
+        poly_system = reducer.reduce()
+        poly_converter_info['existential_vars_count'] = reducer.existential_vars_count
+        poly_converter_info['num_equations'] = len(poly_system)
+        poly_converter_info['degree_reduction'] = reducer.get_stats()
+    master = expand_master_polynomial(poly_system, max_master_terms)
+    if master is not None:
+        poly_converter_info['master_polynomial'] = master
+    return poly_system, poly_converter_info
+
+def expand_master_polynomial(poly_system, max_master_terms):
+    """
+    Estadísticas de la expansión canónica de la ecuación única P=0
+    (SparsePolynomialExpander.expand_master), o None si max_master_terms es 0.
+    """
+    if max_master_terms <= 0:
+        return None
+    return sparse_polynomial.SparsePolynomialExpander(max_master_terms).expand_master(poly_system)
+
+def restrict_function(unoptimized_f, state_vars, input_vars, initial_values, specialize_invariants=False, only=None):
+    """
+    Aplica a F las reducciones previas a la optimización: sustitución de las
+    variables de estado invariantes (--specialize-invariants) y cono de
+    influencia de las variables pedidas (--only).
+
+    Returns:
+        tuple: (F, variables de estado, entradas, {variable constante: valor},
+        variables de estado descartadas)
+
+    Raises:
+        ValueError: Si alguna variable de `only` no es de estado.
+    """
+    constant_state_vars = {}
+    if specialize_invariants:
+        constant_state_vars = invariants.find_invariants(unoptimized_f, state_vars, initial_values)
+        if constant_state_vars:
+            unoptimized_f = invariants.specialize(unoptimized_f, constant_state_vars)
+            state_vars = [var for var in state_vars if var not in constant_state_vars]
+            used = set().union(*(slicing.variables_in(expr) for expr in unoptimized_f.values()))
+            input_vars = {name for name in input_vars if name in used}
+    pruned_state_vars = []
+    if only:
+        unoptimized_f, state_vars, input_vars, pruned_state_vars = slicing.slice_function(
+            unoptimized_f, state_vars, input_vars, only)
+    return unoptimized_f, state_vars, input_vars, constant_state_vars, pruned_state_vars
+
+
+class Compilation:
+    """
+    Un programa compilado bajo demanda. Cada propiedad ejecuta solo las fases
+    que necesita (y las memoriza), de modo que pedir `interpreter_text` no
+    convierte a polinomios y pedir `poly_system` no genera el informe.
+    """
+    def __init__(self, path_or_source, optimize_constraints=True, reduce_degree=False,
+                 max_master_terms=DEFAULT_MAX_MASTER_TERMS, max_expanded_bytes=DEFAULT_MAX_EXPANDED_BYTES,
+                 specialize_invariants=False, only=None, index=None):
+        """
+        Args:
+            path_or_source (str): Ruta de un .c o el propio código C.
+            optimize_constraints, reduce_degree, max_master_terms,
+            max_expanded_bytes, specialize_invariants, only: Como las opciones
+                del mismo nombre del CLI (main.py).
+            index (clang.cindex.Index, opcional): Índice de libclang a reutilizar.
+        """
+        self.path_or_source = path_or_source
+        self.optimize_constraints = optimize_constraints
+        self.reduce_degree = reduce_degree
+        self.max_master_terms = max_master_terms
+        self.max_expanded_bytes = max_expanded_bytes or None
+        self.specialize_invariants = specialize_invariants
+        self.only = only
+        self.index = index
+
+    # --- FASES 1-3 ---
+
+    @cached_property
+    def ast_map(self):
+        from compiler import parser
+        if '\n' in self.path_or_source or '{' in self.path_or_source:
+            return parser.parse_c_source(self.path_or_source, index=self.index)
+        if not os.path.isfile(self.path_or_source):
+            raise FileNotFoundError(f"No se pudo encontrar el archivo de entrada '{self.path_or_source}'")
+        return parser.parse_c_file(self.path_or_source, self.index)
+
+    @cached_property
+    def _function(self):
+        unoptimized_f, input_vars = generator.generate_function(self.ast_map)
+        return restrict_function(unoptimized_f, self.ast_map['state_vars'], input_vars,
+                                 self.ast_map.get('initial_values', {}), self.specialize_invariants, self.only)
+
+    @property
+    def f(self):
+        """F sin optimizar ({variable de estado: árbol de tuplas})."""
+        return self._function[0]
+
+    @property
+    def state_vars(self):
+        return self._function[1]
+
+    @property
+    def input_vars(self):
+        return self._function[2]
+
+    @property
+    def constant_state_vars(self):
+        return self._function[3]
+
+    @property
+    def pruned_state_vars(self):
+        return self._function[4]
+
+    @cached_property
+    def _optimized(self):
+        return optimizer.Optimizer(self.f).optimize()
+
+    @property
+    def optimized_f(self):
+        """F tras la CSE."""
+        return self._optimized[0]
+
+    @property
+    def sub_defs(self):
+        """Definiciones C_n de la CSE."""
+        return self._optimized[1]
+
+    # --- FASE 4 ---
+
+    @cached_property
+    def _polynomial(self):
+        # La expansión de P=0 es cara y solo la usa el informe: ver master_polynomial.
+        return convert_to_polynomial_system(self.optimized_f, self.sub_defs, self.optimize_constraints,
+                                            self.reduce_degree, 0)
+
+    @property
+    def poly_system(self):
+        """Sistema polinómico (lista de 'LHS = 0')."""
+        return self._polynomial[0]
+
+    @cached_property
+    def master_polynomial(self):
+        """Estadísticas de la expansión canónica de P=0 (None si max_master_terms es 0)."""
+        return expand_master_polynomial(self.poly_system, self.max_master_terms)
+
+    @cached_property
+    def poly_info(self):
+        """
+        Estadísticas de la conversión (ecuaciones, variables existenciales...).
+        Incluye 'master_polynomial', así que pedirlas expande la ecuación única.
+        """
+        info = dict(self._polynomial[1])
+        if self.master_polynomial is not None:
+            info['master_polynomial'] = self.master_polynomial
+        return info
+
+    # --- ARTEFACTOS ---
+
+    @cached_property
+    def exporter(self):
+        return equation_exporter.EquationExporter(self.f, self.optimized_f, self.sub_defs, self.state_vars)
+
+    @cached_property
+    def single_polynomial(self):
+        """La ecuación única P=0."""
+        return self.exporter.export_single_polynomial(self.poly_system)
+
+    @cached_property
+    def interpreter_text(self):
+        """Contenido del *_interpreter_input.txt."""
+        return self.exporter.export_optimized_for_interpreter()
+
+    @cached_property
+    def latex(self):
+        """Informe LaTeX completo (sin presupuesto de tamaño: ver main.py para el control de seguridad)."""
+        from compiler import latex_exporter
+        return latex_exporter.LatexExporter(
+            self.f, self.optimized_f, self.sub_defs, self.state_vars, self.input_vars,
+            self.poly_system, self.single_polynomial, self.poly_info, None, self.max_expanded_bytes,
+            None, self.pruned_state_vars, self.constant_state_vars
+        ).export()
+
+    def artifact(self, name):
+        """
+        Artefacto por nombre (uno de ARTIFACTS): 'function' y 'optimized' son
+        los árboles de tuplas; el resto, texto o la lista de restricciones.
+        """
+        getters = {
+            'function': lambda: self.f,
+            'optimized': lambda: (self.optimized_f, self.sub_defs),
+            'polynomial_system': lambda: self.poly_system,
+            'polynomial': lambda: self.single_polynomial,
+            'latex': lambda: self.latex,
+            'interpreter': lambda: self.interpreter_text,
+        }
+        if name not in getters:
+            raise ValueError(f"Artefacto desconocido: '{name}' (disponibles: {', '.join(ARTIFACTS)})")
+        return getters[name]()
+
+    def computed(self):
+        """Fases ya ejecutadas, en el orden del pipeline."""
+        stages = [('parse', 'ast_map'), ('generate', '_function'), ('optimize', '_optimized'),
+                  ('poly', '_polynomial'), ('master', 'master_polynomial'), ('single_poly', 'single_polynomial'),
+                  ('latex', 'latex'),
+                  ('interpreter', 'interpreter_text')]
+        return [stage for stage, attribute in stages if attribute in self.__dict__]
+
+    def engine(self, **engine_options):
+        """Motor de ecuaciones del programa (EquationEngine.from_ir), sin pasar por ficheros."""
+        from interpreter.interpreter import EquationEngine
+        return EquationEngine.from_ir(self.optimized_f, self.sub_defs, self.state_vars, self.input_vars,
+                                      **engine_options)
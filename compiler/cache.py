@@ -0,0 +1,350 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+import pickle
+import stat
+import sys
+import tempfile
+
+# Módulos del compilador de los que depende el resultado de cada fase. Su código
+# fuente forma parte de la clave: modificar, por ejemplo, el optimizador invalida
+# las fases 'optimize' y 'poly', pero no 'parse' ni 'generate'. Los exportadores
+# no se cachean, así que cambiar las plantillas LaTeX no invalida nada.
+PHASE_MODULES = {
+    'parse': ['parser'],
+    'generate': ['generator'],
+    'optimize': ['optimizer', 'slicing', 'invariants', 'composition', 'api'],
+    'poly': ['polynomial_converter', 'constraint_optimizer', 'degree_reducer', 'sparse_polynomial', 'api'],
+}
+
+DEFAULT_CACHE_DIR = ".diophantus_cache"
+# Entradas que un proceso de larga duración mantiene deserializadas en memoria.
+DEFAULT_MEMORY_ENTRIES = 64
+
+# La umask solo se puede leer cambiándola; se lee una vez, al importar, para no
+# alterarla mientras otros hilos crean ficheros.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+def write_atomic(path, content):
+    """
+    Escribe un fichero de forma atómica: el contenido (str o bytes) se vuelca a
+    un temporal en el mismo directorio y se renombra sobre el destino, de modo
+    que un lector (pdflatex, el intérprete, otra compilación) nunca ve un
+    fichero a medio escribir. El fichero conserva el modo del destino si ya
+    existía o, si no, el de open() (0666 menos la umask); mkstemp crea el
+    temporal con 0600.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, _target_mode(path))
+        if isinstance(content, bytes):
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def file_signatures(paths):
+    """
+    (ruta, tamaño, fecha de modificación en ns) de cada fichero; None en los
+    que ya no existen.
+    """
+    signatures = []
+    for path in paths:
+        try:
+            info = os.stat(path)
+            signatures.append((path, info.st_size, info.st_mtime_ns))
+        except OSError:
+            signatures.append((path, None, None))
+    return signatures
+
+def _prepare_private_dir(path):
+    """
+    Crea el directorio con modo 0700 y comprueba que es un directorio real del
+    usuario actual; si otros tenían permisos sobre él, se los retira.
+
+    Raises:
+        PermissionError: Si pertenece a otro usuario o es un enlace simbólico.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{path} no es un directorio del usuario actual")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+def _check_owned_file(path, info):
+    """
+    Comprueba que una entrada abierta (su os.fstat) es un fichero regular del
+    usuario actual antes de leerla.
+
+    Raises:
+        PermissionError: En otro caso.
+    """
+    if not hasattr(os, "getuid"):
+        return
+    if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{path} no es un fichero del usuario actual")
+
+def _target_mode(path):
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        return 0o666 & ~_UMASK
+
+class MemoryCache:
+    """
+    Capa en memoria (LRU) delante de la caché en disco, para procesos de larga
+    duración (el servidor de compilación) que compilan el mismo programa muchas
+    veces: evita releer y deserializar las entradas.
+    """
+    def __init__(self, max_entries=DEFAULT_MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """Devuelve (encontrado, valor) y marca la entrada como usada recientemente."""
+        if key not in self._entries:
+            return False, None
+        self._entries.move_to_end(key)
+        return True, self._entries[key]
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class CompilationCache:
+    """
+    Caché de resultados intermedios de la compilación, direccionada por contenido.
+
+    Cada entrada es el resultado serializado (pickle) de una fase y su clave es
+    un SHA-256 de:
+        - el nombre de la fase y el código fuente de los módulos que la implementan,
+        - la clave de la fase anterior (o, para 'parse', el código C, los
+          argumentos de libclang y la firma de la biblioteca libclang),
+        - las opciones que afectan a su resultado,
+        - para las fases con dependencias que solo se conocen al calcularlas
+          (las cabeceras #include del análisis), el tamaño y la fecha de
+          modificación de esos ficheros (ver get_or_compute_tracked).
+    Así, una fase se carga de la caché exactamente cuando todas sus entradas
+    coinciden, y cualquier cambio aguas arriba invalida las fases siguientes.
+
+    Las entradas se deserializan con pickle, así que el directorio debe ser
+    privado: si no es un directorio del usuario actual, la caché en disco se
+    desactiva, y solo se cargan entradas que sean ficheros del usuario.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, enabled=True, memory=None):
+        """
+        Inicializa la caché.
+
+        Args:
+            cache_dir (str): Directorio donde se guardan las entradas.
+            enabled (bool): Si es False, todas las fases se recalculan y no se
+                escribe nada en disco.
+            memory (MemoryCache, opcional): Capa en memoria compartida entre
+                compilaciones del mismo proceso.
+        """
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.memory = memory
+        self.stats = {phase: {'hits': 0, 'misses': 0, 'memory_hits': 0, 'bytes_read': 0, 'bytes_written': 0}
+                      for phase in PHASE_MODULES}
+        self._module_hashes = {}
+        # None hasta comprobar el directorio (ver _disk_enabled).
+        self._private_dir = None
+
+    def key(self, phase, *parts):
+        """
+        Calcula la clave de una fase.
+
+        Args:
+            phase (str): Nombre de la fase (ver PHASE_MODULES).
+            *parts: Entradas de la fase: bytes, cadenas, claves de fases previas u
+                otros valores con una representación (repr) estable.
+
+        Returns:
+            str: Clave hexadecimal.
+        """
+        digest = hashlib.sha256(phase.encode('utf-8'))
+        for module in PHASE_MODULES[phase]:
+            digest.update(self._module_hash(module))
+        for part in parts:
+            data = part if isinstance(part, bytes) else repr(part).encode('utf-8')
+            digest.update(len(data).to_bytes(8, 'little'))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get_or_compute(self, phase, key, compute):
+        """
+        Devuelve el resultado de la fase desde la caché, o lo calcula con
+        `compute()` y lo guarda.
+        """
+        found, value = self._lookup(phase, key)
+        if found:
+            return value
+        self.stats[phase]['misses'] += 1
+        value = compute()
+        self._save(phase, key, value)
+        return value
+
+    def get_or_compute_tracked(self, phase, base_key, compute, dependencies):
+        """
+        Como get_or_compute, para una fase cuyo resultado depende también de
+        ficheros que solo se conocen al calcularla (p. ej. las cabeceras que
+        incluye el código C). Junto a la entrada se guarda la lista de esos
+        ficheros; la clave final combina `base_key` con su tamaño y fecha de
+        modificación, así que editar una cabecera invalida la entrada.
+
+        Args:
+            base_key (str): Clave de las entradas conocidas de antemano.
+            dependencies (callable): Recibe el resultado y devuelve las rutas
+                de las que depende.
+
+        Returns:
+            tuple: (resultado, clave final)
+        """
+        manifest = self._read_manifest(phase, base_key)
+        if manifest is not None:
+            key = self.key(phase, base_key, file_signatures(manifest))
+            found, value = self._lookup(phase, key)
+            if found:
+                return value, key
+        self.stats[phase]['misses'] += 1
+        value = compute()
+        manifest = sorted(set(dependencies(value)))
+        key = self.key(phase, base_key, file_signatures(manifest))
+        self._save(phase, key, value)
+        self._write_manifest(phase, base_key, manifest)
+        return value, key
+
+    def format_stats(self):
+        """Resumen legible de aciertos y fallos por fase."""
+        disabled = not self.enabled or self._private_dir is False
+        lines = [f"  [Cache] Directorio: {self.cache_dir}" + (" (desactivada)" if disabled else "")]
+        for phase, s in self.stats.items():
+            lines.append(f"    - {phase:<9} aciertos: {s['hits']}  fallos: {s['misses']}  "
+                         f"leídos: {s['bytes_read']} B  escritos: {s['bytes_written']} B")
+        return "\n".join(lines)
+
+    # --- Métodos de Ayuda Internos ---
+
+    def _lookup(self, phase, key):
+        """Devuelve (encontrado, valor) desde la memoria o el disco."""
+        if self.enabled and self.memory is not None:
+            found, value = self.memory.get((phase, key))
+            if found:
+                self.stats[phase]['hits'] += 1
+                self.stats[phase]['memory_hits'] += 1
+                print(f"  [Cache] Fase '{phase}' cargada de la caché en memoria ({key[:12]}).")
+                return True, value
+        if self._disk_enabled():
+            path = self._entry_path(phase, key)
+            try:
+                with open(path, "rb") as f:
+                    _check_owned_file(path, os.fstat(f.fileno()))
+                    data = f.read()
+                value = pickle.loads(data)
+                self.stats[phase]['hits'] += 1
+                self.stats[phase]['bytes_read'] += len(data)
+                print(f"  [Cache] Fase '{phase}' cargada de la caché ({key[:12]}).")
+                if self.memory is not None:
+                    self.memory.put((phase, key), value)
+                return True, value
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                # Entrada corrupta o de una versión incompatible: se recalcula.
+                print(f"  [Cache] AVISO: Entrada de la fase '{phase}' ilegible ({e}); se recalcula.", file=sys.stderr)
+        return False, None
+
+    def _save(self, phase, key, value):
+        if self.enabled:
+            if self._disk_enabled():
+                self._store(phase, key, value)
+            if self.memory is not None:
+                self.memory.put((phase, key), value)
+
+    def _disk_enabled(self):
+        """
+        Comprueba (una vez) que el directorio de la caché es privado; si no lo
+        es, avisa y desactiva la caché en disco.
+        """
+        if not self.enabled:
+            return False
+        if self._private_dir is None:
+            try:
+                _prepare_private_dir(self.cache_dir)
+                self._private_dir = True
+            except OSError as e:
+                print(f"  [Cache] AVISO: Caché en disco desactivada: {e}", file=sys.stderr)
+                self._private_dir = False
+        return self._private_dir
+
+    def _manifest_path(self, phase, base_key):
+        return os.path.join(self.cache_dir, phase, f"{base_key}.deps.json")
+
+    def _read_manifest(self, phase, base_key):
+        """Ficheros de los que dependía la última entrada calculada para base_key (o None)."""
+        if not self.enabled:
+            return None
+        if self.memory is not None:
+            found, manifest = self.memory.get((phase + ':deps', base_key))
+            if found:
+                return manifest
+        if not self._disk_enabled():
+            return None
+        try:
+            with open(self._manifest_path(phase, base_key), encoding="utf-8") as f:
+                _check_owned_file(f.name, os.fstat(f.fileno()))
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.memory is not None:
+            self.memory.put((phase + ':deps', base_key), manifest)
+        return manifest
+
+    def _write_manifest(self, phase, base_key, manifest):
+        if not self.enabled:
+            return
+        if self.memory is not None:
+            self.memory.put((phase + ':deps', base_key), manifest)
+        if not self._disk_enabled():
+            return
+        try:
+            os.makedirs(os.path.join(self.cache_dir, phase), exist_ok=True)
+            write_atomic(self._manifest_path(phase, base_key), json.dumps(manifest))
+        except OSError as e:
+            print(f"  [Cache] AVISO: No se pudieron guardar las dependencias de '{phase}': {e}", file=sys.stderr)
+
+    def _entry_path(self, phase, key):
+        return os.path.join(self.cache_dir, phase, f"{key}.pkl")
+
+    def _store(self, phase, key, value):
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            os.makedirs(os.path.join(self.cache_dir, phase), exist_ok=True)
+            write_atomic(self._entry_path(phase, key), data)
+            self.stats[phase]['bytes_written'] += len(data)
+        except (OSError, pickle.PicklingError, RecursionError) as e:
+            # La caché es una optimización: si no se puede escribir, se continúa sin ella.
+            print(f"  [Cache] AVISO: No se pudo guardar la fase '{phase}': {e}", file=sys.stderr)
+
+    def _module_hash(self, module):
+        if module not in self._module_hashes:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{module}.py")
+            with open(path, "rb") as f:
+                self._module_hashes[module] = hashlib.sha256(f.read()).digest()
+        return self._module_hashes[module]
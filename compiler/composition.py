@@ -0,0 +1,291 @@
+import re
+
+# Formato de las entradas de cada tick en F^k: 'getch' del tick i -> 'getch_t<i>'.
+INPUT_TICK_FORMAT = "{name}_t{tick}"
+
+_FOLDABLE_OPS = {
+    '+': lambda a, b: a + b, '-': lambda a, b: a - b, '*': lambda a, b: a * b,
+    '/': lambda a, b: a // b, 'neg': lambda a: -a,
+    '==': lambda a, b: int(a == b), '!=': lambda a, b: int(a != b),
+    '>': lambda a, b: int(a > b), '<': lambda a, b: int(a < b),
+    '>=': lambda a, b: int(a >= b), '<=': lambda a, b: int(a <= b),
+    '&&': lambda a, b: int(bool(a) and bool(b)), '||': lambda a, b: int(bool(a) or bool(b)),
+    'if': lambda c, a, b: a if c else b,
+}
+
+
+class ExpressionDAG:
+    """
+    Grafo de expresiones con hash-consing: cada subexpresión distinta existe una
+    sola vez y se identifica por un entero. Construir un nodo que ya existe
+    devuelve el mismo identificador, así que la sustitución de F en sí misma
+    comparte automáticamente todo lo que se repite (la CSE es implícita).
+
+    Los nodos son tuplas ('leaf', valor) u (op, id_hijo_1, id_hijo_2, ...).
+    El evaluador de referencia evalúa todos los operandos, así que las
+    simplificaciones que descartan uno (x*0, 0 && x, 1 || x, la rama no tomada
+    de un 'if') solo se aplican si no puede dividir entre cero.
+    """
+    def __init__(self):
+        self.nodes = []
+        self._ids = {}
+        self._raises = []
+
+    def leaf(self, value):
+        return self._intern(('leaf', value))
+
+    def node(self, op, children):
+        """Nodo interno, con plegado de constantes y simplificaciones locales."""
+        values = [self.constant_value(child) for child in children]
+        known = [value is not None for value in values]
+        if all(known) and op in _FOLDABLE_OPS and not (op == '/' and values[1] == 0):
+            return self.leaf(_FOLDABLE_OPS[op](*values))
+        if op == 'if':
+            if known[0] and not self.may_raise(children[2 if values[0] else 1]):
+                return children[1] if values[0] else children[2]
+            if children[1] == children[2]:
+                return children[1]
+        if op == '*':
+            for i, j in ((0, 1), (1, 0)):
+                if known[i] and values[i] == 0 and not self.may_raise(children[j]): return self.leaf(0)
+                if known[i] and values[i] == 1: return children[j]
+        if op == '+':
+            for i, j in ((0, 1), (1, 0)):
+                if known[i] and values[i] == 0: return children[j]
+        if op == '-' and known[1] and values[1] == 0:
+            return children[0]
+        if op in ('&&', '||') and not any(self.may_raise(child) for child in children):
+            if op == '&&' and any(k and v == 0 for k, v in zip(known, values)):
+                return self.leaf(0)
+            if op == '||' and any(k and v != 0 for k, v in zip(known, values)):
+                return self.leaf(1)
+        return self._intern((op,) + tuple(children))
+
+    def from_tuple(self, expr, rename):
+        """
+        Importa un árbol de tuplas del generador.
+
+        Args:
+            expr: Árbol de tuplas.
+            rename (function): nombre de variable -> identificador de nodo.
+        """
+        if isinstance(expr, tuple):
+            return self.node(expr[0], [self.from_tuple(arg, rename) for arg in expr[1:]])
+        if isinstance(expr, str):
+            return rename(expr)
+        return self.leaf(expr)
+
+    def constant_value(self, node_id):
+        """Valor del nodo si es una constante entera, o None."""
+        node = self.nodes[node_id]
+        if node[0] == 'leaf' and isinstance(node[1], int):
+            return node[1]
+        return None
+
+    def may_raise(self, node_id):
+        """Si evaluar el nodo puede lanzar ZeroDivisionError (una división sin divisor constante no nulo)."""
+        return self._raises[node_id]
+
+    def to_tuple(self, node_id, memo=None):
+        """Árbol de tuplas equivalente al nodo (los subárboles repetidos son el mismo objeto)."""
+        memo = {} if memo is None else memo
+        if node_id not in memo:
+            node = self.nodes[node_id]
+            if node[0] == 'leaf':
+                memo[node_id] = node[1]
+            else:
+                memo[node_id] = (node[0],) + tuple(self.to_tuple(child, memo) for child in node[1:])
+        return memo[node_id]
+
+    def _intern(self, key):
+        node_id = self._ids.get(key)
+        if node_id is None:
+            node_id = len(self.nodes)
+            self.nodes.append(key)
+            if key[0] == 'leaf':
+                self._raises.append(False)
+            else:
+                divisor = self.constant_value(key[2]) if key[0] == '/' else 1
+                self._raises.append(not divisor or any(self._raises[child] for child in key[1:]))
+            self._ids[key] = node_id
+        return node_id
+
+
+class ComposedFunction:
+    """
+    F^k: el estado tras `ticks` pasos como función del estado inicial y de las
+    entradas de cada tick (renombradas con INPUT_TICK_FORMAT).
+    """
+    def __init__(self, dag, outputs, ticks, state_vars, input_vars):
+        self.dag = dag
+        self.outputs = outputs
+        self.ticks = ticks
+        self.state_vars = list(state_vars)
+        self.input_vars = sorted(input_vars)
+
+    @classmethod
+    def from_function(cls, f_function, state_vars, input_vars):
+        """F^1 a partir de la función F del generador (sin optimizar)."""
+        dag = ExpressionDAG()
+        inputs = set(input_vars)
+        rename = lambda name: dag.leaf(INPUT_TICK_FORMAT.format(name=name, tick=0) if name in inputs else name)
+        outputs = {var: dag.from_tuple(f_function[var], rename) if var in f_function else dag.leaf(var)
+                   for var in state_vars}
+        return cls(dag, outputs, 1, state_vars, input_vars)
+
+    @classmethod
+    def identity(cls, state_vars, input_vars):
+        dag = ExpressionDAG()
+        return cls(dag, {var: dag.leaf(var) for var in state_vars}, 0, state_vars, input_vars)
+
+    def then(self, other):
+        """
+        Composición: primero `self`, después `other`. Las variables de estado de
+        `other` se sustituyen por las salidas de `self` y sus entradas se
+        desplazan self.ticks ticks. El resultado se construye en un DAG nuevo,
+        de modo que solo contiene los nodos alcanzables y comparte (CSE) todo
+        lo que la sustitución haya vuelto idéntico.
+        """
+        dag = ExpressionDAG()
+        imported = {}
+        first = {var: _copy(self.dag, node_id, dag, imported, lambda value: dag.leaf(value))
+                 for var, node_id in self.outputs.items()}
+        shift = self.ticks
+        tick_re = re.compile(r'^(.*)_t(\d+)$')
+
+        def rename(value):
+            if isinstance(value, str):
+                if value in first:
+                    return first[value]
+                match = tick_re.match(value)
+                if match and match.group(1) in self.input_vars:
+                    return dag.leaf(INPUT_TICK_FORMAT.format(name=match.group(1), tick=int(match.group(2)) + shift))
+            return dag.leaf(value)
+
+        substituted = {}
+        outputs = {var: _copy(other.dag, node_id, dag, substituted, rename) for var, node_id in other.outputs.items()}
+        return ComposedFunction(dag, outputs, self.ticks + other.ticks, self.state_vars, self.input_vars)
+
+    def power(self, k, on_step=None):
+        """
+        self^k por cuadrados repetidos: O(log k) composiciones.
+
+        Args:
+            k (int): Número de aplicaciones (>= 1).
+            on_step (function, opcional): Se llama con cada resultado parcial.
+        """
+        if k < 1:
+            raise ValueError("El horizonte k debe ser al menos 1.")
+        result = ComposedFunction.identity(self.state_vars, self.input_vars)
+        square = self
+        while True:
+            if k & 1:
+                result = result.then(square)
+                if on_step:
+                    on_step(result)
+            k >>= 1
+            if not k:
+                return result
+            square = square.then(square)
+
+    def reachable_nodes(self):
+        """Identificadores de los nodos alcanzables desde las salidas, en orden topológico (hijos primero)."""
+        seen = set()
+        order = []
+        stack = [(node_id, False) for node_id in self.outputs.values()]
+        while stack:
+            node_id, expanded = stack.pop()
+            if expanded:
+                order.append(node_id)
+                continue
+            if node_id in seen:
+                continue
+            seen.add(node_id)
+            stack.append((node_id, True))
+            node = self.dag.nodes[node_id]
+            if node[0] != 'leaf':
+                stack.extend((child, False) for child in node[1:] if child not in seen)
+        return order
+
+    def export(self):
+        """
+        Convierte el DAG al formato del optimizador: (optimized_f, sub_defs). Los
+        nodos internos compartidos se convierten en definiciones C_n; los demás
+        se escriben en línea. Las condiciones de 'if' y los operandos de '||'
+        cuentan doble porque el formato del intérprete los repite al
+        aritmetizarlos.
+
+        Returns:
+            tuple: (optimized_f, sub_defs), listos para EquationExporter y
+            PolynomialConverter.
+        """
+        order = self.reachable_nodes()
+        references = {}
+        for node_id in order:
+            node = self.dag.nodes[node_id]
+            if node[0] == 'leaf':
+                continue
+            for position, child in enumerate(node[1:]):
+                weight = 2 if (node[0] == 'if' and position == 0) or node[0] == '||' else 1
+                references[child] = references.get(child, 0) + weight
+
+        names = {}
+        sub_defs = {}
+        expressions = {}
+        for node_id in order:
+            node = self.dag.nodes[node_id]
+            if node[0] == 'leaf':
+                expressions[node_id] = node[1]
+                continue
+            expr = (node[0],) + tuple(names.get(child, expressions[child]) for child in node[1:])
+            expressions[node_id] = expr
+            if references.get(node_id, 0) > 1:
+                name = f"C_{{{len(sub_defs)}}}"
+                sub_defs[name] = expr
+                names[node_id] = name
+        optimized_f = {var: names.get(node_id, expressions[node_id]) for var, node_id in self.outputs.items()}
+        return optimized_f, sub_defs
+
+    def stats(self):
+        """
+        Returns:
+            dict: Nodos del DAG, nodos que tendría el árbol expandido y número
+            de entradas por evaluación.
+        """
+        order = self.reachable_nodes()
+        tree_size = {}
+        for node_id in order:
+            node = self.dag.nodes[node_id]
+            tree_size[node_id] = 1 if node[0] == 'leaf' else 1 + sum(tree_size[child] for child in node[1:])
+        return {
+            'ticks': self.ticks,
+            'dag_nodes': len(order),
+            'expanded_tree_nodes': sum(tree_size[node_id] for node_id in self.outputs.values()),
+            'inputs': len(self.input_vars) * self.ticks,
+        }
+
+
+def compose_function(f_function, state_vars, input_vars, k, on_step=None):
+    """
+    F^k para el programa: atajo de ComposedFunction.from_function(...).power(k).
+    """
+    return ComposedFunction.from_function(f_function, state_vars, input_vars).power(k, on_step)
+
+def _copy(source, node_id, target, memo, rename):
+    """Copia el subgrafo de `node_id` de un DAG a otro, renombrando las hojas."""
+    if node_id in memo:
+        return memo[node_id]
+    stack = [(node_id, False)]
+    while stack:
+        current, expanded = stack.pop()
+        if current in memo:
+            continue
+        node = source.nodes[current]
+        if node[0] == 'leaf':
+            memo[current] = rename(node[1])
+        elif expanded:
+            memo[current] = target.node(node[0], [memo[child] for child in node[1:]])
+        else:
+            stack.append((current, True))
+            stack.extend((child, False) for child in node[1:] if child not in memo)
+    return memo[node_id]
@@ -0,0 +1,250 @@
+import re
+
+from compiler.sparse_polynomial import SparsePolynomialExpander
+
+# Variables que el optimizador puede eliminar: las intermedias C_n y las
+# existenciales e_n. Las de estado (x, x[t+1]) y las entradas se conservan.
+_ELIMINABLE_RE = re.compile(r'\b[Ce]_\d+\b')
+_E_VAR_RE = re.compile(r'\be_(\d+)\b')
+_VAR_RE = re.compile(r'[A-Za-z_]\w*(?:\[[^\]]*\])?')
+
+class ConstraintOptimizer:
+    """
+    Simplifica el sistema de ecuaciones generado por el PolynomialConverter.
+
+    La conversión es local a cada operador y produce restricciones redundantes:
+    alias del tipo `x - (y) = 0`, restricciones idénticas para comparaciones
+    repetidas y restricciones de booleanidad `t * (1 - t) = 0` que ya se deducen
+    de la definición de t. Este pase, en orden:
+        1. Sustituye los alias lineales (x = y, x = constante) y elimina su ecuación.
+        2. Elimina las ecuaciones triviales (0 = 0) y las duplicadas.
+        3. Elimina la booleanidad de variables definidas como combinación booleana
+           (producto, negación u OR) de variables ya booleanas.
+        4. Renumera las e_n de forma densa.
+
+    Las restricciones se comparan por su forma canónica expandida, pero se
+    conservan con el texto original (con las sustituciones aplicadas).
+    """
+    def __init__(self, poly_system):
+        """
+        Inicializa el optimizador.
+
+        Args:
+            poly_system (list): Ecuaciones "LHS = 0" del PolynomialConverter.
+        """
+        self.poly_system = poly_system
+        self.expander = SparsePolynomialExpander()
+        self.substitutions = {}
+        self.renumbering = {}
+        self.existential_vars_count = 0
+        self.stats = {}
+
+    def optimize(self):
+        """
+        Punto de entrada. Aplica todas las simplificaciones.
+
+        Returns:
+            list: El sistema simplificado.
+        """
+        print("  [ConstraintOptimizer] Simplificando el sistema de ecuaciones...")
+        system = self._substitute_aliases(self.poly_system)
+        aliases = len(self.poly_system) - len(system)
+        system, duplicates = self._remove_duplicates(system)
+        system, booleanity = self._remove_implied_booleanity(system)
+        system = self._renumber_existentials(system)
+
+        self.stats = {
+            'equations_before': len(self.poly_system),
+            'equations_after': len(system),
+            'vars_before': _count_vars(self.poly_system),
+            'vars_after': _count_vars(system),
+            'aliases_removed': aliases,
+            'duplicates_removed': duplicates,
+            'booleanity_removed': booleanity,
+        }
+        print(f"  [ConstraintOptimizer] ...{self.stats['equations_before']} -> {self.stats['equations_after']} ecuaciones "
+              f"({aliases} alias, {duplicates} duplicadas/triviales, {booleanity} booleanidades implícitas); "
+              f"{self.stats['vars_before']} -> {self.stats['vars_after']} variables.")
+        return system
+
+    def get_stats(self):
+        """Recuentos antes/después de la última optimización, para poly_converter_info."""
+        return self.stats
+
+    # --- Pases ---
+
+    def _substitute_aliases(self, system):
+        """
+        Recorre el sistema acumulando sustituciones x -> y para cada alias
+        encontrado, y repite hasta que ninguna ecuación sustituida sea un alias.
+        """
+        while True:
+            kept = []
+            found = False
+            for eq in system:
+                eq = self._apply_substitutions(eq)
+                alias = self._as_alias(self._canonical(eq))
+                if alias:
+                    var, replacement = alias
+                    self.substitutions[var] = replacement
+                    found = True
+                else:
+                    kept.append(eq)
+            system = kept
+            if not found:
+                # Las ecuaciones conservadas antes de encontrar un alias ya
+                # tienen aplicadas todas las sustituciones de esta pasada.
+                return [self._apply_substitutions(eq) for eq in system]
+
+    def _remove_duplicates(self, system):
+        seen = set(); kept = []
+        for eq in system:
+            poly = self._canonical(eq)
+            if not poly:
+                continue  # 0 = 0 tras las sustituciones
+            key = self._sign_normalized_key(poly)
+            if key not in seen:
+                seen.add(key); kept.append(eq)
+        return kept, len(system) - len(kept)
+
+    def _remove_implied_booleanity(self, system):
+        polys = [self._canonical(eq) for eq in system]
+        booleanity = {}   # variable -> posición de su restricción t*(1-t)
+        definitions = []  # (variable, polinomio del lado derecho)
+        for i, poly in enumerate(polys):
+            var = self._booleanity_var(poly)
+            if var is not None:
+                booleanity.setdefault(var, i)
+                continue
+            definitions.extend(self._definitions(poly))
+
+        # Cada variable deducida se apoya en otras ya booleanas; una variable que
+        # ha servido de apoyo conserva su restricción para no crear ciclos.
+        booleans = set(booleanity); used_as_base = set(); dropped = set()
+        changed = True
+        while changed:
+            changed = False
+            for var, rhs in definitions:
+                if var in dropped or var in used_as_base or var not in booleanity:
+                    continue
+                support = self._boolean_support(rhs, booleans - {var})
+                if support is not None:
+                    dropped.add(var); used_as_base.update(support); changed = True
+
+        drop_positions = {booleanity[var] for var in dropped}
+        kept = [eq for i, eq in enumerate(system) if i not in drop_positions]
+        return kept, len(drop_positions)
+
+    def _renumber_existentials(self, system):
+        used = sorted({int(n) for eq in system for n in _E_VAR_RE.findall(eq)})
+        mapping = {str(old): str(new) for new, old in enumerate(used)}
+        self.renumbering = {f"e_{old}": f"e_{new}" for old, new in mapping.items()}
+        self.existential_vars_count = len(used)
+        return [_E_VAR_RE.sub(lambda m: f"e_{mapping[m.group(1)]}", eq) for eq in system]
+
+    # --- Métodos de Ayuda Internos ---
+
+    def _canonical(self, eq):
+        return self.expander.expand_string(eq.rsplit(' =', 1)[0])
+
+    def _apply_substitutions(self, eq):
+        if not self.substitutions:
+            return eq
+        return _ELIMINABLE_RE.sub(lambda m: self._resolve(m.group(0)), eq)
+
+    def _resolve(self, var):
+        while var in self.substitutions:
+            var = self.substitutions[var]
+        return var
+
+    def _as_alias(self, poly):
+        """
+        Si la ecuación es de la forma a*x + b*y = 0 (a = -b) o x = constante,
+        con x eliminable, devuelve (x, texto que la sustituye). Si no, None.
+        """
+        names = self.expander.var_names
+        linear = {}; constant = 0
+        for monomial, coeff in poly.items():
+            if not monomial:
+                constant = coeff
+            elif len(monomial) == 1 and monomial[0][1] == 1:
+                linear[names[monomial[0][0]]] = coeff
+            else:
+                return None
+
+        if len(linear) == 2 and constant == 0:
+            (x, a), (y, b) = linear.items()
+            if a != -b:
+                return None
+            candidates = [v for v in (x, y) if _ELIMINABLE_RE.fullmatch(v)]
+            if not candidates:
+                return None
+            # Preferimos eliminar las e_n (anónimas) antes que los C_n.
+            var = max(candidates, key=lambda v: (v.startswith('e_'), int(v.split('_')[1])))
+            return var, (y if var == x else x)
+
+        if len(linear) == 1:
+            (x, a), = linear.items()
+            if _ELIMINABLE_RE.fullmatch(x) and constant % a == 0:
+                value = -constant // a
+                return x, str(value) if value >= 0 else f"({value})"
+        return None
+
+    def _sign_normalized_key(self, poly):
+        """Clave canónica de p = 0, idéntica para p y -p."""
+        items = sorted(poly.items())
+        if items[0][1] < 0:
+            items = [(m, -c) for m, c in items]
+        return tuple(items)
+
+    def _booleanity_var(self, poly):
+        """Variable t si la ecuación es t*(1-t) = 0 (en cualquier signo); si no, None."""
+        if len(poly) != 2:
+            return None
+        linear = [(m, c) for m, c in poly.items() if len(m) == 1 and m[0][1] == 1]
+        square = [(m, c) for m, c in poly.items() if len(m) == 1 and m[0][1] == 2]
+        if len(linear) == 1 and len(square) == 1 and linear[0][0][0][0] == square[0][0][0][0] \
+                and linear[0][1] == -square[0][1] and abs(linear[0][1]) == 1:
+            return linear[0][0][0][0]
+        return None
+
+    def _definitions(self, poly):
+        """Pares (t, rhs) tales que la ecuación equivale a t = rhs, con t lineal y ausente de rhs."""
+        result = []
+        for monomial, coeff in poly.items():
+            if len(monomial) != 1 or monomial[0][1] != 1 or abs(coeff) != 1:
+                continue
+            var = monomial[0][0]
+            rest = {m: -c * coeff for m, c in poly.items() if m != monomial}
+            if all(var not in (index for index, _ in m) for m in rest):
+                result.append((var, rest))
+        return result
+
+    def _boolean_support(self, rhs, booleans):
+        """
+        Si rhs toma siempre valores 0/1 cuando las variables de `booleans` lo
+        hacen, devuelve las variables en las que se apoya. Si no, None.
+
+        Reconoce constantes 0/1, productos de booleanas (AND), 1 - b (NOT) y
+        a + b - a*b (OR).
+        """
+        variables = {index for monomial in rhs for index, _ in monomial}
+        if not variables <= booleans:
+            return None
+        if not rhs or rhs == {(): 1}:
+            return set()
+        if len(rhs) == 1:
+            (monomial, coeff), = rhs.items()
+            return variables if coeff == 1 else None
+        if len(rhs) == 2 and rhs.get(()) == 1:
+            (monomial, coeff), = [(m, c) for m, c in rhs.items() if m]
+            return variables if coeff == -1 and len(monomial) == 1 else None
+        if len(rhs) == 3 and len(variables) == 2:
+            a, b = sorted(variables)
+            if rhs == {((a, 1),): 1, ((b, 1),): 1, ((a, 1), (b, 1)): -1}:
+                return variables
+        return None
+
+
+def _count_vars(system):
+    return len({name for eq in system for name in _VAR_RE.findall(eq)})
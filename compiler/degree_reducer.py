@@ -0,0 +1,117 @@
+from compiler.sparse_polynomial import SparsePolynomialExpander
+
+class DegreeReducer:
+    """
+    Acota el grado del sistema polinómico introduciendo variables auxiliares
+    (reducción de Skolem).
+
+    Cada monomio de grado mayor que `max_degree` se reescribe sustituyendo pares
+    de factores x*y por una nueva variable existencial z, junto con la
+    restricción de definición z - x*y = 0 (de grado 2). Los pares ya sustituidos
+    se reutilizan en todo el sistema. Con max_degree=2, todas las restricciones
+    tienen grado <= 2 y la ecuación única P (suma de sus cuadrados) grado <= 4.
+
+    Las restricciones que ya respetan el límite se conservan tal cual; las demás
+    se reescriben en forma expandida.
+    """
+    def __init__(self, poly_system, existential_vars_count, max_degree=2):
+        """
+        Inicializa el reductor.
+
+        Args:
+            poly_system (list): Ecuaciones "LHS = 0" del PolynomialConverter.
+            existential_vars_count (int): Variables e_n ya usadas; las auxiliares
+                continúan la numeración.
+            max_degree (int): Grado máximo de cada restricción (>= 2).
+        """
+        if max_degree < 2:
+            raise ValueError("El grado máximo de la reducción debe ser al menos 2.")
+        self.poly_system = poly_system
+        self.existential_vars_count = existential_vars_count
+        self.max_degree = max_degree
+        self.expander = SparsePolynomialExpander()
+        self.aux_for_pair = {}
+        self.aux_vars_count = 0
+        self.degree_before = 0
+        self.degree_after = 0
+        self.constraints_rewritten = 0
+
+    def reduce(self):
+        """
+        Punto de entrada. Reduce el grado de todo el sistema.
+
+        Returns:
+            list: El nuevo sistema, con las definiciones de cada variable auxiliar
+            colocadas justo antes de la primera restricción que la usa.
+        """
+        print(f"  [DegreeReducer] Reduciendo el sistema a grado <= {self.max_degree}...")
+        reduced_system = []
+        for eq in self.poly_system:
+            lhs = self.expander.expand_string(eq.rsplit(' =', 1)[0])
+            degree = self.expander.degree(lhs)
+            self.degree_before = max(self.degree_before, degree)
+            if degree <= self.max_degree:
+                reduced_system.append(eq)
+                self.degree_after = max(self.degree_after, degree)
+                continue
+
+            aux_definitions = []
+            reduced = {}
+            for monomial, coeff in lhs.items():
+                monomial = self._reduce_monomial(monomial, aux_definitions)
+                total = reduced.get(monomial, 0) + coeff
+                if total: reduced[monomial] = total
+                else: reduced.pop(monomial, None)
+            reduced_system.extend(aux_definitions)
+            reduced_system.append(f"{self.expander.format_polynomial(reduced)} = 0")
+            self.degree_after = max(self.degree_after, self.expander.degree(reduced), 2)
+            self.constraints_rewritten += 1
+
+        print(f"  [DegreeReducer] ...Grado {self.degree_before} -> {self.degree_after}: "
+              f"{self.aux_vars_count} variables auxiliares y {len(reduced_system) - len(self.poly_system)} ecuaciones adicionales.")
+        return reduced_system
+
+    def get_stats(self):
+        """Compromiso variables/grado de la última reducción, para poly_converter_info."""
+        return {
+            'degree_before': self.degree_before,
+            'degree_after': self.degree_after,
+            'aux_vars': self.aux_vars_count,
+            'constraints_rewritten': self.constraints_rewritten,
+        }
+
+    def _reduce_monomial(self, monomial, aux_definitions):
+        """
+        Sustituye pares de factores por variables auxiliares hasta que el
+        monomio tenga grado <= max_degree. Prefiere pares ya definidos.
+        """
+        factors = [index for index, exp in monomial for _ in range(exp)]
+        while len(factors) > self.max_degree:
+            pair = self._pick_pair(factors)
+            factors.remove(pair[0]); factors.remove(pair[1])
+            factors.append(self._aux_var(pair, aux_definitions))
+            factors.sort()
+
+        reduced = {}
+        for index in factors:
+            reduced[index] = reduced.get(index, 0) + 1
+        return tuple(sorted(reduced.items()))
+
+    def _pick_pair(self, factors):
+        for i in range(len(factors)):
+            for j in range(i + 1, len(factors)):
+                if (factors[i], factors[j]) in self.aux_for_pair:
+                    return (factors[i], factors[j])
+        return (factors[0], factors[1])
+
+    def _aux_var(self, pair, aux_definitions):
+        """Devuelve la variable auxiliar z = x*y del par, creándola si no existe."""
+        if pair not in self.aux_for_pair:
+            name = f"e_{self.existential_vars_count}"
+            self.existential_vars_count += 1
+            self.aux_vars_count += 1
+            x, y = (self.expander.var_names[index] for index in pair)
+            product = f"{x}^2" if x == y else f"{x} * {y}"
+            aux_definitions.append(f"{name} - {product} = 0")
+            self.aux_for_pair[pair] = self.expander.intern_variable(name)
+        return self.aux_for_pair[pair]
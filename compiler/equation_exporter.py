@@ -1,5 +1,7 @@
 import re
 
+from compiler.size_estimator import SizeEstimator
+
 class EquationExporter:
     """
     Construye y exporta las representaciones textuales de las ecuaciones
@@ -21,6 +23,7 @@ class EquationExporter:
         self.optimized_f = optimized_f
         self.sub_defs = sub_defs
         self.state_vars = set(state_vars)
+        self._size_estimator = None
 
     # --- Métodos de Ayuda Internos (para ordenamiento y conversión) ---
 
@@ -153,7 +156,18 @@ class EquationExporter:
         """
         Exporta el sistema optimizado en formato 'var := expr' para el intérprete.
         """
-        lines = []
+        return "\n".join(f"{lhs} := {expr_str}" for lhs, _, expr_str in self.interpreter_equations())
+
+    def interpreter_equations(self):
+        """
+        Las ecuaciones del fichero del intérprete, en el mismo orden, sin unirlas
+        en texto (EquationEngine.from_ir las carga directamente).
+
+        Returns:
+            list: Tuplas (lado izquierdo, árbol de tuplas, expresión en formato
+            del intérprete).
+        """
+        equations = []
         
         # 1. Definiciones de C_n
         # --- MEJORA: Usa la función de ordenamiento robusta ---
@@ -161,7 +175,7 @@ class EquationExporter:
         for name, expr_tuple in sorted_defs:
             clean_name = name.replace("{", "").replace("}", "")
             expr_str = self._tuple_to_generic_string(expr_tuple) # <-- AHORA USA LA VERSIÓN POLINÓMICA
-            lines.append(f"{clean_name} := {expr_str}")
+            equations.append((clean_name, expr_tuple, expr_str))
         
         # --- CORRECCIÓN: Distingue entre variables de estado y variables intermedias ---
         # 2. Ecuaciones principales (tanto de estado como intermedias)
@@ -174,9 +188,9 @@ class EquationExporter:
                 lhs = var
             
             expr_str = self._tuple_to_generic_string(expr_tuple) # <-- AHORA USA LA VERSIÓN POLINÓMICA
-            lines.append(f"{lhs} := {expr_str}")
+            equations.append((lhs, expr_tuple, expr_str))
             
-        return "\n".join(lines)
+        return equations
 
     def export_single_polynomial(self, poly_system_list):
         """
@@ -192,47 +206,17 @@ class EquationExporter:
 
     def get_unoptimized_size_estimate(self):
         """
-        Calcula de forma segura el tamaño de la ecuación no optimizada.
+        Calcula de forma segura (sin construir la cadena) el tamaño exacto en bytes
+        de export_unoptimized().
         """
-        total_size = 0
-        state_vars = sorted([v for v in self.unoptimized_f.keys() if v in self.state_vars])
-        num_terms = len(state_vars)
-        
-        for i, var in enumerate(state_vars):
-            expr_tuple = self.unoptimized_f.get(var, var)
-            lhs_size = len(f"{var}[t+1]".encode('utf-8'))
-            expr_size = self._calculate_poly_string_size(expr_tuple, expand=True)
-            total_size += lhs_size + expr_size + 8 # para ' - ()^2'
-            if i < num_terms - 1: 
-                total_size += len(" + \n".encode('utf-8'))
-        
-        total_size += len(" = 0".encode('utf-8'))
-        return total_size
-        
+        return self._get_size_estimator().unoptimized_text_size()
+
     def _calculate_poly_string_size(self, expr, expand):
         """Calcula el tamaño de la salida de _expr_to_poly_string de forma segura."""
-        if expand and isinstance(expr, str) and expr in self.sub_defs:
-            return self._calculate_poly_string_size(self.sub_defs[expr], expand)
-        if not isinstance(expr, tuple):
-            base_str = str(expr) if expr is not None else "0"
-            if isinstance(expr, str): 
-                base_str = base_str.replace("{", "").replace("}", "")
-            return len(base_str.encode('utf-8'))
-            
-        op = expr[0]
-        arg_sizes = [self._calculate_poly_string_size(e, expand) for e in expr[1:]]
-        
-        if op == 'if': return 8 + arg_sizes[0] + 5 + arg_sizes[1] + 8 + arg_sizes[0] + 5 + arg_sizes[2] + 2
-        if op == 'neg': return 3 + arg_sizes[0]
-        if op in ('+', '-', '*', '/'): return arg_sizes[0] + arg_sizes[1] + 5 # "(a op b)"
-        if op == '&&': return arg_sizes[0] + arg_sizes[1] + 5 # "(a * b)"
-        
-        # --- CORRECCIÓN: El número de caracteres fijos era 13, pero es 11 ---
-        # La expresión es "(a + b - a * b)"
-        if op == '||': return (arg_sizes[0] * 2) + arg_sizes[1] + 11 
-        
-        op_map = {'==': 'EQ', '!=': 'NEQ', '>': 'GT', '<': 'LT', '>=': 'GTE', '<=': 'LTE'}
-        if op in op_map: return len(op_map[op]) + arg_sizes[0] + arg_sizes[1] + 4 # "OP(a, b)"
-        
-        # Fallback para operadores desconocidos
-        return len(f"UNKNOWN_OP({op})".encode('utf-8')) + sum(arg_sizes)
\ No newline at end of file
+        return self._get_size_estimator().poly_string_size(expr, expand)
+
+    def _get_size_estimator(self):
+        # Se reutiliza la misma instancia para conservar la memoización entre llamadas.
+        if self._size_estimator is None:
+            self._size_estimator = SizeEstimator(self.unoptimized_f, self.optimized_f, self.sub_defs, self.state_vars)
+        return self._size_estimator
@@ -0,0 +1,168 @@
+import hashlib
+import os
+import time
+
+from compiler.parser import IncrementalParser
+
+class RenderCache:
+    """
+    Memo de las líneas del informe LaTeX entre compilaciones sucesivas.
+
+    Cada línea se indexa por un resumen (digest) del contenido de su expresión,
+    calculado con memoización por nodo (id de la tupla) para que su coste sea
+    lineal en el tamaño del DAG. Una línea solo se vuelve a renderizar si su
+    expresión cambió; las que no se usan en una compilación se descartan.
+    """
+    def __init__(self):
+        self._lines = {}
+        self._used = set()
+        self._sub_defs = {}
+        self._digests = ({}, {})
+        self.reused = 0
+        self.rendered = 0
+
+    def begin(self, sub_defs):
+        """Prepara una nueva compilación. Los memos por id() solo valen dentro de ella."""
+        self._sub_defs = sub_defs
+        self._digests = ({}, {})
+        self._used = set()
+        self.reused = 0
+        self.rendered = 0
+
+    def end(self):
+        """Descarta las líneas que la última compilación no ha usado."""
+        self._lines = {key: value for key, value in self._lines.items() if key in self._used}
+        self._digests = ({}, {})
+
+    def line(self, section, name, expr, render, expand_refs=False, extra=None):
+        """
+        Devuelve la línea memoizada para (sección, nombre, expresión) o la
+        renderiza con `render()`.
+
+        Args:
+            expand_refs (bool): Si la línea depende también de las definiciones
+                de los C_n que referencia (p. ej. la forma sin optimizar).
+            extra: Cualquier otro parámetro del que dependa el renderizado.
+        """
+        key = (section, name, self.digest(expr, expand_refs), extra)
+        self._used.add(key)
+        if key in self._lines:
+            self.reused += 1
+        else:
+            self._lines[key] = render()
+            self.rendered += 1
+        return self._lines[key]
+
+    def digest(self, expr, expand_refs=False):
+        """Resumen SHA-1 del contenido de una expresión (tupla, nombre o constante)."""
+        memo = self._digests[expand_refs]
+        if isinstance(expr, tuple):
+            key = id(expr)
+            if key not in memo:
+                h = hashlib.sha1(b"(")
+                for e in expr:
+                    h.update(self.digest(e, expand_refs))
+                memo[key] = h.digest()
+            return memo[key]
+        if expand_refs and isinstance(expr, str) and expr in self._sub_defs:
+            key = ('C_n', expr)
+            if key not in memo:
+                definition = self.digest(self._sub_defs[expr], expand_refs)
+                memo[key] = hashlib.sha1(b"ref" + expr.encode('utf-8') + definition).digest()
+            return memo[key]
+        return hashlib.sha1(repr(expr).encode('utf-8')).digest()
+
+
+class ConversionCache:
+    """
+    Memo de la conversión a polinomios de cada ecuación entre compilaciones
+    (ver PolynomialConverter._convert_equation). La clave es la forma de la
+    ecuación con los nombres abstraídos, así que una ecuación se reutiliza
+    aunque la CSE haya renumerado sus C_n o sus e_n se hayan desplazado; solo
+    se convierten las ecuaciones nuevas o modificadas. Las plantillas que una
+    compilación no usa se descartan.
+    """
+    def __init__(self):
+        self._templates = {}
+        self._used = set()
+        self.reused = 0
+        self.converted = 0
+
+    def begin(self):
+        """Prepara una nueva compilación."""
+        self._used = set()
+        self.reused = 0
+        self.converted = 0
+
+    def lookup(self, shape, convert):
+        """Plantilla (restricciones, número de e_n) de la forma, o la calcula con `convert()`."""
+        self._used.add(shape)
+        if shape in self._templates:
+            self.reused += 1
+        else:
+            self._templates[shape] = convert()
+            self.converted += 1
+        return self._templates[shape]
+
+    def end(self):
+        """Descarta las plantillas que esta compilación no ha usado."""
+        if not self._used:
+            # La fase vino entera de la caché de compilación: nada que podar.
+            return
+        self._templates = {shape: value for shape, value in self._templates.items() if shape in self._used}
+
+
+class WatchSession:
+    """
+    Estado que el modo --watch conserva entre compilaciones: el analizador con
+    libclang en caliente, los memos de la conversión a polinomios y de las
+    líneas del informe, y una instantánea de la última compilación para
+    calcular qué ha cambiado.
+    """
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.parser = IncrementalParser(filepath)
+        self.render_cache = RenderCache()
+        self.conversion_cache = ConversionCache()
+        self._previous = None
+        self._mtime = None
+
+    def wait_for_change(self, interval):
+        """Bloquea hasta que el fichero fuente cambia (por sondeo de su mtime)."""
+        while True:
+            try:
+                mtime = os.stat(self.filepath).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None  # Algunos editores guardan borrando y recreando
+            if mtime is not None and mtime != self._mtime:
+                self._mtime = mtime
+                return
+            time.sleep(interval)
+
+    def logic_changed(self, ast_map):
+        """False si la lógica analizada es idéntica a la de la compilación anterior."""
+        return self._previous is None or self._previous['ast_map'] != ast_map
+
+    def record(self, ast_map, unoptimized_f, sub_defs, poly_system):
+        """
+        Guarda la instantánea de esta compilación e informa de qué ecuaciones
+        de estado, definiciones C_n y restricciones polinómicas han cambiado
+        (su cono de influencia incluye código modificado).
+        """
+        digests = RenderCache(); digests.begin(sub_defs)
+        snapshot = {
+            'ast_map': ast_map,
+            'state': {var: digests.digest(expr) for var, expr in unoptimized_f.items()},
+            'cse': {name: digests.digest(expr) for name, expr in sub_defs.items()},
+            'poly': set(poly_system),
+        }
+        previous = self._previous
+        self._previous = snapshot
+        if previous is None:
+            return
+        changed_state = [v for v, d in snapshot['state'].items() if previous['state'].get(v) != d]
+        changed_cse = [n for n, d in snapshot['cse'].items() if previous['cse'].get(n) != d]
+        changed_poly = snapshot['poly'] - previous['poly']
+        print(f"  [Watch] Cambios: {len(changed_state)}/{len(snapshot['state'])} ecuaciones de estado "
+              f"({', '.join(sorted(changed_state)) or '-'}), {len(changed_cse)}/{len(snapshot['cse'])} definiciones C_n, "
+              f"{len(changed_poly)}/{len(snapshot['poly'])} restricciones polinómicas.")
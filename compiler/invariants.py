@@ -0,0 +1,49 @@
+from compiler.composition import ExpressionDAG
+
+def find_invariants(f_function, state_vars, initial_values):
+    """
+    Variables de estado que conservan su valor inicial en todos los ticks.
+
+    Punto fijo mayor: se parte de que todas las variables con valor inicial
+    conocido son constantes y se descarta cada una cuya ecuación, sustituyendo
+    las demás candidatas por su valor, no se reduce a ese mismo valor. Cuando
+    no se descarta ninguna más, el conjunto es inductivo: si todas valen su
+    valor inicial en t, también lo valen en t+1. Incluye las que nunca se
+    asignan (F[x] = x) y las que solo reciben el valor que ya tienen.
+
+    Args:
+        f_function (dict): F del generador.
+        state_vars (list): Variables de estado.
+        initial_values (dict): S_0 según los inicializadores (parser).
+
+    Returns:
+        dict: {variable invariante: valor}
+    """
+    constants = {var: initial_values[var] for var in state_vars if var in initial_values}
+    changed = True
+    while changed:
+        changed = False
+        for var in list(constants):
+            dag = ExpressionDAG()
+            node_id = dag.from_tuple(f_function.get(var, var), _substitution(dag, constants))
+            if dag.constant_value(node_id) != constants[var]:
+                del constants[var]
+                changed = True
+    return constants
+
+def specialize(f_function, constants):
+    """
+    Sustituye las variables constantes por su valor en todas las ecuaciones,
+    simplifica el resultado y elimina las ecuaciones de esas variables.
+
+    Returns:
+        dict: F especializada.
+    """
+    dag = ExpressionDAG()
+    rename = _substitution(dag, constants)
+    memo = {}
+    return {var: dag.to_tuple(dag.from_tuple(expr, rename), memo)
+            for var, expr in f_function.items() if var not in constants}
+
+def _substitution(dag, constants):
+    return lambda name: dag.leaf(constants[name]) if name in constants else dag.leaf(name)
@@ -1,4 +1,27 @@
+import glob
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+from compiler.cache import write_atomic
+from compiler.size_estimator import SizeEstimator
+
+# Secciones del informe que pueden omitirse si exceden el presupuesto de salida.
+OMITTABLE_SECTIONS = {
+    'unoptimized': 'Ecuaciones de Estado (Forma Pura, Sin Optimizar)',
+    'poly_system': 'Sistema de Ecuaciones Diofánticas Puras',
+    'single_poly': 'Ecuación Polinómica Única',
+}
+
+# Bloques align* que el modo paginado divide en ficheros, con el separador de
+# líneas que usa cada uno.
+CHUNK_SEPARATORS = {
+    'unoptimized': "\\\\\n",
+    'cse': " \\\\\n",
+    'optimized': "\\\\\n",
+    'poly_system': "\\\\\n",
+    'single_poly': " \\\\\n",
+}
 
 class LatexExporter:
     """
@@ -7,9 +30,24 @@ class LatexExporter:
     único documento LaTeX, con explicaciones detalladas para cada sección.
     """
     def __init__(self, unoptimized_f, optimized_f, sub_defs, state_vars, input_vars,
-                 poly_system, single_poly_equation, poly_converter_info):
+                 poly_system, single_poly_equation, poly_converter_info, omitted_sections=None,
+                 max_expanded_bytes=None, render_cache=None, pruned_state_vars=None, constant_state_vars=None):
         """
         Inicializa el exportador con todos los datos generados durante la compilación.
+
+        Args:
+            omitted_sections (dict, opcional): Secciones que no se renderizan porque
+                excederían el presupuesto de salida ('unoptimized', 'poly_system',
+                'single_poly'), mapeadas a su tamaño estimado en bytes.
+            max_expanded_bytes (int, opcional): Límite de bytes que puede ocupar la
+                expansión de los C_n en cada ecuación de la sección sin optimizar.
+                Las referencias que no caben se eliden. None = expansión completa.
+            render_cache (RenderCache, opcional): Memo de líneas ya renderizadas
+                en compilaciones anteriores (modo --watch).
+            pruned_state_vars (list, opcional): Variables de estado descartadas
+                por --only (fuera del cono de influencia de las pedidas).
+            constant_state_vars (dict, opcional): Variables de estado invariantes
+                sustituidas por su valor (--specialize-invariants).
         """
         self.unoptimized_f = unoptimized_f
         self.optimized_f = optimized_f
@@ -19,6 +57,19 @@ class LatexExporter:
         self.poly_system = poly_system
         self.single_poly_equation = single_poly_equation
         self.poly_converter_info = poly_converter_info
+        self.omitted_sections = omitted_sections or {}
+        self.max_expanded_bytes = max_expanded_bytes
+        self.size_estimator = SizeEstimator(unoptimized_f, optimized_f, sub_defs, state_vars)
+        self.render_cache = render_cache
+        self.pruned_state_vars = pruned_state_vars or []
+        self.constant_state_vars = constant_state_vars or {}
+
+    def __getstate__(self):
+        # El memo de líneas se indexa por id() y pertenece al proceso principal:
+        # los procesos de export_chunked renderizan sin él.
+        state = self.__dict__.copy()
+        state['render_cache'] = None
+        return state
 
     def export(self):
         """Punto de entrada. Genera el string LaTeX completo del informe."""
@@ -83,6 +134,14 @@ class LatexExporter:
     def _build_intro(self):
         state_list = ", ".join(sorted(self.state_vars))
         input_list = ", ".join(sorted(list(self.input_vars))) if self.input_vars else "ninguna"
+        pruned_item = ""
+        if self.pruned_state_vars:
+            pruned_item = (f"\n    \\item \\textbf{{Variables de Estado Descartadas:}} {', '.join(sorted(self.pruned_state_vars))}. "
+                           f"No influyen en las variables pedidas con \\texttt{{-{{}}-only}} y se omiten de todo el análisis.")
+        if self.constant_state_vars:
+            constants = ", ".join(f"{var} = {value}" for var, value in sorted(self.constant_state_vars.items()))
+            pruned_item += (f"\n    \\item \\textbf{{Variables de Estado Constantes:}} {constants}. Nunca cambian partiendo "
+                            f"de sus valores iniciales, así que se sustituyen por constantes en todas las ecuaciones.")
         
         return f"""
 \\begin{{document}}
@@ -94,7 +153,7 @@ Este documento presenta la traducción completa de un programa de software escri
 El compilador ha analizado el código fuente y ha extraído las siguientes componentes clave para describir una única transición de estado (un "fotograma"):
 \\begin{{itemize}}
     \\item \\textbf{{Variables de Estado ($S_t$):}} Las variables que definen el estado del sistema en un instante $t$. Para este programa, son: {state_list}.
-    \\item \\textbf{{Variables de Entrada ($I_t$):}} Las variables que representan la interacción con el exterior en el instante $t$. Para este programa, son: {input_list}.
+    \\item \\textbf{{Variables de Entrada ($I_t$):}} Las variables que representan la interacción con el exterior en el instante $t$. Para este programa, son: {input_list}.{pruned_item}
 \\end{{itemize}}
 
 El documento se divide en dos partes principales, que corresponden a las dos grandes fases de la traducción:
@@ -105,41 +164,242 @@ El documento se divide en dos partes principales, que corresponden a las dos gra
 """
 
     def _build_transition_function_section(self):
-        # --- Unoptimized Section ---
-        unoptimized_eqs_str = []
+        return self._transition_function_template(
+            self._build_unoptimized_block(), self._build_cse_content(), self._build_optimized_block()
+        )
+
+    def _build_unoptimized_block(self):
+        if 'unoptimized' in self.omitted_sections:
+            return self._build_omitted_notice('unoptimized')
+        elided = []
+        block = self._align_block(CHUNK_SEPARATORS['unoptimized'].join(self._iter_unoptimized_lines(elided)))
+        if elided:
+            block += self._build_elision_note(elided)
+        return block
+
+    def _build_cse_content(self):
+        if not self.sub_defs:
+            return ""
+        return self._cse_template(self._align_block(CHUNK_SEPARATORS['cse'].join(self._iter_cse_lines())))
+
+    def _build_optimized_block(self):
+        return self._align_block(CHUNK_SEPARATORS['optimized'].join(self._iter_optimized_lines()))
+
+    def _build_polynomial_conversion_section(self):
+        return self._polynomial_conversion_template(self._build_poly_system_block(), self._build_single_poly_block())
+
+    def _build_poly_system_block(self):
+        if 'poly_system' in self.omitted_sections:
+            return self._build_omitted_notice('poly_system')
+        return self._align_block(CHUNK_SEPARATORS['poly_system'].join(self._iter_poly_system_lines()))
+
+    def _build_single_poly_block(self):
+        if 'single_poly' in self.omitted_sections:
+            return self._build_omitted_notice('single_poly')
+        return self._align_block(self._format_single_poly(self.single_poly_equation))
+
+    # --- Generadores de Líneas de Ecuación ---
+    # Producen las ecuaciones de cada bloque align* una a una, de modo que
+    # export_chunked pueda volcarlas a disco sin construir el bloque completo.
+
+    def _iter_unoptimized_lines(self, elided):
+        for var in sorted(self.state_vars):
+            if self.max_expanded_bytes is None:
+                line, line_elided = self._render_line('unoptimized', var, self.unoptimized_f.get(var, var),
+                                                      lambda: self._render_unoptimized_line(var))
+            else:
+                line, line_elided = self._render_line('unoptimized', var, self.optimized_f.get(var, var),
+                                                      lambda: self._render_unoptimized_line(var),
+                                                      expand_refs=True, extra=self.max_expanded_bytes)
+            elided.extend(line_elided)
+            yield line
+
+    def _render_unoptimized_line(self, var):
+        """Línea de la forma pura de 'var', junto con las referencias que ha elidido."""
+        elided = []
+        lhs = f"{self._format_var(var)}[t+1] &="
+        if self.max_expanded_bytes is None:
+            rhs = self._format_expanded_latex(self.unoptimized_f.get(var, var), self.sub_defs)
+        else:
+            # La forma optimizada con sus C_n expandidos es idéntica a la forma
+            # pura, pero permite decidir qué referencias caben en el límite.
+            rhs, _ = self._format_bounded_latex(self.optimized_f.get(var, var), self.max_expanded_bytes, 1, elided)
+        if len(rhs.replace(" ", "")) > 80: rhs = f"\\parbox[t]{{0.8\\linewidth}}{{{rhs}}}"
+        return f"{lhs} {rhs}", elided
+
+    def _iter_cse_lines(self):
+        sorted_defs = sorted(self.sub_defs.items(), key=lambda item: int(re.search(r'\d+', item[0]).group()))
+        for name, expr_tuple in sorted_defs:
+            yield self._render_line('cse', name, expr_tuple, lambda: self._render_equation_line(f"{self._format_var(name)} &=", expr_tuple))
+
+    def _iter_optimized_lines(self):
         for var in sorted(self.state_vars):
-            expr_tuple = self.unoptimized_f.get(var, var)
-            lhs = f"{self._format_var(var)}[t+1] &="
-            rhs = self._format_expanded_latex(expr_tuple, self.sub_defs)
-            if len(rhs.replace(" ", "")) > 80: rhs = f"\\parbox[t]{{0.8\\linewidth}}{{{rhs}}}"
-            unoptimized_eqs_str.append(f"{lhs} {rhs}")
-        unoptimized_section = "\\\\\n".join(unoptimized_eqs_str)
-
-        # --- CSE Section ---
-        cse_section_content = ""
-        if self.sub_defs:
-            sub_eqs = []
-            sorted_defs = sorted(self.sub_defs.items(), key=lambda item: int(re.search(r'\d+', item[0]).group()))
-            for name, expr_tuple in sorted_defs:
-                lhs = f"{self._format_var(name)} &="; rhs = self._format_tuple_to_latex(expr_tuple)
-                if len(rhs.replace(" ", "")) > 80: rhs = f"\\parbox[t]{{0.8\\linewidth}}{{{rhs}}}"
-                sub_eqs.append(f"{lhs} {rhs}")
-            cse_section_content = f"""
+            expr_tuple = self.optimized_f.get(var, var)
+            yield self._render_line('optimized', var, expr_tuple,
+                                    lambda: self._render_equation_line(f"{self._format_var(var)}[t+1] &=", expr_tuple))
+
+    def _render_equation_line(self, lhs, expr_tuple):
+        rhs = self._format_tuple_to_latex(expr_tuple)
+        if len(rhs.replace(" ", "")) > 80: rhs = f"\\parbox[t]{{0.8\\linewidth}}{{{rhs}}}"
+        return f"{lhs} {rhs}"
+
+    def _iter_poly_system_lines(self):
+        for line in self.poly_system:
+            yield self._render_line('poly_system', None, line, lambda: self._format_poly_system_line(line))
+
+    def _render_line(self, section, name, expr, render, expand_refs=False, extra=None):
+        """Renderiza una línea, o la toma del memo de compilaciones anteriores si lo hay."""
+        if self.render_cache is None:
+            return render()
+        return self.render_cache.line(section, name, expr, render, expand_refs, extra)
+
+    def _iter_single_poly_lines(self):
+        """
+        Líneas de la ecuación única P=0, generadas directamente desde poly_system
+        (equivalente a formatear export_single_polynomial, sin construirla).
+        """
+        terms = (self._format_poly_expression(term)
+                 for eq in self.poly_system for term in f"({eq.rsplit(' =', 1)[0]})^2".split(' + '))
+        previous = None
+        for line in self._wrap_terms(terms):
+            if previous is not None:
+                yield previous
+                previous = f"& + {line}"
+            else:
+                previous = f"& {line}"
+        if previous is not None:
+            yield f"{previous} = 0"
+
+    # --- Exportación Paginada ---
+
+    def export_chunked(self, tex_path, equations_per_chunk, max_workers=1):
+        """
+        Escribe el informe en modo paginado, para programas cuyo informe completo
+        agotaría la memoria de pdflatex.
+
+        Genera un esqueleto en `tex_path` con el texto del documento y, en lugar
+        de cada bloque align*, una serie de `\\input{...}` a ficheros numerados en
+        `<tex_path sin extensión>_chunks/`. Cada fichero contiene un bloque align*
+        con a lo sumo `equations_per_chunk` ecuaciones. Las ecuaciones se generan y
+        escriben de forma incremental, y las secciones (independientes entre sí)
+        pueden generarse en paralelo con `max_workers` > 1.
+
+        Returns:
+            list: Rutas de todos los ficheros escritos (el esqueleto primero).
+        """
+        print("  [Exporter] Escribiendo informe paginado en LaTeX...")
+        chunk_dir = self.chunk_dir_for(tex_path)
+        chunk_dir_name = os.path.basename(chunk_dir)
+        os.makedirs(chunk_dir, exist_ok=True)
+
+        sections = [section for section in CHUNK_SEPARATORS
+                    if section not in self.omitted_sections and (section != 'cse' or self.sub_defs)]
+        if max_workers > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {section: executor.submit(self._write_section_chunks, section, chunk_dir, chunk_dir_name, equations_per_chunk)
+                           for section in sections}
+                results = {section: future.result() for section, future in futures.items()}
+        else:
+            results = {section: self._write_section_chunks(section, chunk_dir, chunk_dir_name, equations_per_chunk)
+                       for section in sections}
+
+        def chunked_block(section):
+            if section in self.omitted_sections:
+                return self._build_omitted_notice(section)
+            input_paths, elided = results[section]
+            block = self._input_block(input_paths)
+            if elided:
+                block += self._build_elision_note(elided)
+            return block
+
+        cse_content = self._cse_template(chunked_block('cse')) if self.sub_defs else ""
+        skeleton = (self._build_header() + self._build_intro()
+                    + self._transition_function_template(chunked_block('unoptimized'), cse_content, chunked_block('optimized'))
+                    + self._polynomial_conversion_template(chunked_block('poly_system'), chunked_block('single_poly'))
+                    + r"\end{document}")
+        write_atomic(tex_path, skeleton)
+
+        written = [tex_path]
+        for section in sections:
+            written.extend(os.path.join(chunk_dir, os.path.basename(path) + ".tex") for path in results[section][0])
+        # Eliminar las páginas de una compilación anterior que ya no se referencian
+        # (al final, para que el esqueleto anterior siga siendo válido mientras tanto).
+        for stale_chunk in set(glob.glob(os.path.join(chunk_dir, "*.tex"))) - set(written):
+            os.remove(stale_chunk)
+        return written
+
+    @staticmethod
+    def chunk_dir_for(tex_path):
+        """Directorio donde export_chunked escribe las páginas del informe `tex_path`."""
+        return os.path.splitext(tex_path)[0] + "_chunks"
+
+    def _write_section_chunks(self, section, chunk_dir, chunk_dir_name, equations_per_chunk):
+        """
+        Vuelca las ecuaciones de una sección en ficheros de a lo sumo
+        `equations_per_chunk` ecuaciones cada uno.
+
+        Returns:
+            tuple: (rutas para \\input, relativas al esqueleto; referencias elididas).
+        """
+        elided = []
+        lines = {
+            'unoptimized': lambda: self._iter_unoptimized_lines(elided),
+            'cse': self._iter_cse_lines,
+            'optimized': self._iter_optimized_lines,
+            'poly_system': self._iter_poly_system_lines,
+            'single_poly': self._iter_single_poly_lines,
+        }[section]()
+        separator = CHUNK_SEPARATORS[section]
+
+        input_paths = []; batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) == equations_per_chunk:
+                input_paths.append(self._write_chunk(chunk_dir, chunk_dir_name, section, len(input_paths) + 1, separator.join(batch)))
+                batch = []
+        if batch:
+            input_paths.append(self._write_chunk(chunk_dir, chunk_dir_name, section, len(input_paths) + 1, separator.join(batch)))
+        return input_paths, elided
+
+    def _write_chunk(self, chunk_dir, chunk_dir_name, section, index, body):
+        chunk_name = self._chunk_name(section, index)
+        write_atomic(os.path.join(chunk_dir, chunk_name + ".tex"), self._align_block(body))
+        return f"{chunk_dir_name}/{chunk_name}"
+
+    def _chunk_name(self, section, index):
+        return f"{section}_{index:04d}"
+
+    def _input_block(self, input_paths):
+        return "\n".join(f"\\input{{{path}}}" for path in input_paths)
+
+    # --- Plantillas de Sección ---
+    # Separadas de los cuerpos para que el estimador de tamaño (SizeEstimator)
+    # pueda medir el texto fijo sin renderizar las ecuaciones.
+
+    def _align_block(self, body):
+        return f"\\begin{{align*}}\n{body}\n\\end{{align*}}"
+
+    def _build_elision_note(self, elided):
+        total = sum(size for _, size in elided)
+        return (f"\n\\noindent\\textit{{Se han elidido {len(elided)} referencias $\\langle C_n \\rangle$ cuya expansión "
+                f"excedía el límite de {self.max_expanded_bytes:,} bytes por ecuación (en total, {total:,} bytes). "
+                f"Sus definiciones aparecen en la sección de cálculos comunes.}}")
+
+    def _format_elided_reference(self, name, full_size):
+        return f"\\langle {self._format_var(name)} \\rangle_{{\\text{{{full_size:,} B}}}}"
+
+    def _build_omitted_notice(self, section):
+        size = self.omitted_sections[section]
+        return f"\\textit{{[Sección omitida: su tamaño estimado ({size:,} bytes) excede el presupuesto de salida del compilador.]}}"
+
+    def _cse_template(self, cse_block):
+        return f"""
 \\subsection*{{Definiciones de Cálculos Comunes (CSE)}}
 Para simplificar y hacer las ecuaciones manejables, el sistema busca expresiones que se repiten (ej. la lógica de movimiento de una pala), les asigna un nombre simbólico (ej. $C_0, C_1, \\dots$) y las calcula una sola vez. Estas definiciones representan los bloques de construcción lógicos del programa.
-\\begin{{align*}}
-{" \\\\\n".join(sub_eqs)}
-\\end{{align*}}
+{cse_block}
 """
-        # --- Optimized Section ---
-        optimized_eqs_str = []
-        for var in sorted(self.state_vars):
-            expr_tuple = self.optimized_f.get(var, var)
-            lhs = f"{self._format_var(var)}[t+1] &="; rhs = self._format_tuple_to_latex(expr_tuple)
-            if len(rhs.replace(" ", "")) > 80: rhs = f"\\parbox[t]{{0.8\\linewidth}}{{{rhs}}}"
-            optimized_eqs_str.append(f"{lhs} {rhs}")
-        optimized_section = "\\\\\n".join(optimized_eqs_str)
 
+    def _transition_function_template(self, unoptimized_block, cse_section_content, optimized_block):
         return f"""
 \\part{{La Función de Transición de Estado}}
 \\section{{Aplanamiento y Optimización}}
@@ -147,41 +407,50 @@ El primer paso consiste en convertir la lógica imperativa del bucle principal d
 
 \\subsection*{{Ecuaciones de Estado (Forma Pura, Sin Optimizar)}}
 Esta es la forma "pura" de la función de transición. Cada ecuación es matemáticamente autocontenida y muestra la dependencia total del estado anterior. Su complejidad y repetición visual reflejan la necesidad de optimización.
-\\begin{{align*}}
-{unoptimized_section}
-\\end{{align*}}
+{unoptimized_block}
 {cse_section_content}
 \\subsection*{{Ecuaciones de Estado Finales (Optimizadas con CSE)}}
 Esta es la versión final y simplificada de la función de transición. Utiliza las definiciones de $C_n$ para ser más compacta, legible y eficiente. Esta forma es la que más se asemeja a cómo un humano estructuraría los cálculos.
-\\begin{{align*}}
-{optimized_section}
-\\end{{align*}}
+{optimized_block}
 """
 
-    def _build_polynomial_conversion_section(self):
+    def _polynomial_conversion_template(self, poly_system_block, single_poly_block):
         e_vars_count = self.poly_converter_info['existential_vars_count']
         num_equations = self.poly_converter_info['num_equations']
-        
-        poly_system_str = "\\\\\n".join([self._format_poly_system_line(line) for line in self.poly_system])
-        single_poly_str = self._format_single_poly(self.single_poly_equation)
+        simplification = self.poly_converter_info.get('constraint_optimization')
+        simplification_text = ""
+        if simplification:
+            simplification_text = (f" Tras la conversión, el sistema se ha simplificado de {simplification['equations_before']} a "
+                                   f"{simplification['equations_after']} ecuaciones y de {simplification['vars_before']} a "
+                                   f"{simplification['vars_after']} variables, sustituyendo alias y eliminando restricciones "
+                                   f"duplicadas o implícitas.")
+        reduction = self.poly_converter_info.get('degree_reduction')
+        reduction_text = ""
+        if reduction:
+            reduction_text = (f" Para acotar su grado, se han añadido {reduction['aux_vars']} variables auxiliares "
+                              f"(incluidas en el total) que sustituyen productos de dos factores, reduciendo el grado "
+                              f"máximo de las ecuaciones de {reduction['degree_before']} a {reduction['degree_after']}.")
+        master_stats = self.poly_converter_info.get('master_polynomial')
+        master_stats_text = ""
+        if master_stats:
+            qualifier = "" if master_stats['exact'] else " (cota superior: la expansión se detuvo al superar el presupuesto de términos)"
+            master_stats_text = (f"\nDesarrollada en forma canónica, la ecuación tiene \\textbf{{{master_stats['terms']} monomios}} "
+                                 f"de grado total {master_stats['degree']}, con coeficientes de hasta "
+                                 f"{master_stats['max_coeff_bits']} bits{qualifier}.\n")
 
         return f"""
 \\part{{Conversión a Polinomio Puro}}
 \\section{{Traducción a Ecuaciones Diofánticas}}
 El paso final y más profundo es convertir la función de transición (que aún contiene operadores lógicos como `==`, `<`, etc.) en un sistema que solo utiliza aritmética entera (suma, resta, multiplicación). Esto se logra introduciendo variables existenciales ($e_n$) y aplicando trucos de la teoría de números, como el Teorema de los Cuatro Cuadrados de Lagrange para manejar las desigualdades.
 
-El proceso ha introducido \\textbf{{{e_vars_count} variables existenciales}} para producir un sistema de \\textbf{{{num_equations} ecuaciones puras}}.
+El proceso ha introducido \\textbf{{{e_vars_count} variables existenciales}} para producir un sistema de \\textbf{{{num_equations} ecuaciones puras}}.{simplification_text}{reduction_text}
 
 \\subsection*{{Sistema de Ecuaciones Diofánticas Puras (Forma Práctica)}}
 Esta es la representación más útil para aplicaciones de ingeniería, como la simulación o la síntesis de hardware. Es un sistema de ecuaciones interdependientes que deben satisfacerse simultáneamente. Cada línea representa un cálculo simple o una restricción lógica.
-\\begin{{align*}}
-{poly_system_str}
-\\end{{align*}}
+{poly_system_block}
 \\subsection*{{Ecuación Polinómica Única (Forma Teórica P=0)}}
 Por completitud teórica, el sistema anterior puede ser combinado en una única ecuación mediante la suma de los cuadrados de cada ecuación. Una solución entera a esta única y masiva ecuación corresponde a una transición de estado válida del programa original. Esta es la forma final que demuestra el Teorema MRDP.
-\\begin{{align*}}
-{single_poly_str}
-\\end{{align*}}
+{master_stats_text}{single_poly_block}
 """
 
     # --- Métodos de Formateo de Expresiones ---
@@ -203,18 +472,22 @@ Por completitud teórica, el sistema anterior puede ser combinado en una única
     def _format_single_poly(self, line):
         terms = line.split(' + '); last_term_parts = terms[-1].split(' = '); terms[-1] = last_term_parts[0]
         formatted_terms = [self._format_poly_expression(term) for term in terms]
-        output_lines = []; current_line = ""; line_threshold = 90
+        output_lines = list(self._wrap_terms(formatted_terms))
+        if not output_lines: return "& = 0"
+        # Usamos el estilo robusto de alineación con '& + ...' en la nueva línea
+        body = (" \\\\\n& + ").join(output_lines)
+        return f"& {body} = 0"
+
+    def _wrap_terms(self, formatted_terms):
+        """Agrupa los términos de la ecuación única en líneas de ~90 caracteres."""
+        current_line = ""; line_threshold = 90
         for term in formatted_terms:
             separator = " + " if current_line else ""
             if len(current_line) + len(separator) + len(term) > line_threshold and current_line:
-                output_lines.append(current_line); current_line = term
+                yield current_line; current_line = term
             else:
                 current_line += separator + term
-        if current_line: output_lines.append(current_line)
-        if not output_lines: return "& = 0"
-        # Usamos el estilo robusto de alineación con '& + ...' en la nueva línea
-        body = (" \\\\\n& + ").join(output_lines)
-        return f"& {body} = 0"
+        if current_line: yield current_line
 
     def _format_var(self, var_name):
         if var_name.startswith("C_"): return var_name.replace("{", "").replace("}", "")
@@ -235,9 +508,39 @@ Por completitud teórica, el sistema anterior puede ser combinado en una única
         if isinstance(expr, str) and expr in sub_defs: return self._format_expanded_latex(sub_defs[expr], sub_defs)
         if not isinstance(expr, tuple): return self._format_var(str(expr))
         op = expr[0]; args = [self._format_expanded_latex(e, sub_defs) for e in expr[1:]]
+        return self._expanded_latex_template(op, args)
+
+    def _format_bounded_latex(self, expr, remaining, weight, elided):
+        """
+        Variante de _format_expanded_latex con presupuesto. Recorre la forma
+        optimizada y expande cada C_n solo si su expansión completa (calculada por
+        el SizeEstimator, sin renderizarla) cabe en el presupuesto restante; si no,
+        la sustituye por una referencia elidida a su definición.
+
+        'weight' cuenta cuántas veces aparece el texto en la salida (la condición
+        de un 'if' se imprime dos veces) y 'elided' acumula (C_n, bytes omitidos).
+
+        Returns:
+            tuple: (texto LaTeX, presupuesto restante).
+        """
+        if isinstance(expr, str) and expr in self.sub_defs:
+            full_size = self.size_estimator.latex_size(expr, expand=True)[0]
+            if full_size * weight <= remaining:
+                return self._format_expanded_latex(expr, self.sub_defs), remaining - full_size * weight
+            elided.append((expr, full_size * weight))
+            return self._format_elided_reference(expr, full_size), remaining
+        if not isinstance(expr, tuple): return self._format_var(str(expr)), remaining
+        op = expr[0]; args = []
+        for i, e in enumerate(expr[1:]):
+            arg_weight = weight * 2 if op == 'if' and i == 0 else weight
+            text, remaining = self._format_bounded_latex(e, remaining, arg_weight, elided)
+            args.append(text)
+        return self._expanded_latex_template(op, args), remaining
+
+    def _expanded_latex_template(self, op, args):
         op_map = {'==': '=', '!=': r'\neq', '>': '>', '<': '<', '>=': r'\geq', '<=': r'\leq', '&&': r'\land', '||': r'\lor'}
         if op == 'if': return f"({args[0]} \\cdot ({args[1]}) + (1 - {args[0]}) \\cdot ({args[2]}))"
         if op == 'neg': return f"(-{args[0]})"
         if op in ('+', '-', '*', '/'): op_latex = r" \cdot " if op == '*' else f" {op} "; return f"({args[0]}{op_latex}{args[1]})"
         if op in op_map: return f"({args[0]} {op_map[op]} {args[1]})"
-        return f"\\text{{OP}}_{op}({', '.join(args)})"
\ No newline at end of file
+        return f"\\text{{OP}}_{op}({', '.join(args)})"
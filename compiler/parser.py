@@ -1,58 +1,140 @@
+import os
 import sys
 import clang.cindex
 from clang.cindex import CursorKind, TypeKind
 
 # --- Configuración de libclang ---
 clang.cindex.Config.set_library_path("C:/Program Files/LLVM/bin")
+# Argumentos de compilación pasados a libclang (forman parte de la clave de caché).
+CLANG_ARGS = ['-std=c11'] # Usar un estándar de C
 
 #======================================================================
 # PUNTO DE ENTRADA PRINCIPAL
 #======================================================================
 
-def parse_c_file(filepath):
+def parse_c_file(filepath, index=None):
     """
     Analiza un archivo C y devuelve un "mapa de partes" estructurado
     (nuestro propio AST simplificado).
+
+    Args:
+        index (clang.cindex.Index, opcional): Índice de libclang a reutilizar
+            (p. ej. uno por proceso en la compilación por lotes).
     """
     print(f"  [Parser] Iniciando indexación de {filepath}...")
     try:
-        index = clang.cindex.Index.create()
-        tu = index.parse(filepath, ['-std=c11']) # Usar un estándar de C
+        if index is None:
+            index = create_index()
+        tu = index.parse(filepath, CLANG_ARGS)
+        return _build_ast_map(tu)
 
-        if not tu:
-            raise RuntimeError("Error: No se pudo crear la Unidad de Traducción.")
+    except clang.cindex.LibclangError as e:
+        _report_libclang_error(e)
 
-        errors = [d for d in tu.diagnostics if d.severity >= d.Error]
-        if errors:
-            print("  [Parser] ¡Error de sintaxis en el código C!", file=sys.stderr)
-            for e in errors:
-                print(f"  > {e}", file=sys.stderr)
-            raise RuntimeError("Error de sintaxis en el C.")
 
-        print("  [Parser] Archivo C analizado. Construyendo AST simplificado...")
-        
-        # 1. Encontrar variables de estado (globales)
-        state_vars = _find_state_variables(tu.cursor)
-        print(f"  [Parser] Variables de Estado (S_t) encontradas: {state_vars}")
-        
-        # 2. Encontrar la lógica de transición (dentro del bucle)
-        # Esta es la nueva función "inteligente"
-        logic_ast = _find_transition_logic(tu.cursor)
-        print(f"  [Parser] Árbol de lógica de transición (F) construido.")
-
-        # Este es nuestro "mapa de partes"
-        ast_map = {
-            'state_vars': state_vars,
-            'logic_tree': logic_ast  # Un solo nodo 'Block' que contiene todo
-        }
-        
-        return ast_map
+def parse_c_source(source, filename="programa.c", index=None):
+    """
+    Como parse_c_file, pero con el código C en memoria (no se escribe en disco).
+
+    Args:
+        source (str): Código C.
+        filename (str): Nombre con el que libclang identifica el código.
+        index (clang.cindex.Index, opcional): Índice de libclang a reutilizar.
+    """
+    print(f"  [Parser] Iniciando indexación de {filename} (en memoria)...")
+    try:
+        if index is None:
+            index = create_index()
+        tu = index.parse(filename, CLANG_ARGS, unsaved_files=[(filename, source)])
+        return _build_ast_map(tu)
 
     except clang.cindex.LibclangError as e:
-        print(f"\n--- ERROR DE LIBCLANG ---", file=sys.stderr)
-        print("¿Está LLVM/Clang instalado y en el PATH del sistema?", file=sys.stderr)
-        print(f"Detalle: {e}", file=sys.stderr)
-        sys.exit(1)
+        _report_libclang_error(e)
+
+
+def create_index():
+    """Crea un índice de libclang (la parte costosa de inicializar clang)."""
+    try:
+        return clang.cindex.Index.create()
+    except clang.cindex.LibclangError as e:
+        _report_libclang_error(e)
+
+
+def libclang_path():
+    """
+    Ruta de la biblioteca libclang que se usará (forma parte de la clave de
+    caché: otra versión de clang puede dar otro AST).
+    """
+    return clang.cindex.conf.get_filename()
+
+
+class IncrementalParser:
+    """
+    Analizador que mantiene vivos el índice de libclang y la unidad de
+    traducción entre análisis sucesivos del mismo fichero (modo --watch).
+    Tras el primer análisis, cada llamada usa TranslationUnit.reparse, que
+    reutiliza el estado interno de clang en lugar de volver a crearlo.
+    """
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.index = None
+        self.tu = None
+
+    def parse(self):
+        """Analiza (o re-analiza) el fichero y devuelve su mapa de partes."""
+        try:
+            if self.tu is None:
+                print(f"  [Parser] Iniciando indexación de {self.filepath}...")
+                self.index = create_index()
+                self.tu = self.index.parse(self.filepath, CLANG_ARGS)
+            else:
+                print(f"  [Parser] Re-analizando {self.filepath}...")
+                self.tu.reparse()
+            return _build_ast_map(self.tu)
+
+        except clang.cindex.LibclangError as e:
+            _report_libclang_error(e)
+
+
+def _build_ast_map(tu):
+    if not tu:
+        raise RuntimeError("Error: No se pudo crear la Unidad de Traducción.")
+
+    errors = [d for d in tu.diagnostics if d.severity >= d.Error]
+    if errors:
+        print("  [Parser] ¡Error de sintaxis en el código C!", file=sys.stderr)
+        for e in errors:
+            print(f"  > {e}", file=sys.stderr)
+        raise RuntimeError("Error de sintaxis en el C.")
+
+    print("  [Parser] Archivo C analizado. Construyendo AST simplificado...")
+    
+    # 1. Encontrar variables de estado (globales)
+    state_vars = _find_state_variables(tu.cursor)
+    print(f"  [Parser] Variables de Estado (S_t) encontradas: {state_vars}")
+    initial_values = _find_initial_values(tu.cursor, state_vars)
+    
+    # 2. Encontrar la lógica de transición (dentro del bucle)
+    # Esta es la nueva función "inteligente"
+    logic_ast = _find_transition_logic(tu.cursor)
+    print(f"  [Parser] Árbol de lógica de transición (F) construido.")
+
+    # Este es nuestro "mapa de partes"
+    ast_map = {
+        'state_vars': state_vars,
+        'initial_values': initial_values,  # S_0 según los inicializadores de C
+        'logic_tree': logic_ast,  # Un solo nodo 'Block' que contiene todo
+        # Cabeceras incluidas (directa o indirectamente): forman parte de la clave de caché.
+        'includes': sorted({os.path.abspath(inclusion.include.name) for inclusion in tu.get_includes()})
+    }
+    
+    return ast_map
+
+def _report_libclang_error(e):
+    print(f"\n--- ERROR DE LIBCLANG ---", file=sys.stderr)
+    print("¿Está LLVM/Clang instalado y en el PATH del sistema?", file=sys.stderr)
+    print(f"Detalle: {e}", file=sys.stderr)
+    sys.exit(1)
 
 #======================================================================
 # 1. BUSCADOR DE VARIABLES DE ESTADO
@@ -70,6 +152,91 @@ def _find_state_variables(root_node):
                     state_vars.append(node.spelling)
     return state_vars
 
+def _find_initial_values(root_node, state_vars):
+    """
+    Valores iniciales de las variables de estado (S_0). Una global sin
+    inicializador vale 0 (almacenamiento estático en C); si el inicializador no
+    es una expresión constante, la variable no aparece en el resultado.
+    """
+    initial_values = {}
+    for node in root_node.get_children():
+        if node.kind != CursorKind.VAR_DECL or node.spelling not in state_vars:
+            continue
+        if node.lexical_parent.kind != CursorKind.TRANSLATION_UNIT:
+            continue
+        value_nodes = [child for child in node.get_children() if child.kind != CursorKind.TYPE_REF]
+        if not value_nodes:
+            initial_values[node.spelling] = 0
+            continue
+        value = _constant_value(_parse_clang_node(value_nodes[0]))
+        if value is not None:
+            initial_values[node.spelling] = value
+    # El estado inicial real es el de la entrada al bucle: una global que 'main'
+    # modifica antes del for(;;) no conserva el valor de su inicializador.
+    for name in _assigned_before_loop(root_node, state_vars):
+        initial_values.pop(name, None)
+    return initial_values
+
+# Operadores unarios que no modifican su operando.
+_PURE_UNARY_OPS = ('-', '+', '!', '~', '*')
+
+def _assigned_before_loop(root_node, state_vars):
+    """
+    Variables de estado que 'main' puede modificar antes de entrar en el bucle:
+    las asignadas (=, +=, ++...) o cuya dirección se toma (&x) en las
+    sentencias previas al for(;;) o en su inicialización.
+    """
+    main_node = next((n for n in root_node.get_children()
+                      if n.kind == CursorKind.FUNCTION_DECL and n.spelling == 'main'), None)
+    body = next((n for n in main_node.get_children() if n.kind == CursorKind.COMPOUND_STMT), None) if main_node else None
+    if body is None:
+        return set()
+    assigned = set()
+    for statement in body.get_children():
+        if statement.kind == CursorKind.FOR_STMT:
+            # Todo menos el cuerpo (que es la lógica de transición).
+            for child in list(statement.get_children())[:-1]:
+                _collect_assigned(child, state_vars, assigned)
+            break
+        _collect_assigned(statement, state_vars, assigned)
+    return assigned
+
+def _collect_assigned(node, state_vars, assigned):
+    kind = node.kind
+    writes = (kind == CursorKind.COMPOUND_ASSIGNMENT_OPERATOR
+              or (kind == CursorKind.BINARY_OPERATOR and node.spelling == '=')
+              or (kind == CursorKind.UNARY_OPERATOR and node.spelling not in _PURE_UNARY_OPS))
+    if writes:
+        target = next(node.get_children(), None)
+        while target is not None and target.kind in (CursorKind.UNEXPOSED_EXPR, CursorKind.PAREN_EXPR):
+            target = next(target.get_children(), None)
+        if target is not None and target.kind == CursorKind.DECL_REF_EXPR and target.spelling in state_vars:
+            assigned.add(target.spelling)
+    for child in node.get_children():
+        _collect_assigned(child, state_vars, assigned)
+
+def _constant_value(expr):
+    """Valor de una expresión constante de nuestro AST (literales y + - * /), o None."""
+    if not expr:
+        return None
+    if expr['type'] == 'Constant':
+        return expr['value']
+    if expr['type'] == 'UnaryOp' and expr['op'] == '-':
+        operand = _constant_value(expr['operand'])
+        return None if operand is None else -operand
+    if expr['type'] == 'BinaryOp' and expr['op'] in ('+', '-', '*', '/'):
+        left, right = _constant_value(expr['left']), _constant_value(expr['right'])
+        if left is None or right is None:
+            return None
+        if expr['op'] == '/':
+            if right == 0:
+                return None  # Indefinido en C: no es un valor inicial conocido
+            # División de C: trunca hacia 0 (exacta, sin pasar por float)
+            quotient = abs(left) // abs(right)
+            return quotient if (left >= 0) == (right >= 0) else -quotient
+        return {'+': left + right, '-': left - right, '*': left * right}[expr['op']]
+    return None
+
 #======================================================================
 # 2. CONSTRUCTOR DE AST DE LÓGICA DE TRANSICIÓN
 #======================================================================
@@ -1,5 +1,10 @@
 import re
 
+# Plantillas de ecuaciones (ver PolynomialConverter._convert_equation): los
+# nombres se sustituyen por '@i@' y las e_n se numeran desde 0.
+_PLACEHOLDER_RE = re.compile(r'@(\d+)@')
+_E_VAR_RE = re.compile(r'\be_(\d+)\b')
+
 class PolynomialConverter:
     """
     Toma un AST de tuplas "aritmetizado" y lo convierte en un sistema
@@ -9,16 +14,19 @@ class PolynomialConverter:
     Introduce variables existenciales (e_n) para reemplazar operadores
     lógicos con aritmética entera.
     """
-    def __init__(self, optimized_f, sub_defs):
+    def __init__(self, optimized_f, sub_defs, memo=None):
         """
         Inicializa el convertidor.
 
         Args:
             optimized_f (dict): La F-Function optimizada con referencias a C_n.
             sub_defs (dict): Las definiciones de las subexpresiones C_n.
+            memo (ConversionCache, opcional): Conversiones de ecuaciones ya
+                vistas (modo --watch, ver compiler.incremental).
         """
         self.optimized_f = optimized_f
         self.sub_defs = sub_defs
+        self.memo = memo
         self.existential_vars_count = 0
         self.polynomial_system = []
 
@@ -41,17 +49,39 @@ class PolynomialConverter:
         sorted_defs = sorted(self.sub_defs.items(), key=lambda item: int(re.search(r'\d+', item[0]).group()))
         for name, expr_tuple in sorted_defs:
             clean_name = name.replace("{", "").replace("}", "")
-            self._convert_expr_to_poly(clean_name, expr_tuple)
+            self._convert_equation(clean_name, expr_tuple)
         
         # 2. Convertir las ecuaciones de estado principales (las asignaciones finales).
         for var in sorted(self.optimized_f.keys()):
             expr_tuple = self.optimized_f[var]
             lhs = f"{var}[t+1]"
-            self._convert_expr_to_poly(lhs, expr_tuple)
+            self._convert_equation(lhs, expr_tuple)
             
         print(f"  [PolyConverter] ...Conversión completada. {self.existential_vars_count} variables existenciales introducidas.")
         return self.polynomial_system
 
+    def _convert_equation(self, target_var, expr):
+        """
+        Convierte la ecuación `target_var = expr`. Con memo, la conversión se
+        hace una vez por forma de ecuación: las restricciones de una ecuación
+        solo dependen de su propia expresión (los C_n que usa son nombres), así
+        que se guardan como plantilla con los nombres y las e_n numerados
+        localmente, y se instancian con los nombres y el desplazamiento de e_n
+        de esta compilación. El resultado es idéntico al de la conversión directa.
+        """
+        if self.memo is None:
+            self._convert_expr_to_poly(target_var, expr)
+            return
+        names = [target_var]
+        shape = _abstract_names(expr, names, {target_var: 0})
+        template, e_count = self.memo.lookup(shape, lambda: _convert_template(shape))
+        offset = self.existential_vars_count
+        clean = [name.replace("{", "").replace("}", "") for name in names]
+        for line in template:
+            line = _E_VAR_RE.sub(lambda m: f"e_{int(m.group(1)) + offset}", line)
+            self.polynomial_system.append(_PLACEHOLDER_RE.sub(lambda m: clean[int(m.group(1))], line))
+        self.existential_vars_count += e_count
+
     def _convert_expr_to_poly(self, target_var, expr):
         """
         Función principal recursiva. Traduce una expresión (RHS) y genera la
@@ -59,7 +89,7 @@ class PolynomialConverter:
         """
         if not isinstance(expr, tuple):
             # Caso base: es una asignación simple (ej. p[t+1] = C_15)
-            self.polynomial_system.append(f"{target_var} - ({expr}) = 0")
+            self.polynomial_system.append(f"{target_var} - ({self._resolve_operand(expr)}) = 0")
             return
 
         op = expr[0]
@@ -138,4 +168,21 @@ class PolynomialConverter:
         # Es una sub-expresión anidada. Necesitamos calcularla primero.
         temp_var = self._new_e_var()
         self._convert_expr_to_poly(temp_var, operand)
-        return temp_var
\ No newline at end of file
+        return temp_var
+
+def _abstract_names(expr, names, index):
+    """Sustituye cada nombre de la expresión por '@i@' (i: orden de aparición)."""
+    if isinstance(expr, tuple):
+        return (expr[0],) + tuple(_abstract_names(arg, names, index) for arg in expr[1:])
+    if isinstance(expr, str):
+        if expr not in index:
+            index[expr] = len(names)
+            names.append(expr)
+        return f"@{index[expr]}@"
+    return expr
+
+def _convert_template(shape):
+    """Restricciones de la plantilla '@0@ = shape' y número de e_n que introduce."""
+    converter = PolynomialConverter({}, {})
+    converter._convert_expr_to_poly("@0@", shape)
+    return converter.polynomial_system, converter.existential_vars_count
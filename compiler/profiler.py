@@ -0,0 +1,177 @@
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from compiler.cache import write_atomic
+
+class CompilationProfiler:
+    """
+    Perfil de una compilación (opción --profile): tiempo de pared, tiempo de CPU
+    y pico de memoria de cada fase, más los contadores estructurales del
+    programa, para detectar regresiones de escalado entre versiones.
+
+    Las fases se marcan de forma secuencial: `phase(nombre)` cierra la fase en
+    curso y abre la siguiente, y `finish()` cierra la última. La memoria se
+    mide con tracemalloc (solo el proceso principal; los procesos de
+    --latex-workers no se incluyen), lo que ralentiza la compilación: los
+    tiempos de un perfil solo son comparables con los de otros perfiles.
+    """
+    def __init__(self, enabled=True):
+        """
+        Args:
+            enabled (bool): Si es False, todos los métodos son no-ops.
+        """
+        self.enabled = enabled
+        self.phases = []
+        self.counters = {}
+        self._current = None
+        self._owns_tracemalloc = False
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+
+    def phase(self, name):
+        """Cierra la fase en curso (si la hay) y empieza a medir `name`."""
+        if not self.enabled:
+            return
+        self._close_phase()
+        tracemalloc.reset_peak()
+        self._current = {
+            'name': name,
+            'wall': time.perf_counter(),
+            'cpu': time.process_time(),
+            'memory': tracemalloc.get_traced_memory()[0],
+        }
+
+    def finish(self):
+        """Cierra la última fase y deja de trazar la memoria."""
+        if not self.enabled:
+            return
+        self._close_phase()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def count(self, **counters):
+        """Registra contadores estructurales (se sobrescriben si se repiten)."""
+        if self.enabled:
+            self.counters.update(counters)
+
+    def report(self, input_file, extra=None):
+        """
+        Construye el informe del perfil.
+
+        Args:
+            input_file (str): Programa compilado.
+            extra (dict, opcional): Secciones adicionales (p. ej. la caché).
+
+        Returns:
+            dict: Informe serializable a JSON.
+        """
+        report = {
+            'file': input_file,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': sys.platform,
+            'total_wall_seconds': round(sum(p['wall_seconds'] for p in self.phases), 6),
+            'total_cpu_seconds': round(sum(p['cpu_seconds'] for p in self.phases), 6),
+            'peak_memory_bytes': max((p['peak_memory_bytes'] for p in self.phases), default=0),
+            'phases': self.phases,
+            'counters': self.counters,
+        }
+        report.update(extra or {})
+        return report
+
+    def write(self, path, input_file, extra=None):
+        """Escribe el informe JSON en `path` de forma atómica."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        write_atomic(path, json.dumps(self.report(input_file, extra), indent=2, ensure_ascii=False) + "\n")
+
+    # --- Métodos de Ayuda Internos ---
+
+    def _close_phase(self):
+        if self._current is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        start = self._current
+        self.phases.append({
+            'name': start['name'],
+            'wall_seconds': round(time.perf_counter() - start['wall'], 6),
+            'cpu_seconds': round(time.process_time() - start['cpu'], 6),
+            'peak_memory_bytes': peak,
+            'memory_delta_bytes': current - start['memory'],
+        })
+        self._current = None
+
+
+def structural_counters(ast_map, unoptimized_f, optimized_f, sub_defs):
+    """
+    Contadores del tamaño del programa en cada representación.
+
+    Returns:
+        dict: 'ast_nodes' (nodos del AST simplificado del parser),
+        'flattened_tuple_nodes' (nodos de F sin optimizar si se escribiera como
+        árbol), 'tuple_dag_nodes' (tuplas distintas en memoria),
+        'distinct_subexpressions' (subexpresiones estructuralmente distintas),
+        'optimized_tuple_nodes' (nodos de F optimizada y de los C_n) y
+        'state_vars'.
+    """
+    unoptimized_roots = list(unoptimized_f.values())
+    return {
+        'ast_nodes': _count_ast_nodes(ast_map['logic_tree']),
+        'state_vars': len(ast_map['state_vars']),
+        'flattened_tuple_nodes': _tree_size(unoptimized_roots),
+        'tuple_dag_nodes': _dag_size(unoptimized_roots),
+        'distinct_subexpressions': _distinct_subexpressions(unoptimized_roots),
+        'optimized_tuple_nodes': _tree_size(list(optimized_f.values()) + list(sub_defs.values())),
+    }
+
+def _count_ast_nodes(node):
+    if isinstance(node, dict):
+        return 1 + sum(_count_ast_nodes(value) for value in node.values())
+    if isinstance(node, list):
+        return sum(_count_ast_nodes(value) for value in node)
+    return 0
+
+def _tree_size(roots):
+    """Nodos (tuplas y hojas) del árbol desplegado, con memo por id() para no recorrerlo entero."""
+    memo = {}
+    def size(expr):
+        if not isinstance(expr, tuple):
+            return 1
+        key = id(expr)
+        if key not in memo:
+            memo[key] = 1 + sum(size(arg) for arg in expr[1:])
+        return memo[key]
+    return sum(size(root) for root in roots)
+
+def _dag_size(roots):
+    seen = set()
+    stack = list(roots)
+    while stack:
+        expr = stack.pop()
+        if isinstance(expr, tuple) and id(expr) not in seen:
+            seen.add(id(expr))
+            stack.extend(expr[1:])
+    return len(seen)
+
+def _distinct_subexpressions(roots):
+    """
+    Tuplas estructuralmente distintas, por consing: cada nodo recibe un número
+    a partir de su operador y los números de sus hijos, en tiempo lineal en el DAG.
+    """
+    memo = {}; table = {}
+    def number(expr):
+        if not isinstance(expr, tuple):
+            return ('leaf', expr)
+        key = id(expr)
+        if key not in memo:
+            signature = (expr[0],) + tuple(number(arg) for arg in expr[1:])
+            memo[key] = table.setdefault(signature, len(table))
+        return memo[key]
+    for root in roots:
+        number(root)
+    return len(table)
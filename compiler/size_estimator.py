@@ -0,0 +1,352 @@
+import re
+
+# Tabla de operadores compartida por los formatos de texto y LaTeX.
+_POLY_OP_MAP = {'==': 'EQ', '!=': 'NEQ', '>': 'GT', '<': 'LT', '>=': 'GTE', '<=': 'LTE'}
+_LATEX_OP_MAP = {'==': '=', '!=': r'\neq', '>': '>', '<': '<', '>=': r'\geq', '<=': r'\leq', '&&': r'\land', '||': r'\lor'}
+
+# Plantilla que LatexExporter usa para las ecuaciones largas.
+_PARBOX_PREFIX = "\\parbox[t]{0.8\\linewidth}{"
+_PARBOX_THRESHOLD = 80
+# Umbral de ancho de línea usado por LatexExporter._format_single_poly.
+_SINGLE_POLY_LINE_THRESHOLD = 90
+
+_POLY_SUBSCRIPT_RE = re.compile(r'[Ce]_\d+')
+
+
+class SizeEstimator:
+    """
+    Calcula el tamaño exacto (en bytes UTF-8) de cada artefacto que escribe el
+    compilador sin llegar a construir las cadenas de texto.
+
+    Los AST de tuplas son en realidad grafos (DAG): la misma subexpresión aparece
+    compartida muchas veces, y al expandir los C_n su tamaño textual crece de forma
+    exponencial. Por eso cada formato se calcula con memoización por nodo
+    (id de la tupla, o nombre del C_n expandido), de modo que el coste es lineal
+    en el tamaño del DAG y no en el tamaño del texto final.
+
+    Cada método de tamaño replica exactamente la plantilla de su formateador:
+        - 'poly':           EquationExporter._expr_to_poly_string
+        - 'generic':        EquationExporter._tuple_to_generic_string (intérprete)
+        - 'latex':          LatexExporter._format_tuple_to_latex
+        - 'latex_expanded': LatexExporter._format_expanded_latex
+    """
+    def __init__(self, unoptimized_f, optimized_f, sub_defs, state_vars):
+        """
+        Args:
+            unoptimized_f (dict): AST de las ecuaciones sin optimizar.
+            optimized_f (dict): AST de las ecuaciones optimizadas.
+            sub_defs (dict): Definiciones de subexpresiones comunes (C_n).
+            state_vars (list or set): Variables de estado del sistema.
+        """
+        self.unoptimized_f = unoptimized_f
+        self.optimized_f = optimized_f
+        self.sub_defs = sub_defs
+        self.state_vars = set(state_vars)
+        # Un memo por formato. Las claves son id(tupla) o ('C_n', nombre) para
+        # las expansiones; los AST se mantienen vivos en los diccionarios F.
+        self._memo = {'poly': {}, 'poly_expanded': {}, 'generic': {}, 'latex': {}, 'latex_expanded': {}}
+
+    def __getstate__(self):
+        # Los id() no sobreviven a la serialización (p. ej. al enviar el exportador
+        # a otro proceso): la copia empieza con los memos vacíos.
+        state = self.__dict__.copy()
+        state['_memo'] = {fmt: {} for fmt in self._memo}
+        return state
+
+    # --- Tamaños por Formato de Expresión ---
+
+    def poly_string_size(self, expr, expand):
+        """Tamaño en bytes de EquationExporter._expr_to_poly_string(expr, expand)."""
+        memo = self._memo['poly_expanded' if expand else 'poly']
+        if expand and isinstance(expr, str) and expr in self.sub_defs:
+            key = ('C_n', expr)
+            if key not in memo:
+                memo[key] = self.poly_string_size(self.sub_defs[expr], expand)
+            return memo[key]
+        if not isinstance(expr, tuple):
+            if isinstance(expr, str): return _byte_len(expr.replace("{", "").replace("}", ""))
+            return _byte_len(str(expr) if expr is not None else "0")
+
+        key = id(expr)
+        if key in memo:
+            return memo[key]
+
+        op = expr[0]; args = [self.poly_string_size(e, expand) for e in expr[1:]]
+        if op == 'if': size = 23 + 2 * args[0] + args[1] + args[2]    # "(({0}) * ({1}) + (1 - {0}) * ({2}))"
+        elif op == 'neg': size = 3 + args[0]                           # "(-{0})"
+        elif op in ('+', '-', '*', '/'): size = 5 + args[0] + args[1]  # "({0} op {1})"
+        elif op == '&&': size = 5 + args[0] + args[1]                  # "({0} * {1})"
+        elif op == '||': size = 11 + 2 * args[0] + 2 * args[1]         # "({0} + {1} - {0} * {1})"
+        elif op in _POLY_OP_MAP: size = len(_POLY_OP_MAP[op]) + 4 + args[0] + args[1]  # "OP({0}, {1})"
+        else: size = 14 + _byte_len(str(op)) + sum(args) + 2 * max(len(args) - 1, 0)  # "UNKNOWN_OP(op, ...)"
+        memo[key] = size
+        return size
+
+    def generic_string_size(self, expr):
+        """Tamaño en bytes de EquationExporter._tuple_to_generic_string(expr)."""
+        if not isinstance(expr, tuple):
+            return _byte_len(str(expr).replace("{", "").replace("}", ""))
+
+        memo = self._memo['generic']
+        key = id(expr)
+        if key in memo:
+            return memo[key]
+
+        op = expr[0]; args = [self.generic_string_size(e) for e in expr[1:]]
+        if op == 'if': size = 24 + 2 * args[0] + args[1] + args[2]  # "+( *({0}, {1}), *( -(1, {0}), {2}) )"
+        elif op == '&&': size = 7 + args[0] + args[1]                # "*( {0}, {1} )"
+        elif op == '||': size = 17 + 2 * args[0] + 2 * args[1]       # "-( +({0}, {1}), *({0}, {1}) )"
+        else: size = _byte_len(str(op)) + 2 + sum(args) + 2 * max(len(args) - 1, 0)  # "op(a, b, ...)"
+        memo[key] = size
+        return size
+
+    def latex_size(self, expr, expand=False):
+        """
+        Tamaño de LatexExporter._format_tuple_to_latex(expr) (o de
+        _format_expanded_latex si expand=True).
+
+        Returns:
+            tuple: (bytes, caracteres_sin_espacios). El segundo valor es el que
+            LatexExporter compara con su umbral para decidir si usa \\parbox.
+        """
+        memo = self._memo['latex_expanded' if expand else 'latex']
+        if expand and isinstance(expr, str) and expr in self.sub_defs:
+            key = ('C_n', expr)
+            if key not in memo:
+                memo[key] = self.latex_size(self.sub_defs[expr], expand)
+            return memo[key]
+        if not isinstance(expr, tuple):
+            text = _format_latex_var(str(expr))
+            return _byte_len(text), _nonspace_len(text)
+
+        key = id(expr)
+        if key in memo:
+            return memo[key]
+
+        op = expr[0]; args = [self.latex_size(e, expand) for e in expr[1:]]
+        size = self._latex_template_size(op, args, expand)
+        memo[key] = size
+        return size
+
+    def bounded_latex_size(self, expr, remaining, weight, elided, report_exporter):
+        """
+        Tamaño de LatexExporter._format_bounded_latex(expr, remaining, weight, elided).
+
+        Toma las mismas decisiones de expansión/elisión que el formateador (ambos
+        usan latex_size para medir cada C_n), pero sin construir el texto.
+
+        Returns:
+            tuple: ((bytes, caracteres_sin_espacios), presupuesto restante).
+        """
+        if isinstance(expr, str) and expr in self.sub_defs:
+            full = self.latex_size(expr, expand=True)
+            if full[0] * weight <= remaining:
+                return full, remaining - full[0] * weight
+            elided.append((expr, full[0] * weight))
+            text = report_exporter._format_elided_reference(expr, full[0])
+            return (_byte_len(text), _nonspace_len(text)), remaining
+        if not isinstance(expr, tuple):
+            return self.latex_size(expr), remaining
+
+        op = expr[0]; args = []
+        for i, e in enumerate(expr[1:]):
+            arg_weight = weight * 2 if op == 'if' and i == 0 else weight
+            size, remaining = self.bounded_latex_size(e, remaining, arg_weight, elided, report_exporter)
+            args.append(size)
+        return self._latex_template_size(op, args, expand=True), remaining
+
+    # --- Tamaños por Artefacto ---
+
+    def interpreter_size(self):
+        """Tamaño exacto de EquationExporter.export_optimized_for_interpreter()."""
+        sizes = []
+        for name, expr_tuple in self.sub_defs.items():
+            clean_name = name.replace("{", "").replace("}", "")
+            sizes.append(_byte_len(clean_name) + 4 + self.generic_string_size(expr_tuple))  # "name := expr"
+        for var, expr_tuple in self.optimized_f.items():
+            lhs = f"{var}[t+1]" if var in self.state_vars else var
+            sizes.append(_byte_len(lhs) + 4 + self.generic_string_size(expr_tuple))
+        return sum(sizes) + max(len(sizes) - 1, 0)  # separadores "\n"
+
+    def unoptimized_text_size(self):
+        """Tamaño exacto de EquationExporter.export_unoptimized()."""
+        state_vars = [v for v in sorted(self.unoptimized_f.keys()) if v in self.state_vars]
+        total = 0
+        for var in state_vars:
+            expr_tuple = self.unoptimized_f.get(var, var)
+            # "({var}[t+1] - ({rhs}))^2"
+            total += _byte_len(f"{var}[t+1]") + self.poly_string_size(expr_tuple, expand=True) + 9
+        total += 4 * max(len(state_vars) - 1, 0)  # " + \n"
+        return total + 4  # " = 0"
+
+    def single_polynomial_size(self, poly_system):
+        """Tamaño exacto de EquationExporter.export_single_polynomial(poly_system)."""
+        if not poly_system:
+            return _byte_len("= 0")
+        total = sum(_byte_len(eq.rsplit(' =', 1)[0]) + 4 for eq in poly_system)  # "({lhs})^2"
+        return total + 3 * (len(poly_system) - 1) + 4  # " + " y " = 0"
+
+    def latex_section_sizes(self, report_exporter, chunking=None):
+        """
+        Tamaño exacto de cada sección del informe de LatexExporter.export().
+
+        Las plantillas de texto fijo se renderizan con los cuerpos vacíos (son
+        baratas); los cuerpos de ecuaciones se calculan con los tamaños memoizados.
+
+        Args:
+            report_exporter (LatexExporter): El exportador configurado tal y como
+                se usará para generar el informe (incluidas las secciones omitidas).
+            chunking (tuple, optional): (nombre del directorio de páginas, ecuaciones
+                por página) para estimar LatexExporter.export_chunked. Cada sección
+                cuenta entonces sus líneas \\input del esqueleto más sus páginas.
+
+        Returns:
+            dict: Bytes por sección: 'frame' (cabecera, introducción, plantillas y
+            pie), 'unoptimized', 'cse', 'optimized', 'poly_system' y 'single_poly'.
+        """
+        rep = report_exporter
+        omitted = rep.omitted_sections
+        sizes = {}
+
+        def block(section, line_sizes, separator_len):
+            if chunking is None:
+                return self._align_block_size(sum(line_sizes) + separator_len * max(len(line_sizes) - 1, 0))
+            chunk_dir_name, per_chunk = chunking
+            total = 0; input_paths = []
+            for start in range(0, len(line_sizes), per_chunk):
+                batch = line_sizes[start:start + per_chunk]
+                total += self._align_block_size(sum(batch) + separator_len * (len(batch) - 1))
+                input_paths.append(f"{chunk_dir_name}/{rep._chunk_name(section, len(input_paths) + 1)}")
+            return total + _byte_len(rep._input_block(input_paths))
+
+        frame = rep._build_header() + rep._build_intro()
+        frame += rep._transition_function_template("", "", "")
+        frame += rep._polynomial_conversion_template("", "")
+        frame += r"\end{document}"
+        sizes['frame'] = _byte_len(frame)
+
+        if 'unoptimized' in omitted:
+            sizes['unoptimized'] = _byte_len(rep._build_omitted_notice('unoptimized'))
+        elif rep.max_expanded_bytes is None:
+            lines = [(var, self.latex_size(rep.unoptimized_f.get(var, var), expand=True)) for var in sorted(rep.state_vars)]
+            sizes['unoptimized'] = block('unoptimized', self._equation_line_sizes(lines, "[t+1] &="), 3)
+        else:
+            elided = []
+            lines = [(var, self.bounded_latex_size(rep.optimized_f.get(var, var), rep.max_expanded_bytes, 1, elided, rep)[0])
+                     for var in sorted(rep.state_vars)]
+            sizes['unoptimized'] = block('unoptimized', self._equation_line_sizes(lines, "[t+1] &="), 3)
+            if elided:
+                sizes['unoptimized'] += _byte_len(rep._build_elision_note(elided))
+
+        if rep.sub_defs:
+            sorted_defs = sorted(rep.sub_defs.items(), key=lambda item: int(re.search(r'\d+', item[0]).group()))
+            lines = [(name, self.latex_size(expr_tuple)) for name, expr_tuple in sorted_defs]
+            sizes['cse'] = _byte_len(rep._cse_template("")) + block('cse', self._equation_line_sizes(lines, " &="), 4)
+        else:
+            sizes['cse'] = 0
+
+        lines = [(var, self.latex_size(rep.optimized_f.get(var, var))) for var in sorted(rep.state_vars)]
+        sizes['optimized'] = block('optimized', self._equation_line_sizes(lines, "[t+1] &="), 3)
+
+        if 'poly_system' in omitted:
+            sizes['poly_system'] = _byte_len(rep._build_omitted_notice('poly_system'))
+        else:
+            sizes['poly_system'] = block('poly_system', [self._poly_system_line_size(line) for line in rep.poly_system], 3)
+
+        if 'single_poly' in omitted:
+            sizes['single_poly'] = _byte_len(rep._build_omitted_notice('single_poly'))
+        elif chunking is None and not rep.poly_system:
+            # Caso degenerado: la ecuación es "= 0" y se formatea como "& = 0 = 0".
+            sizes['single_poly'] = self._align_block_size(_byte_len("& = 0 = 0"))
+        else:
+            # Cada línea lleva "& " (la primera) o "& + " delante, y la última " = 0".
+            line_sizes = [size + (2 if k == 0 else 4) for k, size in enumerate(self._single_poly_line_sizes(rep.poly_system))]
+            if line_sizes: line_sizes[-1] += 4
+            elif chunking is None: line_sizes = [_byte_len("& = 0")]
+            sizes['single_poly'] = block('single_poly', line_sizes, 4)
+
+        return sizes
+
+    # --- Métodos de Ayuda Internos ---
+
+    def _latex_template_size(self, op, args, expand):
+        """Aplica la plantilla LaTeX de 'op' a los tamaños (bytes, sin_espacios) de sus argumentos."""
+        sizes = [a[0] for a in args]; dense = [a[1] for a in args]
+        if op == 'if':
+            # "({0} \cdot {1} + (1 - {0}) \cdot {2})"; expandido añade "()" a {1} y {2}
+            extra = 4 if expand else 0
+            return (25 + extra + 2 * sizes[0] + sizes[1] + sizes[2], 17 + extra + 2 * dense[0] + dense[1] + dense[2])
+        if op == 'neg':
+            return (3 + sizes[0], 3 + dense[0])                                   # "(-{0})"
+        if op == '*':
+            return (9 + sizes[0] + sizes[1], 7 + dense[0] + dense[1])             # "({0} \cdot {1})"
+        if op in ('+', '-', '/'):
+            return (5 + sizes[0] + sizes[1], 3 + dense[0] + dense[1])             # "({0} op {1})"
+        if op in _LATEX_OP_MAP:
+            op_len = len(_LATEX_OP_MAP[op])
+            return (4 + op_len + sizes[0] + sizes[1], 2 + op_len + dense[0] + dense[1])  # "({0} op {1})"
+        # "\text{OP}_op({0}, {1}, ...)"
+        op_text = f"\\text{{OP}}_{op}()"
+        separators = max(len(args) - 1, 0)
+        return (_byte_len(op_text) + sum(sizes) + 2 * separators, _nonspace_len(op_text) + sum(dense) + separators)
+
+    def _equation_line_sizes(self, lines, lhs_suffix):
+        """Tamaño de cada línea 'lhs &= rhs', con \\parbox si procede."""
+        sizes = []
+        for name, (rhs_size, rhs_dense) in lines:
+            if rhs_dense > _PARBOX_THRESHOLD:
+                rhs_size += len(_PARBOX_PREFIX) + 1
+            sizes.append(_byte_len(_format_latex_var(name) + lhs_suffix) + 1 + rhs_size)
+        return sizes
+
+    def _align_block_size(self, body_size):
+        # "\begin{align*}\n{body}\n\end{align*}"
+        return 28 + body_size
+
+    def _poly_expression_size(self, expr_str):
+        """Tamaño de LatexExporter._format_poly_expression(expr_str), por conteo."""
+        # ' * ' pasa a ' \cdot ' (+6), 'e_12' a 'e_{12}' (+2) y '^2' a '^{2}' (+2).
+        return (_byte_len(expr_str) + 6 * expr_str.count('*')
+                + 2 * len(_POLY_SUBSCRIPT_RE.findall(expr_str)) + 2 * expr_str.count('^2'))
+
+    def _poly_system_line_size(self, line):
+        parts = line.split(' = ', 1)
+        if len(parts) == 2:
+            return self._poly_expression_size(parts[0]) + 4 + self._poly_expression_size(parts[1])  # "{lhs} &= {rhs}"
+        return self._poly_expression_size(line) + 2
+
+    def _single_poly_line_sizes(self, poly_system):
+        """
+        Tamaño de cada línea de LatexExporter._wrap_terms para la ecuación única,
+        sin los prefijos "& " / "& + " ni el " = 0" final.
+
+        Reproduce el reparto en líneas del formateador a partir de la longitud de
+        cada término, sin construir la ecuación única.
+        """
+        line_sizes = []; current = 0; current_bytes = 0; started = False
+        for eq in poly_system:
+            for term in f"({eq.rsplit(' =', 1)[0]})^2".split(' + '):
+                term_len = self._poly_expression_size(term)
+                term_bytes = term_len
+                term_len -= _byte_len(term) - len(term)  # el umbral cuenta caracteres
+                separator = 3 if started else 0
+                if current + separator + term_len > _SINGLE_POLY_LINE_THRESHOLD and started:
+                    line_sizes.append(current_bytes); current = term_len; current_bytes = term_bytes
+                else:
+                    current += separator + term_len; current_bytes += separator + term_bytes
+                started = current > 0
+        if started: line_sizes.append(current_bytes)
+        return line_sizes
+
+
+def _byte_len(text):
+    return len(text.encode('utf-8'))
+
+def _nonspace_len(text):
+    return len(text) - text.count(" ")
+
+def _format_latex_var(var_name):
+    """Réplica de LatexExporter._format_var."""
+    if var_name.startswith("C_"): return var_name.replace("{", "").replace("}", "")
+    if "_" in var_name: return "\\text{" + var_name.replace('_', r'\\_') + "}"
+    return var_name
@@ -0,0 +1,64 @@
+def variables_in(expr):
+    """Nombres de variable (hojas de tipo str) que aparecen en una expresión."""
+    names = set()
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, tuple):
+            stack.extend(node[1:])
+        elif isinstance(node, str):
+            names.add(node)
+    return names
+
+def cone_of_influence(f_function, targets):
+    """
+    Variables de estado de las que dependen, directa o transitivamente a lo
+    largo de los ticks, las variables objetivo.
+
+    Args:
+        f_function (dict): F del generador {variable: árbol de tuplas}.
+        targets (iterable): Variables de estado que interesan.
+
+    Returns:
+        set: El cono (incluye los objetivos).
+    """
+    cone = set()
+    pending = list(targets)
+    while pending:
+        var = pending.pop()
+        if var in cone:
+            continue
+        cone.add(var)
+        if var in f_function:
+            pending.extend(name for name in variables_in(f_function[var]) if name in f_function and name not in cone)
+    return cone
+
+def slice_function(f_function, state_vars, input_vars, targets):
+    """
+    Restringe F al cono de influencia de `targets`.
+
+    Args:
+        f_function (dict): F del generador.
+        state_vars (list): Variables de estado del programa.
+        input_vars (set): Entradas detectadas por el generador.
+        targets (list): Variables de estado que interesan.
+
+    Returns:
+        tuple: (F reducida, variables de estado conservadas, entradas que
+        siguen usándose, variables de estado descartadas)
+
+    Raises:
+        ValueError: Si algún objetivo no es una variable de estado.
+    """
+    unknown = [var for var in targets if var not in state_vars]
+    if unknown:
+        raise ValueError(f"No son variables de estado: {', '.join(unknown)} "
+                         f"(variables de estado: {', '.join(state_vars)})")
+    cone = cone_of_influence(f_function, targets)
+    sliced_f = {var: expr for var, expr in f_function.items() if var in cone}
+    kept = [var for var in state_vars if var in cone]
+    pruned = [var for var in state_vars if var not in cone]
+    used = set()
+    for expr in sliced_f.values():
+        used |= variables_in(expr)
+    return sliced_f, kept, {name for name in input_vars if name in used}, pruned
@@ -0,0 +1,305 @@
+import re
+
+# Variables (incluida la forma 'x[t+1]'), constantes enteras y operadores.
+_TOKEN_RE = re.compile(r'\s*(?:(\d+)|([A-Za-z_]\w*(?:\[[^\]]*\])?)|(\S))')
+
+
+class TermBudgetExceeded(Exception):
+    """Se lanza cuando una expansión supera el presupuesto de términos."""
+    pass
+
+
+class SparsePolynomialExpander:
+    """
+    Expande la ecuación única P = sum((LHS_i)^2) = 0 a su forma canónica, con
+    todos los monomios desarrollados y agrupados.
+
+    export_single_polynomial solo envuelve cada restricción en "(...)^2" y las
+    concatena, así que no dice nada del tamaño real de P. Este expansor trabaja
+    con polinomios dispersos: diccionarios {monomio: coeficiente entero}, donde
+    cada monomio es una tupla ordenada de pares (índice de variable, exponente).
+    Las restricciones se expanden, se elevan al cuadrado y se acumulan una a una
+    (sin materializar todos los cuadrados a la vez), y el proceso se detiene en
+    cuanto el número de términos supera el presupuesto.
+
+    Si se alcanza el presupuesto, las estadísticas de las restricciones restantes
+    se sustituyen por cotas superiores calculadas sobre la sintaxis, y el
+    resultado se marca como estimación.
+    """
+    def __init__(self, max_terms=None):
+        """
+        Inicializa el expansor.
+
+        Args:
+            max_terms (int, optional): Número máximo de términos de cualquier
+                polinomio intermedio o del acumulado. None para no limitarlo.
+        """
+        self.max_terms = max_terms
+        self.var_index = {}
+        self.var_names = []
+        self.polynomial = {}
+
+    def expand_master(self, poly_system):
+        """
+        Punto de entrada. Expande P a partir del sistema de restricciones.
+
+        Args:
+            poly_system (list): Ecuaciones "LHS = 0" del PolynomialConverter.
+
+        Returns:
+            dict: Estadísticas de P:
+            - 'terms': número de monomios.
+            - 'degree': grado total.
+            - 'max_coeff_bits': longitud en bits del mayor coeficiente (en valor absoluto).
+            - 'exact': False si se agotó el presupuesto y los valores son cotas superiores.
+            - 'constraints_expanded': restricciones acumuladas antes de detenerse.
+            - 'num_constraints': restricciones totales.
+        """
+        print("  [Expander] Expandiendo la ecuación polinómica única...")
+        self.polynomial = {}
+        trees = [self._parse(eq.rsplit(' =', 1)[0]) for eq in poly_system]
+        degree = 0
+        expanded = 0
+        stopped = False
+        for tree in trees:
+            try:
+                lhs = self._expand(tree)
+                self._add_into(self.polynomial, self._square(lhs))
+            except TermBudgetExceeded:
+                stopped = True
+                break
+            degree = max(degree, 2 * self.degree(lhs))
+            expanded += 1
+
+        max_coeff = max((abs(c) for c in self.polynomial.values()), default=0)
+        terms = len(self.polynomial)
+        if stopped:
+            # Cotas para las restricciones no acumuladas: un cuadrado de n términos
+            # tiene a lo sumo n(n+1)/2 monomios, y sus coeficientes no superan el
+            # cuadrado de la norma L1 del polinomio original.
+            for tree in trees[expanded:]:
+                n_terms, tree_degree, norm = self._syntactic_bounds(tree)
+                terms += n_terms * (n_terms + 1) // 2
+                degree = max(degree, 2 * tree_degree)
+                max_coeff += norm * norm
+            print(f"  [Expander] ...Presupuesto de {self.max_terms} términos agotado tras {expanded} de "
+                  f"{len(trees)} restricciones. Se informa una estimación (cota superior).")
+        else:
+            # Al ser una suma de cuadrados, la parte de mayor grado no puede
+            # cancelarse: el grado es exactamente el doble del máximo de los LHS.
+            print(f"  [Expander] ...Expansión completada: {terms} términos de grado {degree}.")
+
+        return {
+            'terms': terms,
+            'degree': degree,
+            'max_coeff_bits': max_coeff.bit_length(),
+            'exact': not stopped,
+            'constraints_expanded': expanded,
+            'num_constraints': len(trees),
+        }
+
+    def canonical_string(self):
+        """
+        Forma canónica de P (tras expand_master): monomios ordenados por grado
+        decreciente y, dentro del mismo grado, lexicográficamente.
+        """
+        return f"{self.format_polynomial(self.polynomial)} = 0"
+
+    def format_polynomial(self, polynomial):
+        """Texto de un polinomio disperso, con los monomios en orden canónico."""
+        if not polynomial:
+            return "0"
+        def sort_key(item):
+            monomial = item[0]
+            return (-sum(exp for _, exp in monomial), [(self.var_names[i], -exp) for i, exp in monomial])
+        parts = []
+        for monomial, coeff in sorted(polynomial.items(), key=sort_key):
+            factors = [self.var_names[i] if exp == 1 else f"{self.var_names[i]}^{exp}" for i, exp in monomial]
+            magnitude = abs(coeff)
+            if magnitude != 1 or not factors:
+                factors.insert(0, str(magnitude))
+            sign = "-" if coeff < 0 else "+"
+            parts.append(f"{sign} {' * '.join(factors)}")
+        text = " ".join(parts)
+        return text[2:] if text.startswith("+ ") else "-" + text[2:]
+
+    def expand_string(self, expr_str):
+        """Expande el texto de una expresión polinómica (p. ej. un LHS) a un polinomio disperso."""
+        return self._expand(self._parse(expr_str))
+
+    # --- Análisis Sintáctico ---
+
+    def _parse(self, expr_str):
+        """
+        Convierte el texto de un LHS en un árbol de tuplas:
+        ('num', n), ('var', índice), ('+', a, b), ('-', a, b), ('*', a, b),
+        ('neg', a) o ('^', a, k).
+        """
+        tokens = []
+        for number, name, symbol in _TOKEN_RE.findall(expr_str):
+            if number: tokens.append(('num', int(number)))
+            elif name: tokens.append(('var', self.intern_variable(name)))
+            elif symbol: tokens.append(('op', symbol))
+        self._tokens = tokens; self._pos = 0
+        tree = self._parse_sum()
+        if self._pos != len(tokens):
+            raise ValueError(f"Expresión polinómica no reconocida: '{expr_str}'")
+        return tree
+
+    def _peek(self):
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else (None, None)
+
+    def _parse_sum(self):
+        node = self._parse_product()
+        while self._peek() in (('op', '+'), ('op', '-')):
+            op = self._tokens[self._pos][1]; self._pos += 1
+            node = (op, node, self._parse_product())
+        return node
+
+    def _parse_product(self):
+        node = self._parse_unary()
+        while self._peek() == ('op', '*'):
+            self._pos += 1
+            node = ('*', node, self._parse_unary())
+        return node
+
+    def _parse_unary(self):
+        if self._peek() == ('op', '-'):
+            self._pos += 1
+            return ('neg', self._parse_unary())
+        node = self._parse_atom()
+        if self._peek() == ('op', '^'):
+            self._pos += 1
+            kind, exponent = self._peek()
+            if kind != 'num':
+                raise ValueError("Se esperaba un exponente entero tras '^'.")
+            self._pos += 1
+            node = ('^', node, exponent)
+        return node
+
+    def _parse_atom(self):
+        kind, value = self._peek()
+        if kind in ('num', 'var'):
+            self._pos += 1
+            return (kind, value)
+        if (kind, value) == ('op', '('):
+            self._pos += 1
+            node = self._parse_sum()
+            if self._peek() != ('op', ')'):
+                raise ValueError("Falta un paréntesis de cierre.")
+            self._pos += 1
+            return node
+        raise ValueError(f"Token inesperado: '{value}'")
+
+    def intern_variable(self, name):
+        """Índice de la variable `name`, registrándola si es nueva."""
+        if name not in self.var_index:
+            self.var_index[name] = len(self.var_names)
+            self.var_names.append(name)
+        return self.var_index[name]
+
+    # --- Aritmética de Polinomios Dispersos ---
+
+    def _expand(self, tree):
+        """Expande un árbol de tuplas a un polinomio disperso."""
+        kind = tree[0]
+        if kind == 'num':
+            return {(): tree[1]} if tree[1] else {}
+        if kind == 'var':
+            return {((tree[1], 1),): 1}
+        if kind == 'neg':
+            return {m: -c for m, c in self._expand(tree[1]).items()}
+        if kind == '^':
+            base = self._expand(tree[1])
+            result = {(): 1}
+            for _ in range(tree[2]):
+                result = self._multiply(result, base)
+            return result
+        left = self._expand(tree[1]); right = self._expand(tree[2])
+        if kind == '*':
+            return self._multiply(left, right)
+        self._add_into(left, right, 1 if kind == '+' else -1)
+        self._check_budget(left)
+        return left
+
+    def _multiply(self, p, q):
+        result = {}
+        for m1, c1 in p.items():
+            for m2, c2 in q.items():
+                monomial = _multiply_monomials(m1, m2)
+                coeff = result.get(monomial, 0) + c1 * c2
+                if coeff: result[monomial] = coeff
+                else: result.pop(monomial, None)
+            self._check_budget(result)
+        return result
+
+    def _square(self, p):
+        """p^2 = sum(c_i^2 m_i^2) + 2 sum_{i<j}(c_i c_j m_i m_j): la mitad de productos que p*p."""
+        items = list(p.items())
+        result = {}
+        for i, (m1, c1) in enumerate(items):
+            for j in range(i, len(items)):
+                m2, c2 = items[j]
+                monomial = _multiply_monomials(m1, m2)
+                coeff = result.get(monomial, 0) + (c1 * c2 if i == j else 2 * c1 * c2)
+                if coeff: result[monomial] = coeff
+                else: result.pop(monomial, None)
+            self._check_budget(result)
+        return result
+
+    def _add_into(self, accumulator, p, scale=1):
+        """Suma p (multiplicado por scale) sobre accumulator, en su sitio."""
+        for monomial, c in p.items():
+            coeff = accumulator.get(monomial, 0) + scale * c
+            if coeff: accumulator[monomial] = coeff
+            else: accumulator.pop(monomial, None)
+        self._check_budget(accumulator)
+
+    def _check_budget(self, p):
+        if self.max_terms is not None and len(p) > self.max_terms:
+            raise TermBudgetExceeded(len(p))
+
+    def degree(self, p):
+        """Grado total de un polinomio disperso."""
+        return max((sum(exp for _, exp in monomial) for monomial in p), default=0)
+
+    def _syntactic_bounds(self, tree):
+        """
+        Cotas superiores (número de términos, grado, norma L1) de la expansión de
+        un árbol, calculadas sin expandirlo.
+        """
+        kind = tree[0]
+        if kind == 'num':
+            return (1 if tree[1] else 0, 0, abs(tree[1]))
+        if kind == 'var':
+            return (1, 1, 1)
+        if kind == 'neg':
+            return self._syntactic_bounds(tree[1])
+        if kind == '^':
+            n, d, norm = self._syntactic_bounds(tree[1]); k = tree[2]
+            # Monomios de grado k en n "símbolos": C(n+k-1, k).
+            terms = 1
+            for i in range(k):
+                terms = terms * (n + i) // (i + 1)
+            return (terms, d * k, norm ** k)
+        n1, d1, norm1 = self._syntactic_bounds(tree[1])
+        n2, d2, norm2 = self._syntactic_bounds(tree[2])
+        if kind == '*':
+            return (n1 * n2, d1 + d2, norm1 * norm2)
+        return (n1 + n2, max(d1, d2), norm1 + norm2)
+
+
+def _multiply_monomials(a, b):
+    """Producto de dos monomios (tuplas ordenadas de (índice, exponente))."""
+    if not a: return b
+    if not b: return a
+    result = []; i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i][0] == b[j][0]:
+            result.append((a[i][0], a[i][1] + b[j][1])); i += 1; j += 1
+        elif a[i][0] < b[j][0]:
+            result.append(a[i]); i += 1
+        else:
+            result.append(b[j]); j += 1
+    result.extend(a[i:]); result.extend(b[j:])
+    return tuple(result)
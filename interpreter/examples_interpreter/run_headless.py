@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+# --- CORRECCIÓN ---
+from interpreter.interpreter import EquationEngine
+from interpreter import metrics
+from interpreter.partial_eval import parse_assignments
+
+def random_inputs(rng):
+    """Entradas de un fotograma: una tecla al azar la mitad de las veces."""
+    if rng.random() < 0.5:
+        return {'kbhit': 1, 'getch': rng.randint(32, 126)}
+    return {'kbhit': 0, 'getch': 0}
+
+def main():
+    """
+    Simulación sin pantalla ni pausas, para pruebas de larga duración. Publica
+    métricas periódicas del bucle (ticks/s, histograma de latencia, tasa de
+    cambio de cada variable de estado) en un fichero para Prometheus y/o JSON Lines.
+    """
+    cli_parser = argparse.ArgumentParser(description="Ejecuta las ecuaciones sin pantalla y publica métricas.")
+    cli_parser.add_argument("input_file", help="Archivo *_interpreter_input.txt generado por el compilador.")
+    cli_parser.add_argument("--ticks", type=int, default=0, help="Pasos a simular (0: hasta Ctrl+C).")
+    cli_parser.add_argument("--state", default="{}", help="Estado inicial en JSON (las variables omitidas valen 0).")
+    cli_parser.add_argument("--seed", type=int, default=0, help="Semilla de las entradas aleatorias.")
+    cli_parser.add_argument("--specialize", action="append", default=[], type=parse_assignments,
+                            help="Variante especializada para esos valores de entrada, p. ej. 'kbhit=0' (se puede repetir).")
+    cli_parser.add_argument("--metrics-interval", type=float, default=metrics.DEFAULT_INTERVAL,
+                            help=f"Segundos entre publicaciones de métricas (por defecto: {metrics.DEFAULT_INTERVAL}).")
+    cli_parser.add_argument("--metrics-prom", help="Fichero de texto de Prometheus (textfile collector) a reescribir.")
+    cli_parser.add_argument("--metrics-jsonl", help="Fichero JSON Lines al que añadir cada publicación.")
+    args = cli_parser.parse_args()
+
+    engine = EquationEngine(args.input_file, specialize=args.specialize)
+    current_state = {var: 0 for var in engine.get_state_variables()}
+    current_state.update(json.loads(args.state))
+
+    program = os.path.basename(args.input_file).replace('_interpreter_input.txt', '')
+    sinks = []
+    if args.metrics_prom:
+        sinks.append(metrics.PrometheusTextfileSink(args.metrics_prom, program))
+    if args.metrics_jsonl:
+        sinks.append(metrics.JsonLinesSink(args.metrics_jsonl))
+    loop_metrics = metrics.RunLoopMetrics(current_state.keys(), sinks, args.metrics_interval, engine)
+
+    rng = random.Random(args.seed)
+    print(f"\n--- Simulación sin pantalla de {program} (Ctrl+C para terminar) ---")
+    tick = 0
+    try:
+        while not args.ticks or tick < args.ticks:
+            start = time.perf_counter()
+            next_state = engine.compute_next_state(current_state, random_inputs(rng))
+            loop_metrics.record_tick(time.perf_counter() - start, current_state, next_state)
+            current_state.update(next_state)
+            tick += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+    snapshot = loop_metrics.flush()
+    print(f"--- {snapshot['ticks_total']} pasos; estado final: {current_state} ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import re
+import sys
+import time
+
+from interpreter.tabulation import input_alphabet, parse_input_values
+from interpreter import vectorized
+
+# Bits por variable en la clave empaquetada de un estado (con signo, en exceso 2^(bits-1)).
+DEFAULT_FIELD_BITS = 16
+DEFAULT_BLOOM_ERROR = 0.001
+_OVERFLOW_MESSAGE = "Una transición se sale de int64: su estado no cabe en la clave empaquetada."
+
+_CONDITION_RE = re.compile(r'^\s*([A-Za-z_]\w*)\s*(==|!=|<=|>=|<|>|=)\s*(-?\d+)\s*$')
+_COMPARISONS = {
+    '==': lambda a, b: a == b, '=': lambda a, b: a == b, '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b, '>': lambda a, b: a > b, '<=': lambda a, b: a <= b, '>=': lambda a, b: a >= b,
+}
+
+class StatePacker:
+    """
+    Empaqueta un estado en un único entero: cada variable ocupa un campo de
+    `bits` bits, en el orden de `state_vars`. Es la clave del conjunto de
+    visitados, mucho más compacta que un diccionario o una tupla.
+    """
+    def __init__(self, state_vars, bits=DEFAULT_FIELD_BITS):
+        self.state_vars = list(state_vars)
+        self.bits = bits
+        self.bias = 1 << (bits - 1)
+        self.mask = (1 << bits) - 1
+        self.width = bits * len(self.state_vars)
+
+    def pack(self, state):
+        key = 0
+        for i, var in enumerate(self.state_vars):
+            field = state.get(var, 0) + self.bias
+            if not 0 <= field <= self.mask:
+                raise ValueError(f"{var} = {state.get(var, 0)} no cabe en {self.bits} bits (usa un --bits mayor).")
+            key |= field << (i * self.bits)
+        return key
+
+    def unpack(self, key):
+        return {var: ((key >> (i * self.bits)) & self.mask) - self.bias for i, var in enumerate(self.state_vars)}
+
+    def pack_rows(self, rows):
+        """
+        Claves de un lote de estados (array NumPy de forma (n, variables)).
+
+        Returns:
+            list: Un entero por fila.
+        """
+        np = vectorized.np
+        if rows.size and (rows.min() < -self.bias or rows.max() > self.mask - self.bias):
+            raise ValueError(f"Un estado del lote no cabe en {self.bits} bits por variable (usa un --bits mayor).")
+        # En uint64 (con 64 bits, el exceso 2^63 no cabe en int64).
+        fields = rows.astype(np.uint64) + np.uint64(self.bias)
+        per_word = max(1, 64 // self.bits)
+        words = []
+        for start in range(0, len(self.state_vars), per_word):
+            word = np.zeros(len(rows), dtype=np.uint64)
+            for offset, i in enumerate(range(start, min(start + per_word, len(self.state_vars)))):
+                word |= fields[:, i] << np.uint64(offset * self.bits)
+            words.append(word.tolist())
+        if len(words) == 1:
+            return words[0]
+        shift = per_word * self.bits
+        keys = []
+        for parts in zip(*words):
+            key = 0
+            for w, part in enumerate(parts):
+                key |= part << (w * shift)
+            keys.append(key)
+        return keys
+
+    def unpack_rows(self, keys):
+        np = vectorized.np
+        return np.array([[((key >> (i * self.bits)) & self.mask) - self.bias for i in range(len(self.state_vars))]
+                         for key in keys], dtype=np.int64).reshape(len(keys), len(self.state_vars))
+
+
+class BloomFilter:
+    """
+    Conjunto aproximado de claves enteras con memoria fija. Puede dar falsos
+    positivos (un estado nuevo se toma por visitado), nunca falsos negativos.
+    """
+    def __init__(self, capacity, error_rate=DEFAULT_BLOOM_ERROR):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, key):
+        """Añade la clave; devuelve True si no estaba (según el filtro)."""
+        new = False
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                new = True
+        self.count += new
+        return new
+
+    def __contains__(self, key):
+        return all(self.bits[p // 8] & (1 << (p % 8)) for p in self._positions(key))
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+    def _positions(self, key):
+        # Doble hash sobre el entero reducido a 64 bits.
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1 = (h * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        h2 = (((h ^ (h >> 29)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+
+def parse_target(text):
+    """
+    'f>=1,b==40' -> ('f>=1,b==40', [('f', '>=', 1), ('b', '==', 40)]): conjunción
+    de comparaciones entre una variable de estado y una constante.
+    """
+    conditions = []
+    for part in text.split(','):
+        match = _CONDITION_RE.match(part)
+        if not match:
+            raise ValueError(f"Condición no válida: '{part}' (se esperaba variable<op>valor)")
+        var, op, value = match.groups()
+        conditions.append((var, op, int(value)))
+    return text, conditions
+
+
+class StateSpaceExplorer:
+    """
+    Recorre los estados alcanzables desde un estado inicial probando, en cada
+    uno, todas las combinaciones de un alfabeto de entradas finito.
+
+    Los visitados se guardan como claves empaquetadas (StatePacker) en una
+    tabla hash que además recuerda el predecesor de cada estado, para
+    reconstruir la secuencia de entradas más corta hasta un objetivo. Con
+    `bloom_capacity` se usa en su lugar un filtro de Bloom de tamaño fijo: el
+    recuento pasa a ser aproximado y no hay secuencias de entradas.
+
+    En anchura (BFS), si NumPy está disponible, cada nivel se expande de una
+    vez con interpreter.vectorized, con la semántica del evaluador de
+    referencia: las transiciones que dividen entre cero no llevan a ningún
+    estado (se cuentan como indefinidas) y un resultado que se sale de int64
+    es un error, igual que un valor que no cabe en la clave empaquetada.
+    """
+    def __init__(self, engine, alphabet, bits=DEFAULT_FIELD_BITS, bloom_capacity=None,
+                 bloom_error=DEFAULT_BLOOM_ERROR, batch=True):
+        """
+        Args:
+            engine (EquationEngine): Motor con las ecuaciones.
+            alphabet (list): Combinaciones de entradas (ver tabulation.input_alphabet).
+            bits (int): Bits por variable en la clave empaquetada.
+            bloom_capacity (int, opcional): Estados previstos; activa el filtro de Bloom.
+            bloom_error (float): Tasa de falsos positivos del filtro.
+            batch (bool): Expande cada nivel del BFS con NumPy si está instalado.
+        """
+        self.engine = engine
+        self.alphabet = alphabet or [{}]
+        self.state_vars = sorted(engine.get_state_variables())
+        self.packer = StatePacker(self.state_vars, bits)
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error = bloom_error
+        self.batch = batch and vectorized.np is not None
+        self._vector_step = vectorized.VectorizedStep.from_engine(engine) if self.batch else None
+
+    def explore(self, initial_state, targets=(), order='bfs', max_depth=None, max_states=None):
+        """
+        Args:
+            initial_state (dict): Estado inicial (las variables omitidas valen 0).
+            targets (list): Objetivos (ver parse_target).
+            order (str): 'bfs' (con profundidades y secuencias más cortas) o 'dfs'.
+            max_depth (int, opcional): Profundidad máxima del recorrido.
+            max_states (int, opcional): Estados máximos a visitar.
+
+        Returns:
+            dict: Estados y transiciones recorridos, diámetro (profundidad del
+            BFS desde el estado inicial), anchura de cada nivel, rango de cada
+            variable y, por objetivo, la profundidad y las entradas más cortas.
+        """
+        start = time.perf_counter()
+        initial = {var: 0 for var in self.state_vars}
+        initial.update(initial_state)
+        self._parents = {} if self.bloom_capacity is None else None
+        self._bloom = BloomFilter(self.bloom_capacity, self.bloom_error) if self.bloom_capacity else None
+        self._bounds = {var: [initial[var], initial[var]] for var in self.state_vars}
+        self._found = {}
+        self._targets = list(targets)
+        self._transitions = 0
+        self._undefined = 0
+
+        root = self.packer.pack(initial)
+        self._visit(root, None, None)
+        self._check_targets(root, initial, 0)
+        if order == 'bfs':
+            levels, complete = self._bfs(root, max_depth, max_states)
+            depth = len(levels) - 1
+        elif order == 'dfs':
+            levels, complete = None, self._dfs(root, max_depth, max_states)
+            depth = None
+        else:
+            raise ValueError(f"Orden de recorrido desconocido: '{order}'")
+
+        report = {
+            'order': order,
+            'visited_set': 'bloom' if self._bloom else 'exact',
+            'states': self._bloom.count if self._bloom else len(self._parents),
+            'transitions': self._transitions,
+            'undefined_transitions': self._undefined,
+            'complete': complete,
+            'diameter': depth,
+            'level_widths': levels,
+            'bounds': {var: tuple(bounds) for var, bounds in self._bounds.items()},
+            'key_bits': self.packer.width,
+            'visited_bytes': self._bloom.nbytes if self._bloom else sys.getsizeof(self._parents),
+            'seconds': round(time.perf_counter() - start, 3),
+            'targets': {},
+        }
+        for name, _ in self._targets:
+            if name not in self._found:
+                report['targets'][name] = None
+                continue
+            key, depth_found = self._found[name]
+            report['targets'][name] = {
+                'depth': depth_found,
+                'state': self.packer.unpack(key),
+                'inputs': self._input_sequence(key) if self._parents is not None else None,
+            }
+        return report
+
+    def _bfs(self, root, max_depth, max_states):
+        frontier = [root]
+        levels = [1]
+        while frontier:
+            if max_depth is not None and len(levels) > max_depth:
+                return levels, False
+            if self.batch:
+                frontier = self._expand_batch(frontier, len(levels), max_states)
+            else:
+                frontier = self._expand_scalar(frontier, len(levels), max_states)
+            if frontier is None:
+                return levels, False
+            if frontier:
+                levels.append(len(frontier))
+        return levels, True
+
+    def _dfs(self, root, max_depth, max_states):
+        stack = [(root, 0)]
+        complete = True
+        while stack:
+            key, depth = stack.pop()
+            if max_depth is not None and depth >= max_depth:
+                complete = False
+                continue
+            state = self.packer.unpack(key)
+            for j, symbol in enumerate(self.alphabet):
+                child_state = self._step(state, symbol)
+                if child_state is None:
+                    continue
+                child = self.packer.pack(child_state)
+                if self._visit(child, key, j):
+                    self._observe(child_state)
+                    self._check_targets(child, child_state, depth + 1)
+                    if max_states is not None and self._visited_count() >= max_states:
+                        return False
+                    stack.append((child, depth + 1))
+        return complete
+
+    def _expand_scalar(self, frontier, depth, max_states):
+        next_frontier = []
+        for key in frontier:
+            state = self.packer.unpack(key)
+            for j, symbol in enumerate(self.alphabet):
+                child_state = self._step(state, symbol)
+                if child_state is None:
+                    continue
+                child = self.packer.pack(child_state)
+                if self._visit(child, key, j):
+                    self._observe(child_state)
+                    self._check_targets(child, child_state, depth)
+                    next_frontier.append(child)
+                    if max_states is not None and self._visited_count() >= max_states:
+                        return None
+        return next_frontier
+
+    def _expand_batch(self, frontier, depth, max_states):
+        np = vectorized.np
+        rows = self.packer.unpack_rows(frontier)
+        states = {var: rows[:, i] for i, var in enumerate(self.state_vars)}
+        next_frontier = []
+        for j, symbol in enumerate(self.alphabet):
+            next_states, (div0, overflow) = self._vector_step.compute_batch_checked(
+                states, {name: np.int64(v) for name, v in symbol.items()})
+            self._transitions += len(frontier)
+            self._undefined += int(div0.sum())
+            if (overflow & ~div0).any():
+                raise ValueError(_OVERFLOW_MESSAGE)
+            defined = np.flatnonzero(~div0)
+            child_rows = np.stack([next_states[var] for var in self.state_vars], axis=1)[defined]
+            keys = self.packer.pack_rows(child_rows)
+            parents = [frontier[i] for i in defined.tolist()]
+            new_rows = []
+            for parent, child, row in zip(parents, keys, range(len(keys))):
+                if self._visit(child, parent, j):
+                    new_rows.append(row)
+                    next_frontier.append(child)
+                    if max_states is not None and self._visited_count() >= max_states:
+                        break
+            if new_rows:
+                new_states = child_rows[new_rows]
+                for i, var in enumerate(self.state_vars):
+                    bounds = self._bounds[var]
+                    bounds[0] = min(bounds[0], int(new_states[:, i].min()))
+                    bounds[1] = max(bounds[1], int(new_states[:, i].max()))
+                for name, conditions in self._targets:
+                    if name in self._found:
+                        continue
+                    mask = np.ones(len(new_rows), dtype=bool)
+                    for var, op, value in conditions:
+                        mask &= _COMPARISONS[op](new_states[:, self.state_vars.index(var)], value)
+                    if mask.any():
+                        self._found[name] = (keys[new_rows[int(mask.argmax())]], depth)
+            if max_states is not None and self._visited_count() >= max_states:
+                return None
+        return next_frontier
+
+    def _step(self, state, symbol):
+        """Estado siguiente con el motor, o None si la transición divide entre cero."""
+        self._transitions += 1
+        try:
+            return {**state, **self.engine.compute_next_state(state, symbol)}
+        except ZeroDivisionError:
+            self._undefined += 1
+            return None
+        except OverflowError:
+            # El motor nativo: el evaluador de referencia daría un valor que no cabe en la clave.
+            raise ValueError(_OVERFLOW_MESSAGE) from None
+
+    def _visit(self, key, parent, symbol):
+        """Marca el estado como visitado; devuelve True si es nuevo."""
+        if self._bloom is not None:
+            return self._bloom.add(key)
+        if key in self._parents:
+            return False
+        self._parents[key] = None if parent is None else (parent, symbol)
+        return True
+
+    def _visited_count(self):
+        return self._bloom.count if self._bloom is not None else len(self._parents)
+
+    def _observe(self, state):
+        for var in self.state_vars:
+            bounds = self._bounds[var]
+            bounds[0] = min(bounds[0], state[var])
+            bounds[1] = max(bounds[1], state[var])
+
+    def _check_targets(self, key, state, depth):
+        for name, conditions in self._targets:
+            if name not in self._found and all(_COMPARISONS[op](state.get(var, 0), value)
+                                               for var, op, value in conditions):
+                self._found[name] = (key, depth)
+
+    def _input_sequence(self, key):
+        sequence = []
+        while self._parents[key] is not None:
+            key, symbol = self._parents[key]
+            sequence.append(self.alphabet[symbol])
+        return sequence[::-1]
+
+
+def main():
+    """Punto de entrada: python -m interpreter.explorer <archivo>_interpreter_input.txt --input kbhit=0,1 ..."""
+    from interpreter.interpreter import EquationEngine
+    cli_parser = argparse.ArgumentParser(description="Explora los estados alcanzables de un programa compilado.")
+    cli_parser.add_argument("input_file", help="Archivo *_interpreter_input.txt generado por el compilador.")
+    cli_parser.add_argument("--state", default="{}", help="Estado inicial en JSON (las variables omitidas valen 0).")
+    cli_parser.add_argument("--input", action="append", default=[], type=parse_input_values,
+                            help="Valores de una entrada, p. ej. 'getch=0,w,s,i,k' o 'kbhit=0,1'.")
+    cli_parser.add_argument("--target", action="append", default=[], type=parse_target,
+                            help="Estado objetivo, p. ej. 'f>=1' o 'b==40,c==12' (se puede repetir).")
+    cli_parser.add_argument("--order", choices=["bfs", "dfs"], default="bfs", help="Orden del recorrido (por defecto: bfs). En DFS las profundidades no son mínimas y, "
+                                 "con --max-depth, puede quedar sin visitar algún estado alcanzable.")
+    cli_parser.add_argument("--max-depth", type=int, help="Profundidad máxima.")
+    cli_parser.add_argument("--max-states", type=int, help="Estados máximos a visitar.")
+    cli_parser.add_argument("--bits", type=int, default=DEFAULT_FIELD_BITS,
+                            help=f"Bits por variable en la clave de cada estado (por defecto: {DEFAULT_FIELD_BITS}).")
+    cli_parser.add_argument("--bloom", type=int, metavar="CAPACIDAD",
+                            help="Usa un filtro de Bloom dimensionado para esa cantidad de estados.")
+    cli_parser.add_argument("--bloom-error", type=float, default=DEFAULT_BLOOM_ERROR,
+                            help=f"Tasa de falsos positivos del filtro (por defecto: {DEFAULT_BLOOM_ERROR}).")
+    cli_parser.add_argument("--no-batch", action="store_true", help="Expande estado a estado, sin NumPy.")
+    cli_parser.add_argument("--backend", choices=["python", "native"], default="python",
+                            help="Motor para la expansión estado a estado (DFS o --no-batch).")
+    cli_parser.add_argument("--output", help="Ruta del JSON con el informe.")
+    args = cli_parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = EquationEngine(args.input_file, backend=args.backend)
+    value_sets = dict(args.input)
+    for name in engine.get_input_variables():
+        if name not in value_sets:
+            print(f"  - AVISO: La entrada '{name}' no tiene alfabeto; se fija a 0.", file=sys.stderr)
+            value_sets[name] = [0]
+    explorer = StateSpaceExplorer(engine, input_alphabet(value_sets), args.bits, args.bloom, args.bloom_error,
+                                  batch=not args.no_batch)
+    try:
+        report = explorer.explore(json.loads(args.state), args.target, args.order, args.max_depth, args.max_states)
+    except ValueError as e:
+        print(f"--- ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    approx = " (aprox.)" if report['visited_set'] == 'bloom' else ""
+    print(f"--- [Explorador] {report['states']:,} estados{approx}, {report['transitions']:,} transiciones, "
+          f"{report['seconds']} s{'' if report['complete'] else ' (recorrido truncado)'} ---")
+    if report['undefined_transitions']:
+        print(f"  - AVISO: {report['undefined_transitions']:,} transiciones dividen entre cero (indefinidas).",
+              file=sys.stderr)
+    if report['diameter'] is not None:
+        print(f"  Diámetro (profundidad del BFS): {report['diameter']}")
+    print("  Rangos: " + ", ".join(f"{var}={low}:{high}" for var, (low, high) in report['bounds'].items()))
+    for name, found in report['targets'].items():
+        if found is None:
+            print(f"  Objetivo '{name}': no alcanzado")
+        elif found['inputs'] is None:
+            print(f"  Objetivo '{name}': profundidad {found['depth']}")
+        else:
+            print(f"  Objetivo '{name}': profundidad {found['depth']}, entradas: {json.dumps(found['inputs'])}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"--- [Explorador] Informe guardado en: {args.output} ---")
+
+if __name__ == "__main__":
+    main()
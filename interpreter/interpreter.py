@@ -1,5 +1,7 @@
+import os
 import sys
 import re
+import time
 
 class EquationEngine:
     """
@@ -7,19 +9,294 @@ class EquationEngine:
     para el ordenamiento topológico.
     """
 
-    def __init__(self, filepath):
-        # ... (código sin cambios)
+    def __init__(self, filepath, profile=False, backend='python', specialize=None):
+        """
+        Args:
+            filepath (str): Archivo *_interpreter_input.txt generado por el compilador.
+            profile (bool): Activa el perfil por ecuación (ver enable_profiling);
+                solo con el motor 'python' y sin variantes especializadas.
+            backend (str): 'python' (evaluador de referencia), 'native' (la
+                función de transición compilada a C y cargada con ctypes; si
+                no hay compilador de C, se usa el evaluador de Python),
+                'levels' (evaluación por niveles vectorizada con NumPy) o
+                'threads' (niveles anchos repartidos entre hilos); ver
+                enable_level_schedule.
+            specialize (list, opcional): Valores frecuentes de las entradas,
+                p. ej. [{'kbhit': 0}], para los que se genera una variante
+                especializada (ver add_specialization).
+        """
+        self._reset()
+        self._load_and_parse(filepath)
+        self._build_execution_plan()
+        self._configure(profile, backend, specialize)
+
+    @classmethod
+    def from_ir(cls, optimized_f, sub_defs, state_vars, input_vars=None, profile=False, backend='python',
+                specialize=None):
+        """
+        Construye el motor directamente a partir de la salida del optimizador,
+        sin escribir ni volver a leer el *_interpreter_input.txt. Las
+        ecuaciones son las mismas que las del fichero (incluida la
+        aritmetización de if, && y ||) y el plan de ejecución se calcula con
+        las dependencias de los árboles de tuplas.
+
+        Args:
+            optimized_f (dict): F optimizada ({variable: árbol de tuplas}).
+            sub_defs (dict): Definiciones C_n de la CSE.
+            state_vars (list): Variables de estado.
+            input_vars (iterable, opcional): Entradas del programa (generador);
+                sin ellas, se deducen de las ecuaciones.
+            profile, backend, specialize: Como en el constructor.
+        """
+        from compiler.equation_exporter import EquationExporter
+        from compiler.slicing import variables_in
+        engine = cls.__new__(cls)
+        engine._reset()
+        print("[Engine] Cargando ecuaciones desde la representación intermedia del compilador...")
+        exporter = EquationExporter({}, optimized_f, sub_defs, state_vars)
+        dependencies = {}
+        for lhs, expr_tuple, expr_str in exporter.interpreter_equations():
+            engine.equations[lhs] = expr_str
+            dependencies[lhs] = {name.replace("{", "").replace("}", "") for name in variables_in(expr_tuple)}
+            if lhs.endswith('[t+1]'):
+                engine.state_vars.add(lhs.split('[')[0])
+        if input_vars is not None:
+            engine.input_vars = sorted(input_vars)
+        print(f"[Engine] ...{len(engine.equations)} ecuaciones cargadas.")
+        engine._build_execution_plan(dependencies)
+        engine._configure(profile, backend, specialize)
+        return engine
+
+    def _reset(self):
         self.equations = {}
         self.execution_plan = []
         self.state_vars = set()
-        self._load_and_parse(filepath)
-        self._build_execution_plan()
+        self.input_vars = None
+        self.equation_stats = None
+        self.backend = 'python'
+        self.native = None
+        self.level_evaluator = None
+        self.variants = []
+
+    def _configure(self, profile, backend, specialize):
+        if backend == 'native':
+            self.enable_native()
+        elif backend in ('levels', 'threads'):
+            self.enable_level_schedule('vectorized' if backend == 'levels' else 'threads')
+        elif backend != 'python':
+            raise ValueError(f"Motor de evaluación desconocido: '{backend}'")
+        for known in specialize or []:
+            self.add_specialization(known)
+        if profile:
+            self.enable_profiling()
         print("[Engine] Motor de ecuaciones inicializado y listo.")
 
     def get_state_variables(self):
         # ... (código sin cambios)
         return list(self.state_vars)
 
+    def get_input_variables(self):
+        """Entradas del programa: variables usadas en las ecuaciones que no son ni ecuaciones ni estado."""
+        if self.input_vars is not None:
+            return list(self.input_vars)
+        used = set()
+        for expr in self.equations.values():
+            used.update(re.findall(r'[A-Za-z_]\w*(?=\s*[,)]|$)', expr))
+        return sorted(used - set(self.equations) - self.state_vars)
+
+    def get_expressions(self):
+        """Las ecuaciones como árboles de tuplas (ver parse_expression), en el orden del plan."""
+        return {var: parse_expression(self.equations[var]) for var in self.execution_plan}
+
+    # --- MOTOR NATIVO ---
+
+    def enable_native(self):
+        """
+        Compila la función de transición a C (interpreter.native) y hace que
+        compute_next_state y step_n usen la biblioteca cargada con ctypes.
+
+        Returns:
+            bool: False si no hay compilador de C (se sigue usando Python).
+
+        Raises:
+            ValueError: Si el perfil por ecuación está activado.
+        """
+        self._check_not_profiled("el motor nativo")
+        from interpreter import native
+        emitter = native.CSourceEmitter(self.get_expressions(), self.execution_plan,
+                                        sorted(self.state_vars), self.get_input_variables())
+        self.native = native.NativeStep.build(emitter)
+        if self.native is None:
+            return False
+        self.backend = 'native'
+        self.compute_next_state = self.native.compute_next_state
+        print(f"[Engine] Motor nativo cargado: {self.native.library_path}")
+        return True
+
+    def step_n(self, current_state, input_trace):
+        """
+        Aplica un paso por cada diccionario de `input_trace` y devuelve el
+        estado final. Con el motor nativo es una única llamada a C.
+        """
+        if self.native is not None and self.backend == 'native':
+            return self.native.step_n(current_state, input_trace)
+        state = dict(current_state)
+        for inputs in input_trace:
+            state.update(self.compute_next_state(state, inputs))
+        return {var: state[var] for var in self.state_vars if var in state}
+
+    # --- PLANIFICACIÓN POR NIVELES ---
+
+    def get_levels(self):
+        """El plan agrupado en niveles de ecuaciones independientes entre sí (interpreter.scheduling)."""
+        from interpreter.scheduling import build_levels
+        return build_levels(self.get_expressions(), self.execution_plan)
+
+    def get_schedule_stats(self):
+        """
+        Returns:
+            dict: Niveles, anchura de cada nivel y longitud del camino crítico
+            (en ecuaciones y en nodos); ver scheduling.schedule_stats.
+        """
+        from interpreter.scheduling import build_levels, schedule_stats
+        expressions = self.get_expressions()
+        return schedule_stats(expressions, build_levels(expressions, self.execution_plan))
+
+    def enable_level_schedule(self, mode='vectorized', workers=None):
+        """
+        Evalúa cada nivel del plan de una vez en lugar de ecuación a ecuación.
+
+        Args:
+            mode (str): 'vectorized' (una operación de NumPy por operador y
+                nivel) o 'threads' (los niveles anchos se reparten entre hilos).
+            workers (int, opcional): Hilos del modo 'threads' (por defecto, uno
+                por CPU).
+
+        Raises:
+            ValueError: Si el modo es desconocido o el perfil está activado.
+        """
+        self._check_not_profiled("la planificación por niveles")
+        from interpreter import scheduling
+        self.close()
+        if mode == 'vectorized':
+            self.level_evaluator = scheduling.LevelEvaluator(
+                self.get_expressions(), self.execution_plan, sorted(self.state_vars), self.get_input_variables())
+            self.backend = 'levels'
+        elif mode == 'threads':
+            self.level_evaluator = scheduling.ThreadedLevelEvaluator(self, self.get_levels(), workers)
+            self.backend = 'threads'
+        else:
+            raise ValueError(f"Modo de planificación desconocido: '{mode}'")
+        self.compute_next_state = self.level_evaluator.compute_next_state
+        stats = self.get_schedule_stats()
+        print(f"[Engine] Plan por niveles ({mode}): {stats['equations']} ecuaciones en {stats['levels']} niveles "
+              f"(anchura máxima {stats['max_width']}, camino crítico de {stats['critical_path_nodes']} "
+              f"de {stats['total_nodes']} nodos).")
+
+    def close(self):
+        """
+        Libera los recursos del motor (el pool de hilos del modo 'threads').
+        También se puede usar como gestor de contexto:
+
+            with EquationEngine(ruta, backend='threads') as engine: ...
+        """
+        close = getattr(self.level_evaluator, 'close', None)
+        if close is not None:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # --- VARIANTES ESPECIALIZADAS ---
+
+    def add_specialization(self, known):
+        """
+        Evalúa parcialmente F para unos valores fijos de las entradas (p. ej.
+        kbhit = 0, el caso de casi todos los ticks de Pong) y añade la variante
+        resultante, con un plan más corto. compute_next_state la usa cuando
+        las entradas del tick coinciden con esos valores; en otro caso se
+        evalúa el plan completo.
+
+        Args:
+            known (dict): {entrada: valor}.
+
+        Returns:
+            dict: Tamaño del plan antes y después de especializar.
+
+        Raises:
+            ValueError: Si `known` incluye algo que no es una entrada o el
+                perfil está activado.
+        """
+        self._check_not_profiled("las variantes especializadas")
+        from interpreter.partial_eval import partial_evaluate, tree_size, format_expression
+        unknown = set(known) - set(self.get_input_variables())
+        if unknown:
+            raise ValueError(f"No son entradas del programa: {', '.join(sorted(unknown))}")
+        expressions = self.get_expressions()
+        outputs = {var for var in expressions if var.endswith('[t+1]')}
+        plan, reduced = partial_evaluate(expressions, self.execution_plan, known, outputs)
+        variant = {
+            'name': ",".join(f"{k}={v}" for k, v in known.items()),
+            'inputs': dict(known),
+            'execution_plan': plan,
+            'equations': {var: format_expression(reduced[var]) for var in plan},
+            'equations_before': len(self.execution_plan),
+            'equations_after': len(plan),
+            'nodes_before': sum(tree_size(expr) for expr in expressions.values()),
+            'nodes_after': sum(tree_size(expr) for expr in reduced.values()),
+            'hits': 0,
+        }
+        step = None
+        if self.backend == 'native':
+            from interpreter import native
+            emitter = native.CSourceEmitter(reduced, plan, sorted(self.state_vars), self.get_input_variables())
+            compiled = native.NativeStep.build(emitter)
+            step = compiled.compute_next_state if compiled is not None else None
+        if step is None:
+            step = lambda current_state, inputs: self._compute_with_plan(
+                variant['execution_plan'], variant['equations'], current_state, inputs)
+        variant['step'] = step
+
+        if not self.variants:
+            self._compute_next_state_general = self.compute_next_state
+            self._general_calls = 0
+            self.compute_next_state = self._compute_next_state_dispatch
+        self.variants.append(variant)
+        reduction = 100 * (1 - variant['nodes_after'] / variant['nodes_before']) if variant['nodes_before'] else 0.0
+        print(f"[Engine] Variante {variant['name']}: {variant['equations_before']} -> {variant['equations_after']} "
+              f"ecuaciones, {variant['nodes_before']} -> {variant['nodes_after']} nodos (-{reduction:.1f}%)")
+        return {key: variant[key] for key in ('name', 'equations_before', 'equations_after', 'nodes_before', 'nodes_after')}
+
+    def get_cache_stats(self):
+        """
+        Uso de cada variante: {'specialize:<entradas>': (ticks que la usan,
+        ticks que no)}. Se publica con las métricas del bucle (interpreter.metrics).
+        """
+        total = sum(variant['hits'] for variant in self.variants) + getattr(self, '_general_calls', 0)
+        return {f"specialize:{variant['name']}": (variant['hits'], total - variant['hits']) for variant in self.variants}
+
+    def _compute_next_state_dispatch(self, current_state, inputs):
+        """compute_next_state con variantes especializadas (ver add_specialization)."""
+        for variant in self.variants:
+            if all(inputs.get(name) == value for name, value in variant['inputs'].items()):
+                variant['hits'] += 1
+                return variant['step'](current_state, inputs)
+        self._general_calls += 1
+        return self._compute_next_state_general(current_state, inputs)
+
+    def _compute_with_plan(self, execution_plan, equations, current_state, inputs):
+        context = {**current_state, **inputs}
+        for var_to_compute in execution_plan:
+            context[var_to_compute] = self._eval_expression(equations[var_to_compute], context)
+        next_state = {}
+        for var in self.state_vars:
+            key_t1 = f"{var}[t+1]"
+            if key_t1 in context: next_state[var] = int(context[key_t1])
+        return next_state
+
     def _load_and_parse(self, filepath):
         # ... (código sin cambios)
         print(f"[Engine] Cargando y analizando {filepath}...")
@@ -36,7 +313,12 @@ class EquationEngine:
             sys.exit(1)
 
     # --- LÓGICA DE ORDENAMIENTO FINAL, DEFINITIVA Y CORRECTA ---
-    def _build_execution_plan(self):
+    def _build_execution_plan(self, dependencies=None):
+        """
+        Args:
+            dependencies (dict, opcional): {ecuación: nombres que usa}, si ya se
+                conocen (from_ir); si no, se extraen de las cadenas.
+        """
         print("[Engine] Construyendo plan de ejecución (Algoritmo de Kahn)...")
         
         # 1. Construir el grafo de adyacencia (qué nodos apuntan a qué otros)
@@ -46,9 +328,12 @@ class EquationEngine:
         
         all_possible_nodes = set(self.equations.keys())
         for var, expr in self.equations.items():
-            deps = set(re.findall(r'\b[a-zA-Z0-9_\[\]\+]+?\b', expr))
-            # Quitar las dependencias que son números
-            deps = {dep for dep in deps if not dep.isdigit()}
+            if dependencies is not None:
+                deps = dependencies[var]
+            else:
+                deps = set(re.findall(r'\b[a-zA-Z0-9_\[\]\+]+?\b', expr))
+                # Quitar las dependencias que son números
+                deps = {dep for dep in deps if not dep.isdigit()}
             
             # El grado de entrada de 'var' es el número de dependencias que son OTRAS ecuaciones.
             in_degree[var] = len(deps.intersection(all_possible_nodes))
@@ -142,6 +427,90 @@ class EquationEngine:
                 raise
         raise ValueError(f"Operador desconocido: {op}")
 
+    # --- PERFIL POR ECUACIÓN ---
+
+    def enable_profiling(self):
+        """
+        Activa el perfil por ecuación: cuántas veces se evalúa cada C_n o
+        x[t+1], el tiempo total que consume y su número de nodos.
+
+        La instrumentación vive en un método aparte que sustituye a
+        compute_next_state solo en esta instancia, de modo que sin perfil el
+        bucle de evaluación no paga ningún coste. Por eso el perfil mide el
+        evaluador de referencia y no se combina con otros motores ni con
+        variantes especializadas: se ignorarían sin avisar.
+
+        Raises:
+            ValueError: Si el motor no es 'python' o hay variantes especializadas.
+        """
+        if self.backend != 'python' or self.variants:
+            active = self.backend if self.backend != 'python' else "variantes especializadas"
+            raise ValueError(f"El perfil por ecuación solo mide el motor 'python' sin especializar (activo: {active})")
+        self.equation_stats = {
+            var: {'evaluations': 0, 'total_ns': 0, 'nodes': _count_nodes(self.equations[var])}
+            for var in self.execution_plan
+        }
+        self.compute_next_state = self._compute_next_state_profiled
+
+    def _check_not_profiled(self, feature):
+        if self.equation_stats is not None:
+            raise ValueError(f"El perfil por ecuación no se puede combinar con {feature}")
+
+    def profile_report(self, top=None):
+        """
+        Informe ordenado por tiempo total (las ecuaciones más costosas primero).
+
+        Args:
+            top (int, opcional): Número máximo de filas.
+
+        Returns:
+            str: Tabla de texto.
+        """
+        if self.equation_stats is None:
+            raise RuntimeError("El perfil por ecuación no está activado (enable_profiling).")
+        rows = sorted(self.equation_stats.items(), key=lambda item: item[1]['total_ns'], reverse=True)
+        total_ns = sum(stats['total_ns'] for _, stats in rows) or 1
+        lines = [f"{'Ecuación':<14} {'Evaluaciones':>12} {'Total (ms)':>11} {'Media (µs)':>11} {'Nodos':>7} {'%':>6}"]
+        for var, stats in rows[:top]:
+            mean_us = stats['total_ns'] / stats['evaluations'] / 1000 if stats['evaluations'] else 0.0
+            lines.append(f"{var:<14} {stats['evaluations']:>12} {stats['total_ns'] / 1e6:>11.3f} {mean_us:>11.2f} "
+                         f"{stats['nodes']:>7} {100 * stats['total_ns'] / total_ns:>6.2f}")
+        return "\n".join(lines)
+
+    def write_profile(self, report_path, folded_path=None):
+        """
+        Escribe el informe de texto y, opcionalmente, las pilas plegadas
+        ("folded stacks") para flamegraph.pl o speedscope. Cada pila es
+        'compute_next_state;<sección>;<ecuación>' con su tiempo en microsegundos;
+        los nombres C_n son los mismos que en el informe LaTeX.
+        """
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(self.profile_report() + "\n")
+        if folded_path:
+            with open(folded_path, 'w', encoding='utf-8') as f:
+                for var, stats in self.equation_stats.items():
+                    section = 'state' if var.endswith('[t+1]') else 'C_n'
+                    f.write(f"compute_next_state;{section};{var} {stats['total_ns'] // 1000}\n")
+
+    def _compute_next_state_profiled(self, current_state, inputs):
+        """compute_next_state con medición por ecuación (ver enable_profiling)."""
+        context = {**current_state, **inputs}
+        stats = self.equation_stats
+        clock = time.perf_counter_ns
+        for var_to_compute in self.execution_plan:
+            expression = self.equations[var_to_compute]
+            start = clock()
+            value = self._eval_expression(expression, context)
+            entry = stats[var_to_compute]
+            entry['total_ns'] += clock() - start
+            entry['evaluations'] += 1
+            context[var_to_compute] = value
+        next_state = {}
+        for var in self.state_vars:
+            key_t1 = f"{var}[t+1]"
+            if key_t1 in context: next_state[var] = int(context[key_t1])
+        return next_state
+
     def compute_next_state(self, current_state, inputs):
         # ... (código sin cambios)
         context = {**current_state, **inputs}
@@ -153,4 +522,58 @@ class EquationEngine:
         for var in self.state_vars:
             key_t1 = f"{var}[t+1]"
             if key_t1 in context: next_state[var] = int(context[key_t1])
-        return next_state
\ No newline at end of file
+        return next_state
+
+
+def compile_and_load(path_or_source, index=None, **engine_options):
+    """
+    Compila un programa C y devuelve su motor de ecuaciones sin pasar por
+    ficheros: solo se ejecutan las fases que necesita el intérprete (análisis,
+    generación y optimización); no hay conversión a polinomios ni informe.
+
+    Args:
+        path_or_source (str): Ruta de un .c o el propio código C (se considera
+            código si contiene saltos de línea o llaves).
+        index (clang.cindex.Index, opcional): Índice de libclang a reutilizar
+            entre muchas compilaciones.
+        **engine_options: profile, backend y specialize (ver EquationEngine).
+
+    Returns:
+        EquationEngine
+
+    Raises:
+        FileNotFoundError: Si `path_or_source` es una ruta que no existe.
+    """
+    from compiler import compile_program
+    return compile_program(path_or_source, index=index).engine(**engine_options)
+
+def _count_nodes(expr_str):
+    """Nodos de una expresión: operadores más operandos (variables y constantes)."""
+    return len(re.findall(r'[a-zA-Z_&|=!<>+*/-]+\(|[A-Za-z0-9_]+(?:\[t\+1\])?', expr_str))
+
+def parse_expression(expr_str):
+    """
+    Convierte una expresión del formato del intérprete ('+(a, *(b, 2))') en el
+    árbol de tuplas del compilador (('+', 'a', ('*', 'b', 2))). Las hojas son
+    nombres de variable (str) o constantes (int).
+    """
+    expr_str = expr_str.strip()
+    if '(' not in expr_str:
+        try: return int(expr_str)
+        except ValueError: return expr_str
+    match = re.match(r'([a-zA-Z_&|=!<>+*/-]+)\((.*)\)$', expr_str, re.DOTALL)
+    if not match: raise SyntaxError(f"Formato de expresión no válido: {expr_str}")
+    op, args_str = match.groups()
+    args = []
+    balance = 0
+    start = 0
+    for i, char in enumerate(args_str):
+        if char == '(':
+            balance += 1
+        elif char == ')':
+            balance -= 1
+        elif char == ',' and balance == 0:
+            args.append(args_str[start:i])
+            start = i + 1
+    args.append(args_str[start:])
+    return (op,) + tuple(parse_expression(arg) for arg in args if arg.strip())
@@ -0,0 +1,170 @@
+import bisect
+import json
+import os
+import tempfile
+import time
+
+# Límites superiores (en segundos) de los cubos del histograma de latencia por tick.
+LATENCY_BUCKETS = [0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5]
+DEFAULT_INTERVAL = 10.0
+# Permisos del fichero publicado: node_exporter suele correr con otro usuario.
+TEXTFILE_MODE = 0o644
+
+class RunLoopMetrics:
+    """
+    Métricas de un bucle de simulación de larga duración.
+
+    El bucle llama a `record_tick()` tras cada paso. El coste por tick es una
+    búsqueda en el histograma y una comparación por variable de estado; cada
+    `interval` segundos se calcula una instantánea y se envía a los sumideros
+    (fichero de texto para Prometheus o JSON Lines).
+
+    Si el motor expone `get_cache_stats()` (-> {nombre: (aciertos, fallos)}),
+    sus tasas de acierto también se publican.
+    """
+    def __init__(self, state_vars, sinks, interval=DEFAULT_INTERVAL, engine=None):
+        """
+        Args:
+            state_vars (list): Variables de estado del programa.
+            sinks (list): Sumideros con un método write(snapshot).
+            interval (float): Segundos entre publicaciones.
+            engine (opcional): Motor cuyas estadísticas de caché se publican.
+        """
+        self.state_vars = sorted(state_vars)
+        self.sinks = sinks
+        self.interval = interval
+        self.engine = engine
+        self.started = time.time()
+        self.ticks = 0
+        self.latency_sum = 0.0
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.changes = {var: 0 for var in self.state_vars}
+        self._window_start = time.perf_counter()
+        self._window_ticks = 0
+        self._window_changes = dict(self.changes)
+
+    def record_tick(self, seconds, previous_state, next_state):
+        """Registra un paso: su duración y qué variables de estado han cambiado."""
+        self.ticks += 1
+        self.latency_sum += seconds
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        for var, value in next_state.items():
+            if previous_state.get(var) != value:
+                self.changes[var] = self.changes.get(var, 0) + 1
+        if time.perf_counter() - self._window_start >= self.interval:
+            self.flush()
+
+    def flush(self):
+        """Publica una instantánea en todos los sumideros y abre una nueva ventana."""
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink.write(snapshot)
+        self._window_start = time.perf_counter()
+        self._window_ticks = self.ticks
+        self._window_changes = dict(self.changes)
+        return snapshot
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Totales desde el inicio y tasas de la ventana actual.
+        """
+        window_seconds = max(time.perf_counter() - self._window_start, 1e-9)
+        window_ticks = self.ticks - self._window_ticks
+        cumulative = []
+        running = 0
+        for count in self.bucket_counts:
+            running += count
+            cumulative.append(running)
+        snapshot = {
+            'timestamp': round(time.time(), 3),
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'ticks_total': self.ticks,
+            'ticks_per_second': round(window_ticks / window_seconds, 2),
+            'latency_seconds_sum': self.latency_sum,
+            'latency_buckets': {str(le): n for le, n in zip(LATENCY_BUCKETS + ['+Inf'], cumulative)},
+            'state_changes_total': dict(self.changes),
+            'state_change_rate': {
+                var: round((self.changes[var] - self._window_changes.get(var, 0)) / window_ticks, 4) if window_ticks else 0.0
+                for var in self.changes
+            },
+        }
+        if self.engine is not None and hasattr(self.engine, 'get_cache_stats'):
+            snapshot['cache_hit_rate'] = {
+                name: round(hits / (hits + misses), 4) if hits + misses else 0.0
+                for name, (hits, misses) in self.engine.get_cache_stats().items()
+            }
+        return snapshot
+
+
+class PrometheusTextfileSink:
+    """
+    Escribe las métricas en el formato de texto de Prometheus, para el
+    'textfile collector' de node_exporter. El fichero se reemplaza de forma
+    atómica en cada publicación.
+    """
+    def __init__(self, path, program=None):
+        self.path = path
+        self.program = program
+        self.labels = self._labels()
+
+    def write(self, snapshot):
+        lines = [
+            "# HELP diophantus_ticks_total Pasos de simulación ejecutados.",
+            "# TYPE diophantus_ticks_total counter",
+            f"diophantus_ticks_total{self.labels} {snapshot['ticks_total']}",
+            "# HELP diophantus_ticks_per_second Pasos por segundo en la última ventana.",
+            "# TYPE diophantus_ticks_per_second gauge",
+            f"diophantus_ticks_per_second{self.labels} {snapshot['ticks_per_second']}",
+            "# HELP diophantus_tick_latency_seconds Duración de cada paso.",
+            "# TYPE diophantus_tick_latency_seconds histogram",
+        ]
+        for le, count in snapshot['latency_buckets'].items():
+            lines.append(f"diophantus_tick_latency_seconds_bucket{self._labels(le=le)} {count}")
+        lines.append(f"diophantus_tick_latency_seconds_sum{self.labels} {snapshot['latency_seconds_sum']}")
+        lines.append(f"diophantus_tick_latency_seconds_count{self.labels} {snapshot['ticks_total']}")
+        lines.append("# HELP diophantus_state_changes_total Pasos en los que cambió cada variable de estado.")
+        lines.append("# TYPE diophantus_state_changes_total counter")
+        for var, count in snapshot['state_changes_total'].items():
+            lines.append(f"diophantus_state_changes_total{self._labels(var=var)} {count}")
+        lines.append("# HELP diophantus_state_change_rate Fracción de pasos de la última ventana en los que cambió la variable.")
+        lines.append("# TYPE diophantus_state_change_rate gauge")
+        for var, rate in snapshot['state_change_rate'].items():
+            lines.append(f"diophantus_state_change_rate{self._labels(var=var)} {rate}")
+        if 'cache_hit_rate' in snapshot:
+            lines.append("# HELP diophantus_cache_hit_rate Tasa de aciertos de las cachés del motor.")
+            lines.append("# TYPE diophantus_cache_hit_rate gauge")
+            for name, rate in snapshot['cache_hit_rate'].items():
+                lines.append(f"diophantus_cache_hit_rate{self._labels(cache=name)} {rate}")
+        _write_atomic(self.path, "\n".join(lines) + "\n")
+
+    def _labels(self, **extra):
+        labels = {'program': self.program, **extra} if self.program else extra
+        return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + "}" if labels else ""
+
+
+def _escape_label(value):
+    """Escapa barras invertidas, comillas y saltos de línea en un valor de etiqueta de Prometheus."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class JsonLinesSink:
+    """Añade cada instantánea como una línea JSON a un fichero local."""
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, snapshot):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+
+
+def _write_atomic(path, content):
+    # El intérprete no depende del paquete del compilador: copia mínima de
+    # compiler.cache.write_atomic.
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+    # mkstemp crea el fichero con permisos 0600.
+    os.chmod(tmp_path, TEXTFILE_MODE)
+    os.replace(tmp_path, path)
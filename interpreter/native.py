@@ -0,0 +1,383 @@
+import ctypes
+import hashlib
+import os
+import random
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+
+# Directorio donde se guardan las bibliotecas compiladas, indexadas por el hash
+# de su código fuente: cargar dos veces el mismo programa no recompila. Es
+# propio de cada usuario (modo 0700): una biblioteca de la caché se carga en el
+# proceso, así que nadie más debe poder escribir en ella.
+NATIVE_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                                "diophantus", "native")
+CC_FLAGS = ["-O2", "-shared", "-fPIC"]
+
+_BINARY_OPS = {
+    '==': '==', '!=': '!=', '>': '>', '<': '<', '>=': '>=', '<=': '<=',
+}
+# Operaciones con comprobación de desbordamiento (funciones del preludio).
+_CHECKED_OPS = {'+': 'dio_add', '-': 'dio_sub', '*': 'dio_mul', '/': 'dio_floordiv'}
+
+# Códigos de error del tick (parámetro de salida 'error' de step y step_n).
+DIO_OK = 0
+DIO_DIV_BY_ZERO = 1
+DIO_OVERFLOW = 2
+
+_C_PRELUDE = """\
+#include <stdint.h>
+
+/* Cada operación que puede fallar anota en *err el primer error del tick
+   (1: división entre 0, 2: desbordamiento de int64). El tick se descarta sin
+   tocar el estado y step/step_n lo comunican (ZeroDivisionError u
+   OverflowError en Python). El indicador es un parámetro de cada llamada, así
+   que dos hilos pueden ejecutar pasos a la vez. */
+#define DIO_FAIL(err, code) do { if (!*(err)) *(err) = (code); } while (0)
+
+static inline int64_t dio_add(int64_t *err, int64_t a, int64_t b) {
+    int64_t r;
+    if (__builtin_add_overflow(a, b, &r)) { DIO_FAIL(err, 2); return 0; }
+    return r;
+}
+static inline int64_t dio_sub(int64_t *err, int64_t a, int64_t b) {
+    int64_t r;
+    if (__builtin_sub_overflow(a, b, &r)) { DIO_FAIL(err, 2); return 0; }
+    return r;
+}
+static inline int64_t dio_mul(int64_t *err, int64_t a, int64_t b) {
+    int64_t r;
+    if (__builtin_mul_overflow(a, b, &r)) { DIO_FAIL(err, 2); return 0; }
+    return r;
+}
+static inline int64_t dio_neg(int64_t *err, int64_t a) { return dio_sub(err, 0, a); }
+
+/* División entera con redondeo hacia -infinito, como '//' en Python. */
+static inline int64_t dio_floordiv(int64_t *err, int64_t a, int64_t b) {
+    if (b == 0) { DIO_FAIL(err, 1); return 0; }
+    if (b == -1) return dio_neg(err, a);  /* INT64_MIN / -1 no cabe en int64 */
+    int64_t q = a / b;
+    if ((a % b != 0) && ((a < 0) != (b < 0))) q -= 1;
+    return q;
+}
+
+/* if, && y || como funciones: se evalúan todos los operandos, igual que en el
+   evaluador de Python (una división entre 0 en la rama no elegida también
+   cuenta). */
+static inline int64_t dio_if(int64_t c, int64_t a, int64_t b) { return c ? a : b; }
+static inline int64_t dio_and(int64_t a, int64_t b) { return (a != 0) & (b != 0); }
+static inline int64_t dio_or(int64_t a, int64_t b) { return (a != 0) | (b != 0); }
+"""
+
+class CSourceEmitter:
+    """
+    Traduce las ecuaciones del motor (árboles de tuplas, ver
+    interpreter.parse_expression) a un fichero C con dos funciones:
+
+        int64_t step(int64_t *state, const int64_t *inputs, int64_t *error);
+        int64_t step_n(int64_t *state, const int64_t *inputs, int64_t n, int64_t *error);
+
+    `state` y `inputs` son vectores en el orden de `state_vars` e
+    `input_vars`; `step_n` aplica n pasos consumiendo n vectores de entrada
+    consecutivos. Los C_n se calculan como variables locales en el orden del
+    plan de ejecución. Ambas devuelven los pasos completados: un tick con una
+    división entre 0 o un desbordamiento de int64 no modifica el estado,
+    detiene la ejecución y deja su código (DIO_DIV_BY_ZERO, DIO_OVERFLOW) en
+    `*error`.
+    """
+    def __init__(self, expressions, execution_plan, state_vars, input_vars):
+        """
+        Args:
+            expressions (dict): {nombre de ecuación: árbol de tuplas}.
+            execution_plan (list): Orden topológico de las ecuaciones.
+            state_vars (list): Variables de estado, en el orden del vector.
+            input_vars (list): Variables de entrada, en el orden del vector.
+        """
+        self.expressions = expressions
+        self.execution_plan = execution_plan
+        self.state_vars = list(state_vars)
+        self.input_vars = list(input_vars)
+
+    def emit(self):
+        """
+        Returns:
+            str: Código fuente C.
+        """
+        lines = [_C_PRELUDE]
+        # El cuerpo es estático para que step_n no enlace con otro 'step'
+        # exportado por el proceso (glibc tiene uno, de <regexp.h>).
+        lines.append("static inline void dio_step(int64_t *state, const int64_t *inputs, int64_t *err) {")
+        for i, var in enumerate(self.state_vars):
+            lines.append(f"    const int64_t {_c_name(var)} = state[{i}];")
+        for i, var in enumerate(self.input_vars):
+            lines.append(f"    const int64_t {_c_name(var)} = inputs[{i}];")
+        for name in self.execution_plan:
+            lines.append(f"    const int64_t {_c_name(name)} = {self._expr(self.expressions[name])};")
+        lines.append("    if (*err) return;")
+        for i, var in enumerate(self.state_vars):
+            if f"{var}[t+1]" in self.expressions:
+                lines.append(f"    state[{i}] = {_c_name(var + '[t+1]')};")
+        lines.append("}")
+        lines.append("")
+        lines.append("/* Devuelve los pasos completados: 1, o 0 si el tick falló (código en *error). */")
+        lines.append("int64_t step(int64_t *state, const int64_t *inputs, int64_t *error) {")
+        lines.append("    *error = 0;")
+        lines.append("    dio_step(state, inputs, error);")
+        lines.append("    return !*error;")
+        lines.append("}")
+        lines.append("")
+        lines.append("int64_t step_n(int64_t *state, const int64_t *inputs, int64_t n, int64_t *error) {")
+        lines.append("    *error = 0;")
+        lines.append("    for (int64_t i = 0; i < n; i++) {")
+        lines.append(f"        dio_step(state, inputs + i * {len(self.input_vars)}, error);")
+        lines.append("        if (*error) return i;")
+        lines.append("    }")
+        lines.append("    return n;")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def _expr(self, expr):
+        if isinstance(expr, int):
+            return f"INT64_C({expr})"
+        if isinstance(expr, str):
+            return _c_name(expr)
+        op, args = expr[0], [self._expr(arg) for arg in expr[1:]]
+        if op in _BINARY_OPS:
+            return f"({args[0]} {_BINARY_OPS[op]} {args[1]})"
+        if op in _CHECKED_OPS:
+            return f"{_CHECKED_OPS[op]}(err, {args[0]}, {args[1]})"
+        if op == 'neg':
+            return f"dio_neg(err, {args[0]})"
+        if op == 'if':
+            return f"dio_if({args[0]}, {args[1]}, {args[2]})"
+        if op == '&&':
+            return f"dio_and({args[0]}, {args[1]})"
+        if op == '||':
+            return f"dio_or({args[0]}, {args[1]})"
+        raise ValueError(f"Operador desconocido: {op}")
+
+
+class NativeStep:
+    """
+    Función de transición compilada a código nativo y cargada con ctypes.
+    """
+    def __init__(self, library_path, state_vars, input_vars):
+        self.library_path = library_path
+        self.state_vars = list(state_vars)
+        self.input_vars = list(input_vars)
+        self._lib = ctypes.CDLL(library_path)
+        int64_p = ctypes.POINTER(ctypes.c_int64)
+        self._lib.step.argtypes = [int64_p, int64_p, int64_p]
+        self._lib.step.restype = ctypes.c_int64
+        self._lib.step_n.argtypes = [int64_p, int64_p, ctypes.c_int64, int64_p]
+        self._lib.step_n.restype = ctypes.c_int64
+        self._state_type = ctypes.c_int64 * len(self.state_vars)
+        self._inputs_type = ctypes.c_int64 * max(1, len(self.input_vars))
+
+    @classmethod
+    def build(cls, emitter):
+        """
+        Compila el código del emisor con el compilador de C del sistema ($CC o
+        'cc') y carga la biblioteca.
+
+        Returns:
+            NativeStep, o None si no hay compilador o la compilación falla.
+        """
+        compiler = find_c_compiler()
+        if compiler is None:
+            print("[Engine] AVISO: No se encontró un compilador de C; se usa el evaluador de Python.", file=sys.stderr)
+            return None
+        source = emitter.emit()
+        digest = hashlib.sha256((source + compiler + " ".join(CC_FLAGS)).encode("utf-8")).hexdigest()[:24]
+        suffix = ".dll" if sys.platform == "win32" else ".so"
+        library_path = os.path.join(NATIVE_CACHE_DIR, f"step_{digest}{suffix}")
+        try:
+            _prepare_cache_dir(NATIVE_CACHE_DIR)
+            if not os.path.exists(library_path):
+                if not _compile_library(compiler, source, digest, library_path):
+                    return None
+            _check_private_file(library_path)
+        except OSError as e:
+            print(f"[Engine] AVISO: Caché nativa no utilizable ({e}); se usa el evaluador de Python.", file=sys.stderr)
+            return None
+        try:
+            return cls(library_path, emitter.state_vars, emitter.input_vars)
+        except OSError as e:
+            print(f"[Engine] AVISO: No se pudo cargar {library_path} ({e}); se usa el evaluador de Python.", file=sys.stderr)
+            return None
+
+    def compute_next_state(self, current_state, inputs):
+        """Mismo contrato que EquationEngine.compute_next_state."""
+        state = self._state_type(*(int(current_state.get(var, 0)) for var in self.state_vars))
+        frame = self._inputs_type(*(int(inputs.get(var, 0)) for var in self.input_vars))
+        error = ctypes.c_int64(DIO_OK)
+        if not self._lib.step(state, frame, ctypes.byref(error)):
+            _raise_tick_error(error.value, "")
+        return dict(zip(self.state_vars, state))
+
+    def step_n(self, current_state, input_trace):
+        """
+        Aplica len(input_trace) pasos en una sola llamada nativa.
+
+        Args:
+            current_state (dict): Estado inicial.
+            input_trace (list): Un diccionario de entradas por paso.
+
+        Returns:
+            dict: Estado final.
+
+        Raises:
+            ZeroDivisionError: Si algún tick divide entre 0 (se indica cuál).
+            OverflowError: Si algún tick se sale de int64 (se indica cuál).
+        """
+        n = len(input_trace)
+        state = self._state_type(*(int(current_state.get(var, 0)) for var in self.state_vars))
+        width = len(self.input_vars)
+        frames = (ctypes.c_int64 * max(1, n * width))(
+            *(int(frame.get(var, 0)) for frame in input_trace for var in self.input_vars))
+        error = ctypes.c_int64(DIO_OK)
+        completed = self._lib.step_n(state, frames, n, ctypes.byref(error))
+        if completed < n:
+            _raise_tick_error(error.value, f" en el tick {completed}")
+        return dict(zip(self.state_vars, state))
+
+
+def _raise_tick_error(code, where):
+    """Traduce el código de error de un tick nativo a la excepción de Python."""
+    if code == DIO_DIV_BY_ZERO:
+        raise ZeroDivisionError(f"División entera entre cero{where} (motor nativo).")
+    # El evaluador de Python usa enteros de precisión arbitraria: un valor que
+    # no cabe en int64 no se puede reproducir, así que el tick se rechaza.
+    raise OverflowError(f"Desbordamiento de int64{where} (motor nativo).")
+
+
+def _compile_library(compiler, source, digest, library_path):
+    """
+    Compila `source` en `library_path`. El código y la biblioteca se escriben
+    con nombres temporales únicos y se renombran al terminar, de modo que
+    nunca se carga una biblioteca a medio escribir.
+
+    Returns:
+        bool: False si la compilación falla.
+    """
+    suffix = os.path.splitext(library_path)[1]
+    fd, source_tmp = tempfile.mkstemp(prefix=f"step_{digest}.", suffix=".c", dir=NATIVE_CACHE_DIR)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(source)
+    fd, library_tmp = tempfile.mkstemp(prefix=f"step_{digest}.", suffix=suffix, dir=NATIVE_CACHE_DIR)
+    os.close(fd)
+    try:
+        result = subprocess.run([compiler, *CC_FLAGS, "-o", library_tmp, source_tmp], capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"[Engine] AVISO: Falló la compilación nativa; se usa el evaluador de Python.\n{result.stderr}",
+                  file=sys.stderr)
+            return False
+        os.chmod(library_tmp, 0o700)
+        os.replace(source_tmp, os.path.join(NATIVE_CACHE_DIR, f"step_{digest}.c"))
+        os.replace(library_tmp, library_path)
+        return True
+    finally:
+        for path in (source_tmp, library_tmp):
+            if os.path.exists(path):
+                os.remove(path)
+
+def _prepare_cache_dir(path):
+    """
+    Crea el directorio de la caché con modo 0700 y comprueba que es un
+    directorio real del usuario actual en el que nadie más puede escribir.
+
+    Raises:
+        PermissionError: Si pertenece a otro usuario o es un enlace simbólico.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{path} no es un directorio del usuario actual")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+def _check_private_file(path):
+    """
+    Comprueba, antes de cargarla, que la biblioteca es un fichero regular del
+    usuario actual que ni el grupo ni otros pueden modificar.
+
+    Raises:
+        PermissionError: En otro caso.
+    """
+    if not hasattr(os, "getuid"):
+        return
+    info = os.lstat(path)
+    if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise PermissionError(f"{path} no es un fichero privado del usuario actual")
+
+def find_c_compiler():
+    """Ruta del compilador de C del sistema ($CC o 'cc'), o None si no hay ninguno."""
+    return shutil.which(os.environ.get("CC", "cc"))
+
+def verify_against_reference(filepath, ticks=1000, seed=0, initial_state=None):
+    """
+    Comprueba paso a paso que el motor nativo y el evaluador de Python llegan
+    al mismo estado en cada tick, con entradas aleatorias.
+
+    Returns:
+        int: Primer tick en el que difieren, o -1 si coinciden en todos.
+    """
+    from interpreter.interpreter import EquationEngine
+    reference = EquationEngine(filepath)
+    native = EquationEngine(filepath, backend='native')
+    if native.backend != 'native':
+        raise RuntimeError("El motor nativo no está disponible en este sistema.")
+    return compare_engines(reference, native, ticks, seed, initial_state)
+
+def compare_engines(reference, other, ticks=1000, seed=0, initial_state=None):
+    """
+    Ejecuta dos motores en paralelo con las mismas entradas aleatorias y
+    compara su estado tick a tick. Si uno lanza ZeroDivisionError (u
+    OverflowError, el motor nativo al salirse de int64), el otro debe lanzar
+    la misma en el mismo tick (y la comparación termina ahí).
+
+    Returns:
+        int: Primer tick en el que difieren, o -1 si coinciden en todos.
+    """
+    rng = random.Random(seed)
+    state_ref = {var: 0 for var in reference.get_state_variables()}
+    state_ref.update(initial_state or {})
+    state_other = dict(state_ref)
+    for tick in range(ticks):
+        pressed = rng.random() < 0.5
+        inputs = {var: (int(pressed) if var == 'kbhit' else (rng.randint(32, 126) if pressed else 0))
+                  for var in reference.get_input_variables()}
+        results = []
+        for engine, state in ((reference, state_ref), (other, state_other)):
+            try:
+                results.append(engine.compute_next_state(state, inputs))
+            except (ZeroDivisionError, OverflowError) as e:
+                results.append(type(e))
+        if isinstance(results[0], type) or isinstance(results[1], type):
+            return -1 if results[0] is results[1] else tick
+        state_ref.update(results[0])
+        state_other.update(results[1])
+        if state_ref != state_other:
+            return tick
+    return -1
+
+def _c_name(name):
+    """Identificador C para una variable, un C_n o un x[t+1]."""
+    if name.endswith('[t+1]'):
+        return f"next_{name[:-5]}"
+    return f"v_{name}"
+
+if __name__ == "__main__":
+    # python -m interpreter.native <archivo>_interpreter_input.txt [ticks]
+    if len(sys.argv) < 2:
+        print("Uso: python -m interpreter.native <ruta_al_archivo> [ticks]")
+        sys.exit(1)
+    mismatch = verify_against_reference(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
+    if mismatch >= 0:
+        print(f"--- ERROR: El motor nativo difiere del evaluador de Python en el tick {mismatch}.", file=sys.stderr)
+        sys.exit(1)
+    print("--- El motor nativo coincide con el evaluador de Python en todos los ticks. ---")
@@ -0,0 +1,146 @@
+"""
+Evaluación y evaluación parcial de las ecuaciones en forma de árbol de tuplas
+(ver interpreter.parse_expression), con la misma semántica que
+EquationEngine._eval_expression.
+"""
+
+OPS = {
+    'if': lambda a, b, c: b if a else c,
+    '+': lambda a, b: a + b, '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b, '/': lambda a, b: a // b,
+    'neg': lambda a: -a,
+    '==': lambda a, b: 1 if a == b else 0, '!=': lambda a, b: 1 if a != b else 0,
+    '>': lambda a, b: 1 if a > b else 0, '<': lambda a, b: 1 if a < b else 0,
+    '>=': lambda a, b: 1 if a >= b else 0, '<=': lambda a, b: 1 if a <= b else 0,
+    '&&': lambda a, b: 1 if a and b else 0, '||': lambda a, b: 1 if a or b else 0
+}
+
+def evaluate(expr, context):
+    """Valor de un árbol de tuplas; las variables se buscan en `context`."""
+    if isinstance(expr, tuple):
+        return OPS[expr[0]](*[evaluate(arg, context) for arg in expr[1:]])
+    if isinstance(expr, str):
+        return context[expr]
+    return expr
+
+def tree_size(expr):
+    """Nodos del árbol: operadores más hojas."""
+    if isinstance(expr, tuple):
+        return 1 + sum(tree_size(arg) for arg in expr[1:])
+    return 1
+
+def format_expression(expr):
+    """Inversa de interpreter.parse_expression: árbol de tuplas -> texto del intérprete."""
+    if isinstance(expr, tuple):
+        return f"{expr[0]}(" + ", ".join(format_expression(arg) for arg in expr[1:]) + ")"
+    return str(expr)
+
+def parse_assignments(text):
+    """
+    'kbhit=0,getch=0' -> {'kbhit': 0, 'getch': 0} (formato de --specialize).
+    """
+    known = {}
+    for item in text.split(','):
+        name, sep, value = item.partition('=')
+        if not sep or not name.strip():
+            raise ValueError(f"Especialización no válida: '{item}' (se esperaba variable=valor)")
+        known[name.strip()] = int(value)
+    return known
+
+def partial_evaluate(expressions, plan, known, outputs):
+    """
+    Especializa un sistema de ecuaciones para valores conocidos de algunas
+    variables (normalmente entradas, p. ej. kbhit = 0).
+
+    Sustituye los valores conocidos, simplifica cada ecuación (plegado de
+    constantes, x*0, x*1, x+0, 'if' con condición constante...), propaga las
+    ecuaciones que quedan constantes o son alias de otra variable y elimina las
+    que ya no usa ninguna salida. Las ecuaciones que pueden dividir entre cero
+    se conservan aunque ninguna salida las use: el motor de referencia las
+    evalúa todas, así que la variante debe lanzar ZeroDivisionError en los
+    mismos ticks.
+
+    Args:
+        expressions (dict): {ecuación: árbol}.
+        plan (list): Orden topológico de las ecuaciones.
+        known (dict): {variable: valor constante}.
+        outputs (set): Ecuaciones que se conservan siempre (los x[t+1]).
+
+    Returns:
+        tuple: (plan reducido, {ecuación: árbol simplificado})
+    """
+    env = dict(known)
+    simplified = {}
+    for name in plan:
+        expr = simplify(substitute(expressions[name], env))
+        simplified[name] = expr
+        if name not in outputs and not isinstance(expr, tuple):
+            env[name] = expr  # Constante o alias: se sustituye en las siguientes
+
+    # Eliminación de código muerto desde las salidas (y las divisiones).
+    needed = set(outputs) | {name for name in plan if may_raise(simplified[name])}
+    for name in reversed(plan):
+        if name in needed:
+            needed.update(variables(simplified[name]))
+    reduced_plan = [name for name in plan if name in needed]
+    return reduced_plan, {name: simplified[name] for name in reduced_plan}
+
+def substitute(expr, env):
+    if isinstance(expr, tuple):
+        return (expr[0],) + tuple(substitute(arg, env) for arg in expr[1:])
+    if isinstance(expr, str) and expr in env:
+        return env[expr]
+    return expr
+
+def simplify(expr):
+    """
+    Simplificación local, de abajo arriba, que conserva la semántica de OPS.
+    OPS evalúa todos los operandos, así que un operando solo se descarta
+    (x*0, 0 && x, 1 || x, la rama no tomada de un 'if') si no puede lanzar
+    ZeroDivisionError.
+    """
+    if not isinstance(expr, tuple):
+        return expr
+    op = expr[0]
+    args = [simplify(arg) for arg in expr[1:]]
+    constants = [isinstance(arg, int) for arg in args]
+
+    if all(constants) and not (op == '/' and args[1] == 0):
+        return OPS[op](*args)
+    if op == 'if' and constants[0]:
+        taken, dropped = (args[1], args[2]) if args[0] else (args[2], args[1])
+        if not may_raise(dropped): return taken
+    if op == '*':
+        a, b = args
+        if a == 0 and constants[0] and not may_raise(b): return 0
+        if b == 0 and constants[1] and not may_raise(a): return 0
+        if a == 1 and constants[0]: return b
+        if b == 1 and constants[1]: return a
+    if op == '+':
+        a, b = args
+        if a == 0 and constants[0]: return b
+        if b == 0 and constants[1]: return a
+    if op == '-':
+        a, b = args
+        if b == 0 and constants[1]: return a
+        if a == b and not may_raise(a): return 0
+    if op in ('&&', '||') and not any(may_raise(arg) for arg in args):
+        if op == '&&' and any(c and a == 0 for c, a in zip(constants, args)): return 0
+        if op == '||' and any(c and a != 0 for c, a in zip(constants, args)): return 1
+    return (op,) + tuple(args)
+
+def may_raise(expr):
+    """Si evaluar el árbol puede lanzar ZeroDivisionError (una división sin divisor constante no nulo)."""
+    if not isinstance(expr, tuple):
+        return False
+    if expr[0] == '/' and not (isinstance(expr[2], int) and expr[2] != 0):
+        return True
+    return any(may_raise(arg) for arg in expr[1:])
+
+def variables(expr):
+    if isinstance(expr, tuple):
+        names = set()
+        for arg in expr[1:]:
+            names |= variables(arg)
+        return names
+    return {expr} if isinstance(expr, str) else set()
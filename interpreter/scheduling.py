@@ -0,0 +1,217 @@
+"""
+Planificación por niveles de las ecuaciones: cada nivel contiene ecuaciones
+que no dependen entre sí, de modo que pueden evaluarse a la vez.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from interpreter import vectorized
+from interpreter.partial_eval import tree_size, variables
+
+# Ecuaciones por nivel a partir de las cuales el modo 'threads' reparte el nivel.
+MIN_PARALLEL_WIDTH = 8
+
+def build_levels(expressions, execution_plan):
+    """
+    Agrupa las ecuaciones en niveles topológicos: el nivel de una ecuación es
+    uno más que el mayor nivel de las ecuaciones que usa (0 si no usa
+    ninguna).
+
+    Args:
+        expressions (dict): {ecuación: árbol de tuplas}.
+        execution_plan (list): Orden topológico (el plan de Kahn del motor).
+
+    Returns:
+        list: Una lista de ecuaciones por nivel.
+    """
+    level_of = {}
+    levels = []
+    for name in execution_plan:
+        deps = [level_of[dep] for dep in variables(expressions[name]) if dep in level_of]
+        level = 1 + max(deps) if deps else 0
+        level_of[name] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(name)
+    return levels
+
+def schedule_stats(expressions, levels):
+    """
+    Returns:
+        dict: Número de niveles (= longitud del camino crítico en ecuaciones),
+        anchura de cada nivel y camino crítico medido en nodos.
+    """
+    weight = {}
+    for level in levels:
+        for name in level:
+            deps = [weight[dep] for dep in variables(expressions[name]) if dep in weight]
+            weight[name] = tree_size(expressions[name]) + max(deps, default=0)
+    widths = [len(level) for level in levels]
+    return {
+        'equations': sum(widths),
+        'levels': len(levels),
+        'critical_path': len(levels),
+        'critical_path_nodes': max(weight.values(), default=0),
+        'total_nodes': sum(tree_size(expr) for expr in expressions.values()),
+        'level_widths': widths,
+        'max_width': max(widths, default=0),
+    }
+
+
+class LevelEvaluator:
+    """
+    Evaluación vectorizada por niveles con NumPy. Todas las ecuaciones se
+    descomponen en nodos (con las subexpresiones repetidas compartidas) que se
+    guardan en un único vector de valores; los nodos se agrupan por nivel y,
+    dentro de cada nivel, por operador, así que cada grupo es una sola
+    operación de NumPy sobre índices del vector, por ancho que sea el nivel.
+
+    Con un lote de estados (compute_batch) el vector pasa a ser una matriz
+    (nodos x lote) y las mismas operaciones evalúan todo el lote.
+
+    compute_next_state lanza ZeroDivisionError como el evaluador de referencia;
+    compute_batch mantiene la semántica de lotes de interpreter.vectorized
+    (la división entre 0 da 0).
+    """
+    def __init__(self, expressions, execution_plan, state_vars, input_vars):
+        np = vectorized.require_numpy()
+        self.state_vars = list(state_vars)
+        self.input_vars = list(input_vars)
+        self._slots = {}          # clave del nodo -> posición en el vector
+        self._node_level = []
+        self._constants = []      # (posición, valor)
+        self._ops = {}            # nivel -> {op: ([salida], [[arg_1], [arg_2], ...])}
+        self._leaf_slots = {}
+        for name in self.state_vars + self.input_vars:
+            self._leaf_slots[name] = self._new_slot(('var', name), 0)
+        self._equation_slots = {}
+        for name in execution_plan:
+            self._equation_slots[name] = self._add(expressions[name])
+        self._size = len(self._node_level)
+
+        self._template = np.zeros(self._size, dtype=np.int64)
+        for slot, value in self._constants:
+            self._template[slot] = value
+        self._steps = []
+        for level in sorted(self._ops):
+            for op, (outputs, args) in self._ops[level].items():
+                self._steps.append((vectorized.VECTOR_OPS[op], np.array(outputs),
+                                    [np.array(arg) for arg in args], op == '/'))
+        self._outputs = [(var, self._equation_slots[f"{var}[t+1]"]) for var in self.state_vars
+                         if f"{var}[t+1]" in self._equation_slots]
+        self._leaves = [(name, slot) for name, slot in self._leaf_slots.items()]
+
+    @property
+    def node_levels(self):
+        """Niveles de la descomposición en nodos (el camino crítico en operaciones)."""
+        return len(self._ops)
+
+    @property
+    def numpy_calls_per_tick(self):
+        return len(self._steps)
+
+    def compute_next_state(self, current_state, inputs):
+        """Mismo contrato que EquationEngine.compute_next_state."""
+        values = self._template.copy()
+        for name, slot in self._leaves:
+            values[slot] = current_state.get(name, inputs.get(name, 0))
+        self._run(values, strict=True)
+        return {var: int(values[slot]) for var, slot in self._outputs}
+
+    def compute_batch(self, states, inputs):
+        """Mismo contrato que VectorizedStep.compute_batch."""
+        np = vectorized.np
+        size = len(next(iter(states.values()))) if states else 1
+        values = np.repeat(self._template[:, None], size, axis=1)
+        context = {**inputs, **states}
+        for name, slot in self._leaves:
+            values[slot] = context.get(name, 0)
+        self._run(values)
+        next_states = {var: values[self._equation_slots[f"{var}[t+1]"]].copy()
+                       if f"{var}[t+1]" in self._equation_slots else np.asarray(states[var]).copy()
+                       for var in self.state_vars}
+        return next_states
+
+    def _run(self, values, strict=False):
+        """
+        Args:
+            strict (bool): Lanzar ZeroDivisionError si algún divisor vale 0
+                (el evaluador de referencia evalúa todos los operandos, así que
+                cualquier división del plan cuenta).
+        """
+        np = vectorized.np
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for op, outputs, args, divides in self._steps:
+                operands = [values[arg] for arg in args]
+                if strict and divides and not operands[1].all():
+                    raise ZeroDivisionError("División entera entre cero (plan por niveles).")
+                values[outputs] = op(*operands)
+
+    def _add(self, expr):
+        """Añade un árbol al grafo de nodos y devuelve la posición de su raíz."""
+        if isinstance(expr, tuple):
+            children = [self._add(arg) for arg in expr[1:]]
+            key = (expr[0],) + tuple(children)
+            if key in self._slots:
+                return self._slots[key]
+            level = 1 + max(self._node_level[child] for child in children)
+            slot = self._new_slot(key, level)
+            outputs, args = self._ops.setdefault(level, {}).setdefault(expr[0], ([], [[] for _ in children]))
+            outputs.append(slot)
+            for position, child in enumerate(children):
+                args[position].append(child)
+            return slot
+        if isinstance(expr, str):
+            if expr in self._equation_slots:
+                return self._equation_slots[expr]
+            if expr not in self._leaf_slots:
+                self._leaf_slots[expr] = self._new_slot(('var', expr), 0)
+            return self._leaf_slots[expr]
+        key = ('const', expr)
+        if key not in self._slots:
+            self._constants.append((self._new_slot(key, 0), expr))
+        return self._slots[key]
+
+    def _new_slot(self, key, level):
+        slot = len(self._node_level)
+        self._slots[key] = slot
+        self._node_level.append(level)
+        return slot
+
+
+class ThreadedLevelEvaluator:
+    """
+    Evaluación por niveles repartiendo cada nivel ancho (al menos
+    MIN_PARALLEL_WIDTH ecuaciones) entre los hilos de un pool; los niveles
+    estrechos se evalúan en el hilo principal. Con el GIL, el evaluador de
+    Python solo gana tiempo en un intérprete sin GIL (free-threaded).
+    El pool vive hasta close(); el motor que lo crea es responsable de cerrarlo.
+    """
+    def __init__(self, engine, levels, workers=None):
+        self.engine = engine
+        self.levels = levels
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+
+    def compute_next_state(self, current_state, inputs):
+        """Mismo contrato que EquationEngine.compute_next_state."""
+        context = {**current_state, **inputs}
+        equations = self.engine.equations
+        evaluate = self.engine._eval_expression
+        for level in self.levels:
+            if len(level) < MIN_PARALLEL_WIDTH or self.workers == 1:
+                for name in level:
+                    context[name] = evaluate(equations[name], context)
+                continue
+            chunk = -(-len(level) // self.workers)
+            chunks = [level[i:i + chunk] for i in range(0, len(level), chunk)]
+            # Los miembros de un nivel solo leen niveles anteriores: el contexto
+            # no cambia mientras los hilos lo leen.
+            results = self._pool.map(lambda names: [evaluate(equations[name], context) for name in names], chunks)
+            for names, values in zip(chunks, results):
+                context.update(zip(names, values))
+        return {var: int(context[f"{var}[t+1]"]) for var in self.engine.state_vars if f"{var}[t+1]" in context}
+
+    def close(self):
+        """Termina los hilos del pool (EquationEngine.close lo llama)."""
+        self._pool.shutdown()
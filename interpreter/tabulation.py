@@ -0,0 +1,283 @@
+import argparse
+import contextlib
+import io
+import itertools
+import random
+import sys
+
+from interpreter.vectorized import VectorizedStep, require_numpy
+
+# Memoria máxima (en MB) que puede ocupar la tabla de transiciones.
+DEFAULT_MEMORY_BUDGET_MB = 256
+# Estados que se evalúan a la vez al construir la tabla.
+BUILD_BATCH_STATES = 1 << 16
+# Entradas especiales de la tabla: transición que sale del dominio declarado y
+# transición indefinida (el evaluador de referencia divide entre cero).
+ESCAPE = -1
+UNDEFINED = -2
+
+def parse_domain(text):
+    """
+    'b=0:79' -> ('b', (0, 79)): rango cerrado de valores de una variable de estado.
+    """
+    name, sep, bounds = text.partition('=')
+    low, colon, high = bounds.partition(':')
+    if not sep or not colon:
+        raise ValueError(f"Dominio no válido: '{text}' (se esperaba variable=min:max)")
+    low, high = int(low), int(high)
+    if low > high:
+        raise ValueError(f"Dominio vacío: '{text}'")
+    return name.strip(), (low, high)
+
+def parse_input_values(text):
+    """
+    'getch=0,w,s,i,k' -> ('getch', [0, 119, 115, 105, 107]): valores posibles
+    de una entrada. Un carácter que no es un número se toma como su código ASCII.
+    """
+    name, sep, values = text.partition('=')
+    if not sep or not values:
+        raise ValueError(f"Alfabeto no válido: '{text}' (se esperaba entrada=v1,v2,...)")
+    parsed = []
+    for value in values.split(','):
+        value = value.strip()
+        try:
+            parsed.append(int(value))
+        except ValueError:
+            if len(value) != 1:
+                raise ValueError(f"Valor de entrada no válido: '{value}' (número o un solo carácter)")
+            parsed.append(ord(value))
+    return name.strip(), parsed
+
+def input_alphabet(value_sets):
+    """
+    Producto cartesiano de los valores de cada entrada.
+
+    Args:
+        value_sets (dict): {entrada: [valores]}.
+
+    Returns:
+        list: Un diccionario de entradas por símbolo del alfabeto.
+    """
+    names = sorted(value_sets)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(value_sets[name] for name in names))]
+
+
+class TransitionTable:
+    """
+    F tabulada para un espacio de estados finito: una matriz densa
+    table[estado, símbolo] -> estado siguiente, donde los estados se numeran
+    con un índice perfecto (base mixta sobre los rangos de cada variable) y
+    los símbolos son las combinaciones de entradas del alfabeto.
+
+    Cada tick es una sola consulta a la matriz. Las transiciones que salen del
+    dominio declarado se guardan como ESCAPE y las que dividen entre cero como
+    UNDEFINED; ambas detienen la simulación.
+    """
+    def __init__(self, state_vars, domains, alphabet, table):
+        np = require_numpy()
+        self.state_vars = list(state_vars)
+        self.domains = {var: domains[var] for var in self.state_vars}
+        self.alphabet = list(alphabet)
+        self.table = table
+        self.input_names = sorted({name for symbol in self.alphabet for name in symbol})
+        self._symbols = {self._symbol_key(symbol): j for j, symbol in enumerate(self.alphabet)}
+        self._lows = np.array([self.domains[var][0] for var in self.state_vars], dtype=np.int64)
+        self._radix = np.array([self.domains[var][1] - self.domains[var][0] + 1 for var in self.state_vars], dtype=np.int64)
+        # Variable más rápida: la última (orden C).
+        self._strides = np.ones(len(self.state_vars), dtype=np.int64)
+        for i in range(len(self.state_vars) - 2, -1, -1):
+            self._strides[i] = self._strides[i + 1] * self._radix[i + 1]
+
+    @classmethod
+    def build(cls, engine, domains, alphabet, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+        """
+        Enumera F una vez sobre todo el dominio (estado, símbolo), evaluando
+        por lotes con NumPy. Las transiciones en las que el evaluador de
+        referencia lanzaría ZeroDivisionError quedan como UNDEFINED y las que
+        se salen de int64 (su resultado no cabe en ningún dominio), como ESCAPE.
+
+        Args:
+            engine (EquationEngine): Motor con las ecuaciones.
+            domains (dict): {variable de estado: (min, max)}; todas las
+                variables de estado deben tener dominio.
+            alphabet (list): Combinaciones de entradas (ver input_alphabet).
+            memory_budget_mb (float): Tamaño máximo de la tabla.
+
+        Returns:
+            TransitionTable
+
+        Raises:
+            ValueError: Si falta algún dominio o la tabla no cabe en el presupuesto.
+        """
+        np = require_numpy()
+        state_vars = sorted(engine.get_state_variables())
+        missing = [var for var in state_vars if var not in domains]
+        if missing:
+            raise ValueError(f"Faltan los dominios de: {', '.join(missing)}")
+        if not alphabet:
+            alphabet = [{}]
+        n_states = 1
+        for var in state_vars:
+            n_states *= domains[var][1] - domains[var][0] + 1
+        dtype = np.int32 if n_states < 2 ** 31 else np.int64
+        table_bytes = n_states * len(alphabet) * np.dtype(dtype).itemsize
+        if table_bytes > memory_budget_mb * 1024 * 1024:
+            raise ValueError(f"La tabla ocuparía {table_bytes / 1024 / 1024:,.1f} MB ({n_states:,} estados x "
+                             f"{len(alphabet)} símbolos), más que el presupuesto de {memory_budget_mb} MB.")
+
+        transitions = cls(state_vars, domains, alphabet, np.empty((n_states, len(alphabet)), dtype=dtype))
+        step = VectorizedStep.from_engine(engine)
+        for start in range(0, n_states, BUILD_BATCH_STATES):
+            indices = np.arange(start, min(start + BUILD_BATCH_STATES, n_states), dtype=np.int64)
+            states = transitions.decode_batch(indices)
+            for j, symbol in enumerate(alphabet):
+                next_states, (div0, overflow) = step.compute_batch_checked(
+                    states, {name: np.int64(value) for name, value in symbol.items()})
+                encoded = np.where(overflow, ESCAPE, transitions.encode_batch(next_states))
+                transitions.table[start:start + len(indices), j] = np.where(div0, UNDEFINED, encoded)
+        return transitions
+
+    @property
+    def n_states(self):
+        return self.table.shape[0]
+
+    @property
+    def escapes(self):
+        """Transiciones que salen del dominio declarado."""
+        return int((self.table == ESCAPE).sum())
+
+    @property
+    def undefined(self):
+        """Transiciones en las que el evaluador de referencia divide entre cero."""
+        return int((self.table == UNDEFINED).sum())
+
+    def encode_batch(self, states):
+        """{variable: array} -> array de índices (ESCAPE fuera del dominio)."""
+        np = require_numpy()
+        index = np.zeros(len(next(iter(states.values()))), dtype=np.int64)
+        inside = np.ones(len(index), dtype=bool)
+        for i, var in enumerate(self.state_vars):
+            offset = states[var] - self._lows[i]
+            inside &= (offset >= 0) & (offset < self._radix[i])
+            index += offset * self._strides[i]
+        return np.where(inside, index, ESCAPE)
+
+    def decode_batch(self, indices):
+        """array de índices -> {variable: array}."""
+        return {var: (indices // self._strides[i]) % self._radix[i] + self._lows[i]
+                for i, var in enumerate(self.state_vars)}
+
+    def encode(self, state):
+        """Índice de un estado (diccionario), o ESCAPE si está fuera del dominio."""
+        index = 0
+        for i, var in enumerate(self.state_vars):
+            offset = state.get(var, 0) - int(self._lows[i])
+            if not 0 <= offset < self._radix[i]:
+                return ESCAPE
+            index += offset * int(self._strides[i])
+        return index
+
+    def decode(self, index):
+        return {var: int((index // self._strides[i]) % self._radix[i] + self._lows[i])
+                for i, var in enumerate(self.state_vars)}
+
+    def symbol(self, inputs):
+        """Posición de unas entradas en el alfabeto."""
+        try:
+            return self._symbols[self._symbol_key(inputs)]
+        except KeyError:
+            raise ValueError(f"Entradas fuera del alfabeto tabulado: {inputs}") from None
+
+    def compute_next_state(self, current_state, inputs):
+        """
+        Mismo contrato que EquationEngine.compute_next_state (también lanza
+        ZeroDivisionError en las transiciones UNDEFINED).
+        """
+        index = self.encode(current_state)
+        if index < 0:
+            raise ValueError(f"Estado fuera del dominio tabulado: {current_state}")
+        return self.decode(self._lookup(index, self.symbol(inputs)))
+
+    def run(self, index, symbols):
+        """
+        Aplica un paso por cada símbolo de la traza.
+
+        Args:
+            index (int): Índice del estado inicial.
+            symbols (iterable): Posiciones en el alfabeto.
+
+        Returns:
+            int: Índice del estado final.
+        """
+        table = self.table
+        for tick, j in enumerate(symbols):
+            index = table[index, j]
+            if index < 0:
+                if index == UNDEFINED:
+                    raise ZeroDivisionError(f"El tick {tick} divide entre cero.")
+                raise ValueError(f"El tick {tick} sale del dominio tabulado.")
+        return int(index)
+
+    def _lookup(self, index, j):
+        next_index = int(self.table[index, j])
+        if next_index == UNDEFINED:
+            raise ZeroDivisionError(f"La transición desde {self.decode(index)} con {self.alphabet[j]} divide entre cero.")
+        if next_index < 0:
+            raise ValueError(f"La transición desde {self.decode(index)} con {self.alphabet[j]} sale del dominio tabulado.")
+        return next_index
+
+    def _symbol_key(self, inputs):
+        return tuple(inputs.get(name, 0) for name in self.input_names)
+
+
+def main():
+    """Punto de entrada: python -m interpreter.tabulation <archivo>_interpreter_input.txt --domain x=0:9 ..."""
+    from interpreter.interpreter import EquationEngine
+    cli_parser = argparse.ArgumentParser(description="Tabula la función de transición para un espacio de estados acotado.")
+    cli_parser.add_argument("input_file", help="Archivo *_interpreter_input.txt generado por el compilador.")
+    cli_parser.add_argument("--domain", action="append", default=[], type=parse_domain,
+                            help="Rango de una variable de estado, p. ej. 'b=0:79' (uno por variable).")
+    cli_parser.add_argument("--input", action="append", default=[], type=parse_input_values,
+                            help="Valores de una entrada, p. ej. 'getch=0,w,s' o 'kbhit=0,1'.")
+    cli_parser.add_argument("--budget-mb", type=float, default=DEFAULT_MEMORY_BUDGET_MB,
+                            help=f"Tamaño máximo de la tabla en MB (por defecto: {DEFAULT_MEMORY_BUDGET_MB}).")
+    cli_parser.add_argument("--verify", type=int, default=1000,
+                            help="Ticks aleatorios en los que se compara la tabla con el evaluador de referencia.")
+    cli_parser.add_argument("--seed", type=int, default=0, help="Semilla de la verificación.")
+    args = cli_parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = EquationEngine(args.input_file)
+    alphabet = input_alphabet(dict(args.input))
+    try:
+        transitions = TransitionTable.build(engine, dict(args.domain), alphabet, args.budget_mb)
+    except ValueError as e:
+        print(f"--- ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"--- [Tabulación] {transitions.n_states:,} estados x {len(transitions.alphabet)} símbolos, "
+          f"{transitions.table.nbytes / 1024 / 1024:,.2f} MB ---")
+    if transitions.escapes:
+        print(f"  - AVISO: {transitions.escapes:,} transiciones salen del dominio declarado.", file=sys.stderr)
+    if transitions.undefined:
+        print(f"  - AVISO: {transitions.undefined:,} transiciones dividen entre cero (indefinidas).", file=sys.stderr)
+
+    # Verificación: recorridos aleatorios dentro del dominio contra el evaluador de referencia.
+    rng = random.Random(args.seed)
+    index = rng.randrange(transitions.n_states)
+    for tick in range(args.verify):
+        j = rng.randrange(len(transitions.alphabet))
+        state = transitions.decode(index)
+        try:
+            expected = transitions.encode({**state, **engine.compute_next_state(state, transitions.alphabet[j])})
+        except ZeroDivisionError:
+            expected = UNDEFINED
+        next_index = int(transitions.table[index, j])
+        if expected != next_index:
+            print(f"--- ERROR: La tabla difiere del evaluador de referencia en {state} con {transitions.alphabet[j]}.",
+                  file=sys.stderr)
+            sys.exit(1)
+        index = next_index if next_index >= 0 else rng.randrange(transitions.n_states)
+    print(f"--- La tabla coincide con el evaluador de referencia en {args.verify} ticks. ---")
+
+if __name__ == "__main__":
+    main()
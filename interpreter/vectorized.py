@@ -0,0 +1,164 @@
+"""
+Evaluación de la función de transición sobre lotes de estados con NumPy: cada
+variable es un vector y cada operador se aplica a todo el lote a la vez.
+
+NumPy es una dependencia opcional; solo la necesitan los modos que evalúan F
+sobre muchos estados (tabulación de la tabla de transiciones, exploración del
+espacio de estados).
+
+Diferencias con el evaluador de referencia: los valores son int64 (sin
+enteros de precisión arbitraria) y, en un lote, la división entre 0 da 0 en
+lugar de lanzar ZeroDivisionError: un estado que divide entre 0 no puede
+detener a los demás. El paso de un solo estado por niveles
+(scheduling.LevelEvaluator.compute_next_state) sí lanza la excepción.
+compute_batch_checked devuelve además qué estados del lote divergen del
+evaluador de referencia (los que dividirían entre 0 o se salen de int64).
+"""
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def require_numpy():
+    """Termina con un mensaje claro si NumPy no está instalado."""
+    if np is None:
+        print("Error: Este modo necesita NumPy ('pip install numpy').", file=sys.stderr)
+        sys.exit(1)
+    return np
+
+class VectorizedStep:
+    """
+    F evaluada sobre lotes: compute_batch recibe un vector por variable de
+    estado y por entrada y devuelve un vector por variable de estado.
+    """
+    def __init__(self, expressions, execution_plan, state_vars):
+        """
+        Args:
+            expressions (dict): {ecuación: árbol de tuplas} (ver EquationEngine.get_expressions).
+            execution_plan (list): Orden topológico de las ecuaciones.
+            state_vars (list): Variables de estado.
+        """
+        require_numpy()
+        self.expressions = expressions
+        self.execution_plan = list(execution_plan)
+        self.state_vars = list(state_vars)
+
+    @classmethod
+    def from_engine(cls, engine):
+        return cls(engine.get_expressions(), engine.execution_plan, sorted(engine.get_state_variables()))
+
+    def compute_batch(self, states, inputs):
+        """
+        Args:
+            states (dict): {variable de estado: array int64}.
+            inputs (dict): {entrada: array int64 o escalar}.
+
+        Returns:
+            dict: {variable de estado: array int64} con el estado siguiente.
+                  Las variables sin ecuación x[t+1] conservan su valor.
+        """
+        context = {**states, **inputs}
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for name in self.execution_plan:
+                context[name] = self._eval(self.expressions[name], context)
+        size = len(next(iter(states.values()))) if states else 1
+        next_states = {}
+        for var in self.state_vars:
+            value = context.get(f"{var}[t+1]", states.get(var))
+            next_states[var] = np.broadcast_to(np.asarray(value, dtype=np.int64), (size,)).copy()
+        return next_states
+
+    def compute_batch_checked(self, states, inputs):
+        """
+        Como compute_batch, marcando los estados en los que el resultado no es
+        el del evaluador de referencia.
+
+        Returns:
+            tuple: (estado siguiente, (división entre cero, desbordamiento)),
+            con dos arrays booleanos por estado del lote. El evaluador de
+            referencia evalúa todos los operandos, así que lanzaría
+            ZeroDivisionError en los estados con cualquier divisor nulo; en los
+            que desbordan int64 daría otro valor (sus enteros no tienen límite).
+        """
+        size = len(next(iter(states.values()))) if states else 1
+        flags = {'div0': np.zeros(size, dtype=bool), 'overflow': np.zeros(size, dtype=bool)}
+        context = {**states, **inputs}
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for name in self.execution_plan:
+                context[name] = self._eval(self.expressions[name], context, flags)
+        next_states = {}
+        for var in self.state_vars:
+            value = context.get(f"{var}[t+1]", states.get(var))
+            next_states[var] = np.broadcast_to(np.asarray(value, dtype=np.int64), (size,)).copy()
+        return next_states, (flags['div0'], flags['overflow'])
+
+    def _eval(self, expr, context, flags=None):
+        if isinstance(expr, tuple):
+            op, args = expr[0], [self._eval(arg, context, flags) for arg in expr[1:]]
+            if flags is not None and op in CHECKED_OPS:
+                return CHECKED_OPS[op](flags, *args)
+            return VECTOR_OPS[op](*args)
+        if isinstance(expr, str):
+            return context[expr]
+        return np.int64(expr)
+
+
+def _floordiv(a, b):
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64))
+    return np.where(b == 0, 0, np.floor_divide(a, np.where(b == 0, 1, b)))
+
+def _as_int(mask):
+    return np.asarray(mask, dtype=np.int64)
+
+VECTOR_OPS = {
+    'if': lambda a, b, c: np.where(np.asarray(a) != 0, b, c),
+    '+': lambda a, b: a + b, '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b, '/': _floordiv,
+    'neg': lambda a: -a,
+    '==': lambda a, b: _as_int(a == b), '!=': lambda a, b: _as_int(a != b),
+    '>': lambda a, b: _as_int(a > b), '<': lambda a, b: _as_int(a < b),
+    '>=': lambda a, b: _as_int(a >= b), '<=': lambda a, b: _as_int(a <= b),
+    '&&': lambda a, b: _as_int((np.asarray(a) != 0) & (np.asarray(b) != 0)),
+    '||': lambda a, b: _as_int((np.asarray(a) != 0) | (np.asarray(b) != 0)),
+}
+
+# Operadores que pueden divergir del evaluador de referencia: marcan en `flags`
+# ('div0' y 'overflow', un booleano por estado) los estados afectados.
+_INT64_MIN = -2 ** 63
+
+def _flag(flags, kind, mask):
+    flags[kind] |= np.broadcast_to(mask, flags[kind].shape)
+
+def _checked_add(flags, a, b):
+    result = a + b
+    _flag(flags, 'overflow', ((a ^ result) & (b ^ result)) < 0)
+    return result
+
+def _checked_sub(flags, a, b):
+    result = a - b
+    _flag(flags, 'overflow', ((a ^ b) & (a ^ result)) < 0)
+    return result
+
+def _checked_mul(flags, a, b):
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64))
+    result = a * b
+    # Sin desbordamiento, el producto es exacto y result // a == b.
+    quotient = np.floor_divide(result, np.where(a == 0, 1, a))
+    _flag(flags, 'overflow', (a != 0) & ((quotient != b) | ((a == -1) & (b == _INT64_MIN))))
+    return result
+
+def _checked_neg(flags, a):
+    _flag(flags, 'overflow', np.asarray(a) == _INT64_MIN)
+    return -a
+
+def _checked_floordiv(flags, a, b):
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64))
+    _flag(flags, 'div0', b == 0)
+    _flag(flags, 'overflow', (a == _INT64_MIN) & (b == -1))
+    return _floordiv(a, b)
+
+CHECKED_OPS = {
+    '+': _checked_add, '-': _checked_sub, '*': _checked_mul, 'neg': _checked_neg, '/': _checked_floordiv,
+}
@@ -1,19 +1,43 @@
 import argparse
+import contextlib
+import glob
+import io
+import json
 import sys
 import os
+import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 # Importar todos los módulos del compilador
+from compiler import api
 from compiler import parser
 from compiler import generator
 from compiler import optimizer
 from compiler import latex_exporter
-from compiler import polynomial_converter
 from compiler import equation_exporter
+from compiler import size_estimator
+from compiler import cache as compilation_cache
+from compiler import incremental
+from compiler import profiler as compilation_profiler
+from compiler import composition
 
 # --- CONFIGURACIÓN DE SEGURIDAD ---
 # Límite de seguridad para el tamaño total de los archivos generados.
 MAX_OUTPUT_SIZE_GB = 5.0
+# Límite por ecuación para la expansión de C_n en la sección "sin optimizar" del informe.
+MAX_EXPANDED_BYTES = api.DEFAULT_MAX_EXPANDED_BYTES
+# Límite de términos para la expansión canónica de la ecuación única P=0.
+MAX_MASTER_TERMS = api.DEFAULT_MAX_MASTER_TERMS
+# Artefactos que se escriben si no se indica --emit.
+DEFAULT_EMIT = ['interpreter', 'latex']
+# Artefactos que admite --emit: {nombre: descripción}.
+EMIT_ARTIFACTS = {
+    'interpreter': 'entrada del intérprete (_interpreter_input.txt)',
+    'latex': 'informe LaTeX (_full_analysis.tex)',
+    'polynomial': 'ecuación única P=0 en texto (_polynomial.txt)',
+}
 
 def format_bytes(byte_count):
     """Formatea un número de bytes a un string legible (B, KB, MB, GB)."""
@@ -27,18 +51,106 @@ def format_bytes(byte_count):
         n += 1
     return f"{byte_count:.2f} {power_labels[n]}"
 
+def parse_emit(text):
+    """Valor de --emit: lista de artefactos de EMIT_ARTIFACTS, en el orden de ese diccionario."""
+    names = {name.strip() for name in text.split(",") if name.strip()}
+    unknown = sorted(names - set(EMIT_ARTIFACTS))
+    if unknown or not names:
+        raise argparse.ArgumentTypeError(f"artefactos no válidos: {', '.join(unknown) or '(ninguno)'} "
+                                         f"(disponibles: {', '.join(EMIT_ARTIFACTS)})")
+    return [name for name in EMIT_ARTIFACTS if name in names]
+
+def build_cli_parser():
+    """Parser de la línea de comandos (también lo usa compile_server.py para las peticiones)."""
+    cli_parser = argparse.ArgumentParser(description="Compilador C a Ecuación Diophantus.")
+    cli_parser.add_argument("input_files", nargs="+", metavar="input_file",
+                            help="La ruta al archivo .c compatible. Con varios archivos, directorios o patrones "
+                                 "glob se compilan todos por lotes.")
+    cli_parser.add_argument("--emit", type=parse_emit, default=DEFAULT_EMIT, metavar="ARTEFACTOS",
+                            help="Artefactos que se generan, separados por comas: "
+                                 f"{'; '.join(f'{name}: {text}' for name, text in EMIT_ARTIFACTS.items())} "
+                                 f"(por defecto: {','.join(DEFAULT_EMIT)}). Las fases que solo necesitan los "
+                                 "artefactos no pedidos no se ejecutan.")
+    cli_parser.add_argument("--max-output-gb", type=float, default=MAX_OUTPUT_SIZE_GB,
+                            help=f"Presupuesto total de salida en GB (por defecto: {MAX_OUTPUT_SIZE_GB}).")
+    cli_parser.add_argument("--max-expanded-bytes", type=int, default=MAX_EXPANDED_BYTES,
+                            help="Bytes máximos de expansión por ecuación en la sección sin optimizar del informe; "
+                                 f"0 para expandirla por completo (por defecto: {MAX_EXPANDED_BYTES}).")
+    cli_parser.add_argument("--no-optimize-constraints", action="store_true",
+                            help="Conserva el sistema polinómico tal y como lo genera la conversión, sin eliminar "
+                                 "alias, duplicados ni booleanidades implícitas.")
+    cli_parser.add_argument("--reduce-degree", action="store_true",
+                            help="Introduce variables auxiliares para que cada ecuación del sistema tenga grado <= 2 "
+                                 "(y la ecuación única grado <= 4).")
+    cli_parser.add_argument("--max-master-terms", type=int, default=MAX_MASTER_TERMS,
+                            help="Términos máximos al expandir la ecuación única P=0 para calcular sus estadísticas; "
+                                 f"0 para no expandirla (por defecto: {MAX_MASTER_TERMS}).")
+    cli_parser.add_argument("--latex-chunk-size", type=int, default=0,
+                            help="Divide el informe en ficheros de a lo sumo N ecuaciones, incluidos con \\input "
+                                 "desde el documento principal; 0 para un único fichero (por defecto: 0).")
+    cli_parser.add_argument("--latex-workers", type=int, default=1,
+                            help="Procesos para generar en paralelo las secciones del informe paginado (por defecto: 1).")
+    cli_parser.add_argument("--profile", action="store_true",
+                            help="Mide tiempo, CPU y pico de memoria de cada fase y escribe un perfil JSON en "
+                                 "output/<programa>_profile.json.")
+    cli_parser.add_argument("--specialize-invariants", action="store_true",
+                            help="Detecta las variables de estado que nunca cambian partiendo de sus inicializadores "
+                                 "y las sustituye por constantes en todas las ecuaciones (desaparecen del estado).")
+    cli_parser.add_argument("--only", type=lambda text: [var.strip() for var in text.split(",") if var.strip()],
+                            metavar="VARS",
+                            help="Solo las variables de estado indicadas (p. ej. 'b,c') y las que influyen en ellas: "
+                                 "el resto se descarta antes de optimizar, convertir y exportar.")
+    cli_parser.add_argument("--steps", type=int, default=1,
+                            help="Genera además F^k, el estado tras k ticks en función del estado inicial y de las "
+                                 "entradas de cada tick, en output/<programa>_k<k>_interpreter_input.txt y "
+                                 "_k<k>_polynomial.txt (por defecto: 1, sin composición).")
+    cli_parser.add_argument("--no-cache", action="store_true",
+                            help="Recalcula todas las fases sin leer ni escribir la caché de compilación.")
+    cli_parser.add_argument("--cache-dir", default=compilation_cache.DEFAULT_CACHE_DIR,
+                            help=f"Directorio de la caché de compilación (por defecto: {compilation_cache.DEFAULT_CACHE_DIR}).")
+    cli_parser.add_argument("--cache-stats", action="store_true",
+                            help="Muestra los aciertos y fallos de la caché por fase al terminar.")
+    cli_parser.add_argument("--watch", action="store_true",
+                            help="Vigila el fichero fuente y lo recompila cada vez que cambia, convirtiendo a "
+                                 "polinomios y renderizando solo las ecuaciones que han cambiado.")
+    cli_parser.add_argument("--watch-interval", type=float, default=0.5,
+                            help="Segundos entre comprobaciones del fichero en modo --watch (por defecto: 0.5).")
+    cli_parser.add_argument("--jobs", type=int, default=1,
+                            help="Procesos para la compilación por lotes (por defecto: 1).")
+    cli_parser.add_argument("--summary", default=os.path.join("output", "batch_summary.json"),
+                            help="Ruta del resumen JSON de la compilación por lotes (por defecto: output/batch_summary.json).")
+    return cli_parser
+
 def main():
     """Punto de entrada principal del compilador Diophantus."""
-    cli_parser = argparse.ArgumentParser(description="Compilador C a Ecuación Diophantus.")
-    cli_parser.add_argument("input_file", help="La ruta al archivo .c compatible.")
-    args = cli_parser.parse_args()
+    args = build_cli_parser().parse_args()
+
+    input_files = expand_inputs(args.input_files)
+    if not input_files:
+        print(f"\n--- ERROR: Ningún archivo .c coincide con: {' '.join(args.input_files)}", file=sys.stderr)
+        sys.exit(1)
+    if len(input_files) > 1 or args.jobs > 1:
+        if args.watch:
+            print("\n--- ERROR: --watch solo admite un archivo de entrada.", file=sys.stderr)
+            sys.exit(1)
+        run_batch(args, input_files)
+        return
+    args.input_file = input_files[0]
 
     print(f"--- [Project Diophantus] Iniciando compilación de: {args.input_file} ---")
 
-    # --- Definir rutas de salida ---
+    final_tex_path, interpreter_input_path = output_paths(args.input_file)
+    cache = compilation_cache.CompilationCache(args.cache_dir, enabled=not args.no_cache)
+    if args.watch:
+        run_watch(args, final_tex_path, interpreter_input_path, cache)
+    else:
+        compile_file(args, final_tex_path, interpreter_input_path, cache)
+
+def output_paths(input_file):
+    """Crea la carpeta 'output' y devuelve las rutas (informe .tex, entrada del intérprete)."""
     try:
         os.makedirs("output", exist_ok=True)
-        base_name = os.path.basename(args.input_file)
+        base_name = os.path.basename(input_file)
         base_filename = os.path.splitext(base_name)[0]
         
         # Artefacto principal para humanos
@@ -51,26 +163,146 @@ def main():
         print(f"\n--- ERROR DE SISTEMA DE ARCHIVOS ---", file=sys.stderr)
         print(f"No se pudo crear el directorio de salida 'output': {e}", file=sys.stderr)
         sys.exit(1)
+    return final_tex_path, interpreter_input_path
+
+def compile_file(args, final_tex_path, interpreter_input_path, cache, session=None, index=None):
+    """
+    Ejecuta el pipeline completo (fases 1-7) sobre args.input_file.
 
+    Args:
+        cache (CompilationCache): Caché de resultados intermedios.
+        session (WatchSession, opcional): Estado del modo --watch (analizador en
+            caliente y memo de líneas del informe).
+        index (clang.cindex.Index, opcional): Índice de libclang a reutilizar.
+
+    Returns:
+        dict: Resumen de la compilación (tamaños y recuentos), o
+        {'file': ..., 'status': 'unchanged'} si en modo --watch la lógica no
+        había cambiado y no se ha regenerado nada.
+    """
+    profile = compilation_profiler.CompilationProfiler(enabled=args.profile)
     try:
         # FASES 1-3: Análisis, Generación y Optimización
         print("\n[Fase 1-3] Analizando, Generando y Optimizando...")
-        ast_map = parser.parse_c_file(args.input_file)
-        unoptimized_f, input_vars = generator.generate_function(ast_map)
-        opt = optimizer.Optimizer(unoptimized_f)
-        optimized_f, sub_defs = opt.optimize()
-
-        # FASE 4: CONVERSIÓN A SISTEMA POLINÓMICO
-        print("\n[Fase 4] Convirtiendo a sistema de ecuaciones puras...")
-        poly_conv = polynomial_converter.PolynomialConverter(optimized_f, sub_defs)
-        poly_system = poly_conv.convert()
-        poly_converter_info = {
-            'existential_vars_count': poly_conv.existential_vars_count,
-            'num_equations': len(poly_system)
-        }
+        profile.phase('parse')
+        # Cada fase se carga de la caché si sus entradas (y el código que la
+        # implementa) no han cambiado desde la última compilación.
+        with open(args.input_file, "rb") as f:
+            source = f.read()
+        source_key = cache.key('parse', source, parser.CLANG_ARGS,
+                               compilation_cache.file_signatures([parser.libclang_path()]))
+        parse = session.parser.parse if session else (lambda: parser.parse_c_file(args.input_file, index))
+        ast_map, parse_key = cache.get_or_compute_tracked('parse', source_key, parse,
+                                                          lambda ast_map: ast_map.get('includes', []))
+        if session and not session.logic_changed(ast_map):
+            print("  [Watch] La lógica del programa no ha cambiado; los artefactos siguen vigentes.")
+            profile.finish()
+            return {'file': args.input_file, 'status': 'unchanged'}
+        profile.phase('generate')
+        generate_key = cache.key('generate', parse_key)
+        unoptimized_f, input_vars = cache.get_or_compute('generate', generate_key, lambda: generator.generate_function(ast_map))
+        try:
+            unoptimized_f, state_vars, input_vars, constant_state_vars, pruned_state_vars = api.restrict_function(
+                unoptimized_f, ast_map['state_vars'], input_vars, ast_map.get('initial_values', {}),
+                args.specialize_invariants, args.only)
+        except ValueError as e:
+            print(f"\n--- ERROR: --only: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.specialize_invariants:
+            print(f"  [Invariants] Variables de estado constantes: "
+                  f"{', '.join(f'{var} = {value}' for var, value in constant_state_vars.items()) or 'ninguna'}.")
+        if args.only:
+            print(f"  [Slicing] Cono de influencia de {', '.join(args.only)}: {len(state_vars)} de "
+                  f"{len(state_vars) + len(pruned_state_vars)} variables de estado. "
+                  f"Descartadas: {', '.join(pruned_state_vars) or 'ninguna'}.")
+        profile.phase('optimize')
+        specialization = [state_vars, sorted(constant_state_vars.items())] if args.only or constant_state_vars else []
+        optimize_key = cache.key('optimize', generate_key, *specialization)
+        optimized_f, sub_defs = cache.get_or_compute('optimize', optimize_key, lambda: optimizer.Optimizer(unoptimized_f).optimize())
+
+        # FASE 4: CONVERSIÓN A SISTEMA POLINÓMICO (solo si se pide un artefacto que la use)
+        emit = args.emit
+        # La expansión de la ecuación única solo aporta estadísticas al informe.
+        poly_options = (not args.no_optimize_constraints, args.reduce_degree,
+                        args.max_master_terms if 'latex' in emit else 0)
+        poly_system, poly_converter_info = None, None
+        if 'latex' in emit or 'polynomial' in emit:
+            print("\n[Fase 4] Convirtiendo a sistema de ecuaciones puras...")
+            profile.phase('poly')
+            poly_key = cache.key('poly', optimize_key, poly_options)
+            memo = session.conversion_cache if session else None
+            if memo:
+                memo.begin()
+            poly_system, poly_converter_info = cache.get_or_compute(
+                'poly', poly_key, lambda: api.convert_to_polynomial_system(optimized_f, sub_defs, *poly_options, memo))
+            if memo and (memo.converted or memo.reused):
+                print(f"  [Watch] Ecuaciones convertidas a polinomios: {memo.converted}, reutilizadas: {memo.reused}.")
+                memo.end()
+        else:
+            print("\n[Fase 4] Omitida: no se ha pedido el informe ni la ecuación única (--emit).")
+        if session:
+            session.record(ast_map, unoptimized_f, sub_defs, poly_system or [])
+            session.render_cache.begin(sub_defs)
         
-        # FASE 5: ENSAMBLAJE DE ARTEFACTOS (en memoria)
-        print("\n[Fase 5] Ensamblando todos los artefactos para la salida...")
+        # FASE 5: ANÁLISIS DE TAMAÑO Y SEGURIDAD (antes de generar ningún artefacto)
+        print("\n[Fase 5] Estimando tamaño de salida y realizando control de seguridad...")
+        profile.phase('estimate')
+        limit_bytes = args.max_output_gb * (1024**3)
+        estimator = size_estimator.SizeEstimator(unoptimized_f, optimized_f, sub_defs, state_vars)
+        size_interpreter = estimator.interpreter_size() if 'interpreter' in emit else 0
+        # La ecuación única en texto, con el salto de línea final.
+        size_polynomial = estimator.single_polynomial_size(poly_system) + 1 if 'polynomial' in emit else 0
+
+        # Si el informe no cabe en el presupuesto, se omiten sus secciones más
+        # grandes (de mayor a menor) hasta que quepa.
+        omitted_sections = {}
+        max_expanded_bytes = args.max_expanded_bytes or None
+        chunking = None
+        if args.latex_chunk_size > 0:
+            chunk_dir = latex_exporter.LatexExporter.chunk_dir_for(final_tex_path)
+            chunking = (os.path.basename(chunk_dir), args.latex_chunk_size)
+        size_tex = 0
+        while 'latex' in emit:
+            report_exporter = latex_exporter.LatexExporter(
+                unoptimized_f, optimized_f, sub_defs, state_vars, input_vars,
+                poly_system, None, poly_converter_info, omitted_sections, max_expanded_bytes,
+                session.render_cache if session else None, pruned_state_vars, constant_state_vars
+            )
+            section_sizes = estimator.latex_section_sizes(report_exporter, chunking)
+            size_tex = sum(section_sizes.values())
+            candidates = [name for name in latex_exporter.OMITTABLE_SECTIONS if name not in omitted_sections]
+            if size_tex + size_interpreter + size_polynomial <= limit_bytes or not candidates:
+                break
+            largest = max(candidates, key=section_sizes.get)
+            omitted_sections[largest] = section_sizes[largest]
+            print(f"  - AVISO: Se omite la sección '{latex_exporter.OMITTABLE_SECTIONS[largest]}' "
+                  f"({format_bytes(section_sizes[largest])}) para respetar el límite de tamaño.")
+
+        total_size = size_tex + size_interpreter + size_polynomial
+        polynomial_path = interpreter_input_path.replace("_interpreter_input.txt", "_polynomial.txt")
+
+        print(f"  - Se generarán {len(emit)} archivos principales en la carpeta 'output/':")
+        if 'latex' in emit:
+            if chunking:
+                print(f"    - Informe LaTeX paginado (.tex):  {format_bytes(size_tex)} (en '{chunk_dir}/')")
+            else:
+                print(f"    - Informe LaTeX (.tex):           {format_bytes(size_tex)}")
+        if 'interpreter' in emit:
+            print(f"    - Entrada para Intérprete (.txt): {format_bytes(size_interpreter)}")
+        if 'polynomial' in emit:
+            print(f"    - Ecuación única P=0 (.txt):      {format_bytes(size_polynomial)}")
+        print(f"  --------------------------------------------------")
+        print(f"  - ESPACIO TOTAL REQUERIDO: {format_bytes(total_size)}")
+
+        if total_size > limit_bytes:
+            print(f"\n--- ERROR DE SEGURIDAD: LÍMITE DE TAMAÑO EXCEDIDO ---", file=sys.stderr)
+            print(f"El tamaño total de salida ({format_bytes(total_size)}) excede el límite de seguridad de {args.max_output_gb} GB.", file=sys.stderr)
+            sys.exit(1)
+        print("  - Comprobación de seguridad superada.")
+
+        # FASE 6: ENSAMBLAJE DE ARTEFACTOS (en memoria)
+        print("\n[Fase 6] Ensamblando todos los artefactos para la salida...")
+        profile.phase('assemble')
         
         # Instanciar el exportador de ecuaciones, que actúa como un helper de formato
         # --- CORRECCIÓN: Se añade el argumento 'state_vars' que ahora es requerido ---
@@ -78,53 +310,96 @@ def main():
             unoptimized_f, 
             optimized_f, 
             sub_defs, 
-            ast_map['state_vars'] # <-- Aquí se pasa la lista de variables de estado
+            state_vars # <-- Aquí se pasa la lista de variables de estado
         )
         
         # Generar el contenido para el intérprete
-        interpreter_input_content = eq_exp.export_optimized_for_interpreter()
-        
-        # Generar el contenido para el informe LaTeX
-        single_poly_from_system = eq_exp.export_single_polynomial(poly_system)
-        report_exporter = latex_exporter.LatexExporter(
-            unoptimized_f, optimized_f, sub_defs, ast_map['state_vars'], input_vars,
-            poly_system, single_poly_from_system, poly_converter_info
-        )
-        final_latex_content = report_exporter.export()
+        if 'interpreter' in emit:
+            interpreter_input_content = eq_exp.export_optimized_for_interpreter()
+            if len(interpreter_input_content.encode('utf-8')) != size_interpreter:
+                print("  - AVISO: El tamaño de la entrada del intérprete no coincide con la estimación previa.", file=sys.stderr)
 
-        # FASE 6: ANÁLISIS DE TAMAÑO Y SEGURIDAD
-        print("\n[Fase 6] Analizando tamaño de salida y realizando control de seguridad...")
+        # La ecuación única se construye una sola vez para el informe y para su fichero.
+        single_poly = None
+        if 'polynomial' in emit or ('latex' in emit and chunking is None and 'single_poly' not in omitted_sections):
+            single_poly = eq_exp.export_single_polynomial(poly_system)
         
-        size_tex = len(final_latex_content.encode('utf-8'))
-        size_interpreter = len(interpreter_input_content.encode('utf-8'))
-        total_size = size_tex + size_interpreter
-
-        print(f"  - Se generarán 2 archivos principales en la carpeta 'output/':")
-        print(f"    - Informe LaTeX (.tex):           {format_bytes(size_tex)}")
-        print(f"    - Entrada para Intérprete (.txt): {format_bytes(size_interpreter)}")
-        print(f"  --------------------------------------------------")
-        print(f"  - ESPACIO TOTAL REQUERIDO: {format_bytes(total_size)}")
-
-        limit_bytes = MAX_OUTPUT_SIZE_GB * (1024**3)
-        if total_size > limit_bytes:
-            print(f"\n--- ERROR DE SEGURIDAD: LÍMITE DE TAMAÑO EXCEDIDO ---", file=sys.stderr)
-            print(f"El tamaño total de salida ({format_bytes(total_size)}) excede el límite de seguridad de {MAX_OUTPUT_SIZE_GB} GB.", file=sys.stderr)
-            sys.exit(1)
-        print("  - Comprobación de seguridad superada.")
+        # Generar el contenido para el informe LaTeX (en modo paginado se genera
+        # y escribe por partes en la fase 7, sin construir el documento completo)
+        if 'latex' in emit and chunking is None:
+            if 'single_poly' not in omitted_sections:
+                report_exporter.single_poly_equation = single_poly
+            final_latex_content = report_exporter.export()
+            if len(final_latex_content.encode('utf-8')) != size_tex:
+                print("  - AVISO: El tamaño del informe no coincide con la estimación previa.", file=sys.stderr)
 
         # FASE 7: ESCRITURA EN DISCO
         print("\n[Fase 7] Escribiendo archivos finales en disco...")
+        profile.phase('write')
         
-        with open(final_tex_path, "w", encoding="utf-8") as f:
-            f.write(final_latex_content)
-        print(f"  -> Informe completo guardado en: {final_tex_path}")
+        written_paths = []
+        if 'latex' in emit:
+            if chunking is None:
+                compilation_cache.write_atomic(final_tex_path, final_latex_content)
+                written_paths = [final_tex_path]
+            else:
+                written_paths = report_exporter.export_chunked(final_tex_path, args.latex_chunk_size, args.latex_workers)
+                if sum(os.path.getsize(path) for path in written_paths) != size_tex:
+                    print("  - AVISO: El tamaño del informe no coincide con la estimación previa.", file=sys.stderr)
+                print(f"  -> {len(written_paths) - 1} páginas del informe guardadas en: {chunk_dir}")
+            print(f"  -> Informe completo guardado en: {final_tex_path}")
         
-        with open(interpreter_input_path, "w", encoding="utf-8") as f:
-            f.write(interpreter_input_content)
-        print(f"  -> Archivo para intérprete guardado en: {interpreter_input_path}")
+        if 'interpreter' in emit:
+            compilation_cache.write_atomic(interpreter_input_path, interpreter_input_content)
+            written_paths.append(interpreter_input_path)
+            print(f"  -> Archivo para intérprete guardado en: {interpreter_input_path}")
+        if 'polynomial' in emit:
+            compilation_cache.write_atomic(polynomial_path, single_poly + "\n")
+            written_paths.append(polynomial_path)
+            print(f"  -> Ecuación única guardada en: {polynomial_path}")
+        if session:
+            cache_lines = session.render_cache
+            print(f"  [Watch] Líneas del informe reutilizadas: {cache_lines.reused}, regeneradas: {cache_lines.rendered}.")
+            cache_lines.end()
+        composed = None
+        if args.steps > 1:
+            profile.phase('compose')
+            composed = write_composition(args, unoptimized_f, state_vars, input_vars, poly_options)
+            written_paths.extend(composed['paths'])
+        profile.finish()
         
-        print("\n--- Compilación exitosa ---")
+        if args.cache_stats:
+            print("\n" + cache.format_stats())
 
+        summary = {
+            'file': args.input_file,
+            'tex_path': final_tex_path if 'latex' in emit else None,
+            'interpreter_path': interpreter_input_path if 'interpreter' in emit else None,
+            'tex_bytes': size_tex,
+            'interpreter_bytes': size_interpreter,
+            'state_vars': len(state_vars),
+            'cse_definitions': len(sub_defs),
+            'equations': poly_converter_info['num_equations'] if poly_converter_info else None,
+            'existential_vars': poly_converter_info['existential_vars_count'] if poly_converter_info else None,
+        }
+        if emit != DEFAULT_EMIT:
+            summary['emit'] = emit
+        if 'polynomial' in emit:
+            summary['polynomial_path'] = polynomial_path
+            summary['polynomial_bytes'] = size_polynomial
+        if args.specialize_invariants:
+            summary['constant_state_vars'] = constant_state_vars
+        if args.only:
+            summary['pruned_state_vars'] = pruned_state_vars
+        if composed:
+            summary['composition'] = composed
+        if args.profile:
+            summary['profile'] = write_profile(profile, args.input_file, summary, ast_map, unoptimized_f,
+                                               optimized_f, sub_defs, written_paths, cache)
+            print(f"  -> Perfil de la compilación guardado en: {summary['profile']}")
+
+        print("\n--- Compilación exitosa ---")
+        return summary
     except FileNotFoundError:
         print(f"\n--- ERROR: Archivo no encontrado: {args.input_file}", file=sys.stderr)
         sys.exit(1)
@@ -134,5 +409,210 @@ def main():
         traceback.print_exc(file=sys.stderr)
         sys.exit(1)
 
+def write_profile(profile, input_file, summary, ast_map, unoptimized_f, optimized_f, sub_defs, written_paths, cache):
+    """
+    Completa el perfil de la compilación con los contadores estructurales y los
+    bytes de cada artefacto, y lo escribe en output/<programa>_profile.json.
+
+    Returns:
+        str: Ruta del perfil.
+    """
+    profile.count(**compilation_profiler.structural_counters(ast_map, unoptimized_f, optimized_f, sub_defs))
+    profile.count(cse_definitions=summary['cse_definitions'],
+                  existential_vars=summary['existential_vars'],
+                  constraints=summary['equations'])
+    artifacts = {path: os.path.getsize(path) for path in written_paths}
+    profile_path = os.path.join("output", f"{os.path.splitext(os.path.basename(input_file))[0]}_profile.json")
+    profile.write(profile_path, input_file, {'artifact_bytes': artifacts, 'cache': cache.stats})
+    return profile_path
+
+def write_composition(args, unoptimized_f, state_vars, input_vars, poly_options):
+    """
+    Compone F consigo misma args.steps veces (compiler.composition) y escribe
+    F^k en el formato del intérprete y como sistema polinómico.
+
+    Returns:
+        dict: Tamaño de F^k y rutas escritas.
+    """
+    k = args.steps
+    print(f"\n[Composición] Generando F^{k} por cuadrados repetidos...")
+    composed = composition.compose_function(
+        unoptimized_f, state_vars, input_vars, k,
+        on_step=lambda partial: print(f"  [Composition] F^{partial.ticks}: {partial.stats()['dag_nodes']} nodos en el DAG"))
+    composed_f, composed_defs = composed.export()
+    stats = composed.stats()
+    stats['cse_definitions'] = len(composed_defs)
+
+    base_filename = os.path.splitext(os.path.basename(args.input_file))[0]
+    interpreter_path = os.path.join("output", f"{base_filename}_k{k}_interpreter_input.txt")
+    poly_path = os.path.join("output", f"{base_filename}_k{k}_polynomial.txt")
+    exporter = equation_exporter.EquationExporter(composed_f, composed_f, composed_defs, state_vars)
+    compilation_cache.write_atomic(interpreter_path, exporter.export_optimized_for_interpreter())
+    # Sin la expansión de la ecuación única: crece demasiado con el horizonte.
+    poly_system, poly_info = api.convert_to_polynomial_system(composed_f, composed_defs, poly_options[0], poly_options[1], 0)
+    compilation_cache.write_atomic(poly_path, "\n".join(poly_system) + "\n")
+    stats['equations'] = poly_info['num_equations']
+    stats['existential_vars'] = poly_info['existential_vars_count']
+    stats['paths'] = [interpreter_path, poly_path]
+    print(f"  -> F^{k}: {stats['dag_nodes']} nodos ({stats['expanded_tree_nodes']} expandidos), "
+          f"{stats['cse_definitions']} C_n, {stats['equations']} ecuaciones, {stats['existential_vars']} variables existenciales.")
+    print(f"  -> Archivos de F^{k} guardados en: {interpreter_path}, {poly_path}")
+    return stats
+
+def run_watch(args, final_tex_path, interpreter_input_path, cache):
+    """
+    Modo --watch: recompila cada vez que cambia el fichero fuente, manteniendo
+    libclang en caliente. La conversión a polinomios y las líneas del informe
+    se reutilizan para cada ecuación que no ha cambiado; el análisis, la CSE,
+    la simplificación de restricciones y la ecuación maestra son pasadas
+    globales y se repiten para todo el programa.
+    """
+    session = incremental.WatchSession(args.input_file)
+    print(f"--- [Watch] Vigilando {args.input_file} (Ctrl+C para salir) ---")
+    try:
+        while True:
+            session.wait_for_change(args.watch_interval)
+            print(f"\n--- [Watch] Cambio detectado en {args.input_file} ({time.strftime('%H:%M:%S')}) ---")
+            try:
+                compile_file(args, final_tex_path, interpreter_input_path, cache, session)
+            except SystemExit:
+                # Un error de compilación no detiene la vigilancia: se espera al siguiente cambio.
+                print("--- [Watch] Compilación fallida; esperando el siguiente cambio ---", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("\n--- [Watch] Finalizado ---")
+
+def expand_inputs(patterns):
+    """
+    Expande las entradas de la línea de comandos: los directorios aportan sus
+    archivos .c y los patrones glob sus coincidencias. Se conserva el orden y
+    se eliminan los duplicados.
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(sorted(glob.glob(os.path.join(pattern, "*.c"))))
+        elif glob.has_magic(pattern):
+            files.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            files.append(pattern)
+    return list(dict.fromkeys(files))
+
+def run_batch(args, input_files):
+    """
+    Compila varios programas en paralelo, uno por tarea de un ProcessPool, y
+    escribe un resumen JSON. Un fallo (incluso la caída de un proceso) solo
+    afecta al archivo que lo provoca.
+    """
+    jobs = max(1, args.jobs)
+    print(f"--- [Project Diophantus] Compilación por lotes de {len(input_files)} archivos ({jobs} procesos) ---")
+    start = time.perf_counter()
+    results = {}
+    pending = list(input_files)
+    # Primera ronda con todos los procesos; si uno muere, el pool entero queda
+    # inutilizable, así que los archivos afectados se repiten de uno en uno para
+    # identificar al culpable.
+    for workers, isolated in ((jobs, False), (1, True)):
+        if not pending:
+            break
+        retry = []
+        groups = [[f] for f in pending] if isolated else [pending]
+        for group in groups:
+            with ProcessPoolExecutor(max_workers=min(workers, len(group)), initializer=init_worker) as executor:
+                futures = {executor.submit(compile_in_worker, args, f): f for f in group}
+                for future in as_completed(futures):
+                    input_file = futures[future]
+                    try:
+                        results[input_file] = future.result()
+                    except BrokenProcessPool as e:
+                        if isolated:
+                            results[input_file] = {'file': input_file, 'status': 'error',
+                                                   'error': f"El proceso de compilación terminó abruptamente: {e}"}
+                        else:
+                            retry.append(input_file)
+                            continue
+                    _print_batch_result(results[input_file])
+        pending = retry
+
+    entries = [results[f] for f in input_files]
+    failed = [e for e in entries if e['status'] != 'ok']
+    summary = {
+        'jobs': jobs,
+        'wall_seconds': round(time.perf_counter() - start, 3),
+        'succeeded': len(entries) - len(failed),
+        'failed': len(failed),
+        'files': entries,
+    }
+    os.makedirs(os.path.dirname(args.summary) or ".", exist_ok=True)
+    compilation_cache.write_atomic(args.summary, json.dumps(summary, indent=2, ensure_ascii=False) + "\n")
+    print(f"\n--- Lote completado en {summary['wall_seconds']:.2f} s: {summary['succeeded']} correctos, "
+          f"{summary['failed']} fallidos. Resumen en: {args.summary} ---")
+    if failed:
+        sys.exit(1)
+
+# Estado compartido por todas las compilaciones de un proceso trabajador (lote
+# o servidor): el índice de libclang y las entradas de caché ya cargadas.
+_WORKER_INDEX = None
+_WORKER_MEMORY = None
+
+def init_worker():
+    """Inicializador de los procesos trabajadores del lote y del servidor de compilación."""
+    global _WORKER_INDEX, _WORKER_MEMORY
+    _WORKER_INDEX = parser.create_index()
+    _WORKER_MEMORY = compilation_cache.MemoryCache()
+
+def compile_in_worker(args, input_file, cwd=None, capture_output=False):
+    """
+    Compila un archivo dentro de un proceso trabajador, capturando su salida y
+    sus errores.
+
+    Args:
+        cwd (str, opcional): Directorio de trabajo de la compilación (las rutas
+            de salida son relativas a él).
+        capture_output (bool): Incluir en el resultado la salida completa.
+    """
+    file_args = argparse.Namespace(**vars(args))
+    file_args.input_file = input_file
+    log = io.StringIO()
+    start = time.perf_counter(); cpu_start = time.process_time()
+    try:
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            if cwd:
+                os.chdir(cwd)
+            final_tex_path, interpreter_input_path = output_paths(input_file)
+            cache = compilation_cache.CompilationCache(args.cache_dir, enabled=not args.no_cache, memory=_WORKER_MEMORY)
+            result = compile_file(file_args, final_tex_path, interpreter_input_path, cache, index=_WORKER_INDEX)
+        result.setdefault('status', 'ok')
+    except (SystemExit, Exception) as e:
+        result = {'file': input_file, 'status': 'error', 'error': _last_error_message(log.getvalue()) or repr(e)}
+        log_path = os.path.join("output", f"{os.path.splitext(os.path.basename(input_file))[0]}_build.log")
+        try:
+            compilation_cache.write_atomic(log_path, log.getvalue())
+            result['log'] = log_path
+        except OSError:
+            pass
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    result['cpu_seconds'] = round(time.process_time() - cpu_start, 3)
+    if capture_output:
+        result['output'] = log.getvalue()
+    return result
+
+def _last_error_message(log_text):
+    """Primera línea con contenido tras la última cabecera '--- ERROR' del registro."""
+    lines = log_text.splitlines()
+    headers = [i for i, line in enumerate(lines) if line.startswith("--- ERROR")]
+    if not headers:
+        return None
+    header = lines[headers[-1]]
+    detail = next((line.strip() for line in lines[headers[-1] + 1:] if line.strip()), "")
+    return f"{header.strip('- ')}: {detail}" if detail else header.strip('- ')
+
+def _print_batch_result(result):
+    if result['status'] == 'ok':
+        equations = f"{result['equations']} ecuaciones, " if result['equations'] is not None else ""
+        print(f"  [OK]    {result['file']} ({result['seconds']:.2f} s, {equations}"
+              f"{format_bytes(result['tex_bytes'] + result['interpreter_bytes'] + result.get('polynomial_bytes', 0))})")
+    else:
+        print(f"  [ERROR] {result['file']}: {result['error']}", file=sys.stderr)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+API de biblioteca del compilador (compile_program / Compilation).
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import unittest
+
+SOURCE = ("int x = 0, y = 5;\n"
+          "int main() { for (;;) { if (x < 10) { x = x + 1; } else { x = 0; } y = y - x; } }\n")
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+class CompilationTest(unittest.TestCase):
+
+    def compile(self, **options):
+        from compiler import compile_program
+        try:
+            program = compile_program(SOURCE, **options)
+            quiet(lambda: program.f)
+        except (ImportError, SystemExit, RuntimeError) as e:
+            self.skipTest(f"libclang no disponible: {e}")
+        return program
+
+    def test_single_polynomial_does_not_expand_master(self):
+        program = self.compile()
+        quiet(lambda: program.single_polynomial)
+        self.assertNotIn('master', program.computed())
+        self.assertNotIn('latex', program.computed())
+
+    def test_report_expands_master(self):
+        program = self.compile()
+        quiet(lambda: program.latex)
+        self.assertIn('master', program.computed())
+        self.assertEqual(program.poly_info['master_polynomial'], program.master_polynomial)
+
+    def test_master_expansion_can_be_disabled(self):
+        program = self.compile(max_master_terms=0)
+        self.assertIsNone(quiet(lambda: program.master_polynomial))
+        self.assertNotIn('master_polynomial', quiet(lambda: program.poly_info))
+
+
+if __name__ == "__main__":
+    unittest.main()
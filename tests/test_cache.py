@@ -0,0 +1,92 @@
+"""
+Caché de compilación y escritura atómica de artefactos.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import os
+import stat
+import tempfile
+import unittest
+
+from compiler import cache
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return function(*args, **kwargs)
+
+@unittest.skipUnless(hasattr(os, "fchmod"), "Sin permisos POSIX")
+class WriteAtomicTest(unittest.TestCase):
+
+    def mode(self, path):
+        return stat.S_IMODE(os.stat(path).st_mode)
+
+    def test_new_file_gets_open_mode(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "informe.tex")
+            cache.write_atomic(path, "x")
+            self.assertEqual(self.mode(path), 0o666 & ~cache._UMASK)
+
+    def test_existing_file_keeps_its_mode(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "informe.tex")
+            with open(path, "w") as f:
+                f.write("viejo")
+            os.chmod(path, 0o640)
+            cache.write_atomic(path, b"nuevo")
+            self.assertEqual(self.mode(path), 0o640)
+            with open(path) as f:
+                self.assertEqual(f.read(), "nuevo")
+
+@unittest.skipUnless(hasattr(os, "getuid"), "Sin propietarios POSIX")
+class PrivateCacheDirTest(unittest.TestCase):
+
+    def store_and_load(self, cache_dir):
+        """Guarda una entrada y la vuelve a pedir con otra instancia: (valor, llamadas a compute)."""
+        calls = []
+        def compute():
+            calls.append(1)
+            return {'x': 1}
+        first = cache.CompilationCache(cache_dir)
+        quiet(first.get_or_compute, 'generate', 'k', compute)
+        second = cache.CompilationCache(cache_dir)
+        return quiet(second.get_or_compute, 'generate', 'k', compute), len(calls)
+
+    def test_entries_are_reused_from_a_private_dir(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "cache")
+            self.assertEqual(self.store_and_load(cache_dir), ({'x': 1}, 1))
+            self.assertEqual(stat.S_IMODE(os.stat(cache_dir).st_mode), 0o700)
+
+    def test_shared_dir_is_made_private(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "cache")
+            os.mkdir(cache_dir)
+            os.chmod(cache_dir, 0o777)
+            self.assertEqual(self.store_and_load(cache_dir), ({'x': 1}, 1))
+            self.assertEqual(stat.S_IMODE(os.stat(cache_dir).st_mode), 0o700)
+
+    def test_symlinked_dir_is_refused(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            target = os.path.join(tmp, "otro")
+            os.mkdir(target)
+            cache_dir = os.path.join(tmp, "cache")
+            os.symlink(target, cache_dir)
+            self.assertEqual(self.store_and_load(cache_dir), ({'x': 1}, 2))
+            self.assertEqual(os.listdir(target), [])
+
+    @unittest.skipUnless(os.getuid() == 0, "Cambiar el propietario requiere root")
+    def test_entries_of_other_users_are_not_unpickled(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "cache")
+            owner = cache.CompilationCache(cache_dir)
+            quiet(owner.get_or_compute, 'generate', 'k', lambda: {'x': 1})
+            os.chown(owner._entry_path('generate', 'k'), 65534, -1)
+            reader = cache.CompilationCache(cache_dir)
+            value = quiet(reader.get_or_compute, 'generate', 'k', lambda: {'x': 2})
+            self.assertEqual(value, {'x': 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Composición de F consigo misma (--compose-steps): F^k frente a k pasos del
+evaluador de referencia.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import os
+import random
+import unittest
+
+from compiler.composition import INPUT_TICK_FORMAT, ExpressionDAG, compose_function
+from interpreter.interpreter import EquationEngine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HORIZONS = [1, 2, 5, 6]
+STARTS = 15
+INPUT_VALUES = [0, 1, 105, 107, 115, 119]
+
+# x[t+1] descarta (10 / d) * 0, pero el evaluador de referencia la calcula: con d = 0 el tick falla.
+DIVISION_F = {
+    'x': ('+', 'x', ('*', ('/', 10, 'd'), 0)),
+    'y': ('if', 0, ('/', 1, 'd'), ('&&', ('/', 7, 'd'), 0)),
+    'd': ('-', 'd', 1),
+}
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+def composed_engine(f_function, state_vars, input_vars, k):
+    composed_f, composed_defs = compose_function(f_function, state_vars, input_vars, k).export()
+    tick_inputs = [INPUT_TICK_FORMAT.format(name=name, tick=i) for i in range(k) for name in input_vars]
+    return quiet(EquationEngine.from_ir, composed_f, composed_defs, state_vars, tick_inputs)
+
+
+class ExpressionDAGTest(unittest.TestCase):
+
+    def test_operands_that_may_divide_by_zero_are_kept(self):
+        dag = ExpressionDAG()
+        for expr in [('*', ('/', 1, 'd'), 0), ('&&', 0, ('/', 7, 'd')), ('||', 1, ('/', 7, 'd')),
+                     ('if', 0, ('/', 1, 'd'), 'y'), ('/', 4, 0)]:
+            with self.subTest(expr=expr):
+                self.assertEqual(dag.to_tuple(dag.from_tuple(expr, dag.leaf)), expr)
+        for expr, folded in [(('*', ('/', 'x', 2), 0), 0), (('&&', 0, 'x'), 0), (('||', 'x', 3), 1),
+                             (('if', 1, 'x', ('/', 'y', 2)), 'x')]:
+            with self.subTest(expr=expr):
+                self.assertEqual(dag.to_tuple(dag.from_tuple(expr, dag.leaf)), folded)
+
+
+class ComposedFunctionTest(unittest.TestCase):
+
+    def test_matches_k_reference_steps(self):
+        from compiler import compile_program
+        rng = random.Random(0)
+        for name in ("pong.c", "simple_counter.c"):
+            try:
+                program = compile_program(os.path.join(ROOT, "examples", name))
+                reference = quiet(program.engine)
+            except (ImportError, SystemExit, RuntimeError) as e:
+                self.skipTest(f"libclang no disponible: {e}")
+            input_vars = sorted(program.input_vars)
+            for k in HORIZONS:
+                engine = composed_engine(program.f, program.state_vars, input_vars, k)
+                state = {var: program.ast_map.get('initial_values', {}).get(var, 0) for var in program.state_vars}
+                for _ in range(STARTS):
+                    inputs = [{var: rng.choice(INPUT_VALUES) for var in input_vars} for _ in range(k)]
+                    expected = dict(state)
+                    for symbol in inputs:
+                        expected.update(reference.compute_next_state(expected, symbol))
+                    tick_inputs = {INPUT_TICK_FORMAT.format(name=var, tick=i): value
+                                   for i, symbol in enumerate(inputs) for var, value in symbol.items()}
+                    with self.subTest(program=name, k=k, state=dict(state)):
+                        self.assertEqual({**state, **engine.compute_next_state(state, tick_inputs)}, expected)
+                    state = expected
+
+    def test_division_by_zero_in_any_tick_is_kept(self):
+        state_vars = ['x', 'y', 'd']
+        reference = quiet(EquationEngine.from_ir, DIVISION_F, {}, state_vars, [])
+        for k in HORIZONS:
+            engine = composed_engine(DIVISION_F, state_vars, [], k)
+            for d in range(-2, 8):
+                state = {'x': 3, 'y': 4, 'd': d}
+                with self.subTest(k=k, d=d):
+                    if 0 <= d < k:  # d llega a 0 en uno de los k ticks
+                        with self.assertRaises(ZeroDivisionError):
+                            engine.compute_next_state(state, {})
+                        continue
+                    expected = dict(state)
+                    for _ in range(k):
+                        expected.update(reference.compute_next_state(expected, {}))
+                    self.assertEqual({**state, **engine.compute_next_state(state, {})}, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Simplificación del sistema polinómico (ConstraintOptimizer): los testigos del
+sistema original satisfacen también el sistema optimizado.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import math
+import os
+import random
+import unittest
+from fractions import Fraction
+
+from compiler.constraint_optimizer import ConstraintOptimizer
+from compiler.polynomial_converter import PolynomialConverter
+from compiler.sparse_polynomial import SparsePolynomialExpander
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATES_PER_PROGRAM = 20
+
+# Semántica de la aritmetización del PolynomialConverter (no la de C: a && b es a*b).
+POLY_OPS = {
+    'if': lambda c, a, b: c * a + (1 - c) * b,
+    '+': lambda a, b: a + b, '-': lambda a, b: a - b, '*': lambda a, b: a * b, 'neg': lambda a: -a,
+    '&&': lambda a, b: a * b, '||': lambda a, b: a + b - a * b,
+    '==': lambda a, b: int(a == b), '!=': lambda a, b: int(a != b),
+    '<': lambda a, b: int(a < b), '<=': lambda a, b: int(a <= b),
+    '>': lambda a, b: int(a > b), '>=': lambda a, b: int(a >= b),
+}
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+def value_of(expr, values, sub_defs):
+    """Valor de un árbol de tuplas; los C_n se calculan (y guardan) al primer uso."""
+    if isinstance(expr, tuple):
+        return POLY_OPS[expr[0]](*[value_of(arg, values, sub_defs) for arg in expr[1:]])
+    if isinstance(expr, str):
+        name = expr.replace("{", "").replace("}", "")
+        if name not in values:
+            values[name] = value_of(sub_defs[expr], values, sub_defs)
+        return values[name]
+    return expr
+
+def four_squares(n):
+    """[a, b, c, d] con a^2 + b^2 + c^2 + d^2 = n (n >= 0)."""
+    for a in range(math.isqrt(n), -1, -1):
+        for b in range(math.isqrt(n - a * a), -1, -1):
+            for c in range(math.isqrt(n - a * a - b * b), -1, -1):
+                d = math.isqrt(n - a * a - b * b - c * c)
+                if a * a + b * b + c * c + d * d == n:
+                    return [a, b, c, d]
+    raise AssertionError(n)
+
+
+class WitnessConverter(PolynomialConverter):
+    """
+    PolynomialConverter que, además, calcula el valor de cada variable que
+    introduce para unos valores dados del estado y las entradas: un testigo
+    del sistema. Las inversas de (a - b) de las igualdades son racionales
+    (el sistema entero no siempre tiene solución); el optimizador solo hace
+    sustituciones válidas en cualquier cuerpo, así que basta con comprobarlo
+    sobre los racionales.
+    """
+    def __init__(self, optimized_f, sub_defs, values):
+        super().__init__(optimized_f, sub_defs)
+        self.values = values
+
+    def _convert_expr_to_poly(self, target_var, expr):
+        first = self.existential_vars_count
+        super()._convert_expr_to_poly(target_var, expr)
+        self.values[target_var] = value_of(expr, self.values, self.sub_defs)
+        if not isinstance(expr, tuple) or expr[0] not in ('==', '<='):
+            return
+        # Las e_n de esta llamada que no son resultados intermedios: la inversa
+        # de (a - b) o los ocho cuadrados de la comparación.
+        fresh = [f"e_{n}" for n in range(first, self.existential_vars_count) if f"e_{n}" not in self.values]
+        a, b = (value_of(arg, self.values, self.sub_defs) for arg in expr[1:])
+        if expr[0] == '==':
+            self.values[fresh[0]] = Fraction(1, a - b) if a != b else 0
+        elif expr[0] == '<=':
+            holds = self.values[target_var]
+            squares = four_squares(b - a) + [0] * 4 if holds else [0] * 4 + four_squares(a - b - 1)
+            self.values.update(zip(fresh, squares))
+
+def residuals(system, values):
+    """Valor del LHS de cada ecuación con las variables de `values`."""
+    expander = SparsePolynomialExpander()
+    result = []
+    for eq in system:
+        poly = expander.expand_string(eq.rsplit(' =', 1)[0])
+        result.append(sum(coeff * math.prod(Fraction(values[expander.var_names[i]]) ** exp for i, exp in monomial)
+                          for monomial, coeff in poly.items()))
+    return result
+
+
+class WitnessTest(unittest.TestCase):
+
+    def programs(self):
+        from compiler import compile_program
+        from benchmarks.synthetic import generate_program
+        sources = [os.path.join(ROOT, "examples", name) for name in ("pong.c", "simple_counter.c")]
+        sources += [generate_program({'nesting_depth': 2, 'comparison_density': 2}, seed) for seed in range(3)]
+        for source in sources:
+            try:
+                program = compile_program(source)
+                quiet(lambda: program.optimized_f)
+            except (ImportError, SystemExit, RuntimeError) as e:
+                self.skipTest(f"libclang no disponible: {e}")
+            yield os.path.basename(source) if len(source) < 200 else "sintético", program
+
+    def test_witnesses_satisfy_original_and_optimized_systems(self):
+        rng = random.Random(0)
+        for name, program in self.programs():
+            original = quiet(PolynomialConverter(program.optimized_f, program.sub_defs).convert)
+            optimizer = ConstraintOptimizer(original)
+            optimized = quiet(optimizer.optimize)
+            inverse = {new: old for old, new in optimizer.renumbering.items()}
+            for _ in range(STATES_PER_PROGRAM):
+                values = {var: rng.randint(-20, 100) for var in program.state_vars}
+                values.update({var: rng.choice([0, 1, 105, 107, 115, 119]) for var in program.input_vars})
+                converter = WitnessConverter(program.optimized_f, program.sub_defs, values)
+                with self.subTest(program=name, state=dict(values)):
+                    self.assertEqual(quiet(converter.convert), original)
+                    self.assertFalse(any(residuals(original, values)))
+                    renamed = {new: values[old] for new, old in inverse.items()}
+                    self.assertFalse(any(residuals(optimized, {**values, **renamed})))
+
+    def test_pong_statistics(self):
+        for name, program in self.programs():
+            if name != "pong.c":
+                continue
+            optimizer = ConstraintOptimizer(quiet(PolynomialConverter(program.optimized_f, program.sub_defs).convert))
+            quiet(optimizer.optimize)
+            stats = optimizer.get_stats()
+            self.assertEqual((stats['equations_before'], stats['equations_after']), (102, 97))
+            self.assertEqual(stats['aliases_removed'], 5)
+            return
+
+
+if __name__ == "__main__":
+    unittest.main()
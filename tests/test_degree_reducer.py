@@ -0,0 +1,82 @@
+"""
+Reducción de grado (DegreeReducer, --reduce-degree): todas las restricciones
+quedan de grado <= 2 y, deshaciendo las variables auxiliares, se recupera el
+sistema original.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import os
+import re
+import unittest
+
+from compiler.degree_reducer import DegreeReducer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_E_VAR_RE = re.compile(r'\be_\d+\b')
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+def lhs(eq):
+    return eq.rsplit(' =', 1)[0]
+
+
+class DegreeReducerTest(unittest.TestCase):
+
+    def systems(self):
+        from compiler import compile_program
+        from benchmarks.synthetic import generate_program
+        sources = [os.path.join(ROOT, "examples", "pong.c")]
+        sources += [generate_program({'nesting_depth': 3, 'comparison_density': 3}, seed) for seed in range(2)]
+        for source in sources:
+            try:
+                program = compile_program(source, max_master_terms=0)
+                quiet(lambda: program.poly_system)
+            except (ImportError, SystemExit, RuntimeError) as e:
+                self.skipTest(f"libclang no disponible: {e}")
+            yield program.poly_system, program.poly_info['existential_vars_count']
+
+    def test_reduced_system_has_degree_two_and_unfolds_to_original(self):
+        for i, (system, e_count) in enumerate(self.systems()):
+            reducer = DegreeReducer(system, e_count)
+            reduced = quiet(reducer.reduce)
+            expander = reducer.expander
+            with self.subTest(program=i):
+                self.assertGreater(reducer.degree_before, 2)
+                self.assertGreater(reducer.aux_vars_count, 0)
+                self.assertTrue(all(expander.degree(expander.expand_string(lhs(eq))) <= 2 for eq in reduced))
+                self.assertEqual(reducer.get_stats()['degree_after'], 2)
+
+                # z = x*y de cada auxiliar, en texto.
+                products = {expander.var_names[z]: f"({expander.var_names[x]} * {expander.var_names[y]})"
+                            for (x, y), z in reducer.aux_for_pair.items()}
+                definitions = [eq for eq in reduced if any(eq.startswith(f"{z} - ") for z in products)]
+                constraints = [eq for eq in reduced if eq not in definitions]
+                self.assertEqual(len(definitions), reducer.aux_vars_count)
+                self.assertEqual(len(constraints), len(system))
+
+                for definition in definitions:
+                    z = definition.split(' ', 1)[0]
+                    self.assertFalse(expander.expand_string(lhs(definition).replace(z, products[z], 1)))
+                for original, rewritten in zip(system, constraints):
+                    text = lhs(rewritten)
+                    while any(name in products for name in _E_VAR_RE.findall(text)):
+                        text = _E_VAR_RE.sub(lambda m: products.get(m.group(0), m.group(0)), text)
+                    self.assertEqual(expander.expand_string(text), expander.expand_string(lhs(original)))
+
+    def test_low_degree_system_is_unchanged(self):
+        system = ["x[t+1] - (x + 1) = 0", "C_0 * (1 - C_0) = 0"]
+        reducer = DegreeReducer(system, 0)
+        self.assertEqual(quiet(reducer.reduce), system)
+        self.assertEqual(reducer.aux_vars_count, 0)
+
+    def test_max_degree_below_two_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DegreeReducer([], 0, max_degree=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Explorador del espacio de estados (python -m interpreter.explorer): claves
+empaquetadas, filtro de Bloom y expansión por lotes frente a la de referencia.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from interpreter import explorer, vectorized
+from interpreter.interpreter import EquationEngine
+
+# Contador módulo 10 con un acumulador que divide entre (c - k): con k = c la
+# transición es indefinida en el evaluador de referencia.
+DIVISION_EQUATIONS = """\
+C_0 := /(10, -(c, k))
+C_1 := +(s, C_0)
+c[t+1] := if(==(c, 9), 0, +(c, 1))
+s[t+1] := if(||(>(C_1, 50), <(C_1, 0)), 0, C_1)
+"""
+# Duplica x en cada paso: en int64 acabaría dando la vuelta.
+OVERFLOW_EQUATIONS = "x[t+1] := *(x, 2)\n"
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+class StatePackerTest(unittest.TestCase):
+
+    def test_pack_round_trip_with_negative_values(self):
+        packer = explorer.StatePacker(['a', 'b', 'c'], bits=8)
+        state = {'a': -128, 'b': 0, 'c': 127}
+        self.assertEqual(packer.unpack(packer.pack(state)), state)
+        with self.assertRaises(ValueError):
+            packer.pack({'a': 128})
+
+    @unittest.skipUnless(vectorized.np is not None, "NumPy no instalado")
+    def test_pack_rows_matches_pack(self):
+        np = vectorized.np
+        # 40 bits por variable: una palabra de 64 bits por variable y claves de más de 64 bits.
+        for bits in (8, 40):
+            with self.subTest(bits=bits):
+                packer = explorer.StatePacker(['a', 'b', 'c'], bits=bits)
+                rows = np.array([[0, 0, 0], [-5, 7, 100], [-(1 << (bits - 1)), (1 << (bits - 1)) - 1, -1]],
+                                dtype=np.int64)
+                keys = packer.pack_rows(rows)
+                self.assertEqual(keys, [packer.pack(dict(zip(packer.state_vars, row))) for row in rows.tolist()])
+                self.assertEqual(packer.unpack_rows(keys).tolist(), rows.tolist())
+                with self.assertRaises(ValueError):
+                    packer.pack_rows(np.array([[1 << (bits - 1), 0, 0]], dtype=np.int64))
+
+
+class BloomFilterTest(unittest.TestCase):
+
+    def test_false_positive_is_taken_as_visited(self):
+        bloom = explorer.BloomFilter(capacity=4, error_rate=0.3)
+        added = list(range(0, 40, 2))
+        for key in added:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in added))  # nunca falsos negativos
+        false_positives = [key for key in range(1, 4000, 2) if key in bloom]
+        self.assertTrue(false_positives)
+        count = bloom.count
+        self.assertFalse(bloom.add(false_positives[0]))
+        self.assertEqual(bloom.count, count)
+
+    def test_bloom_count_never_exceeds_exact_count(self):
+        engine = quiet(EquationEngine.from_ir, {'x': ('if', ('==', 'x', 99), 0, ('+', 'x', 1))}, {}, ['x'])
+        exact = explorer.StateSpaceExplorer(engine, [{}], batch=False).explore({})
+        approx = explorer.StateSpaceExplorer(engine, [{}], bloom_capacity=10, bloom_error=0.2,
+                                             batch=False).explore({})
+        self.assertEqual(exact['states'], 100)
+        self.assertLessEqual(approx['states'], exact['states'])
+        self.assertEqual(approx['visited_set'], 'bloom')
+
+
+class ExpansionMatchesReferenceTest(unittest.TestCase):
+
+    def load(self, equations):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        path = os.path.join(self.tmp.name, "programa_interpreter_input.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(equations)
+        return quiet(EquationEngine, path)
+
+    def explore(self, engine, order='bfs', **options):
+        alphabet = [{'k': 3}, {'k': 7}, {'k': 20}]
+        return explorer.StateSpaceExplorer(engine, alphabet, **options).explore({'c': 0, 's': 0}, order=order)
+
+    def test_batch_and_dfs_agree_with_reference_on_division_by_zero(self):
+        engine = self.load(DIVISION_EQUATIONS)
+        scalar = self.explore(engine, batch=False)
+        self.assertGreater(scalar['undefined_transitions'], 0)
+        reports = {'dfs': self.explore(engine, 'dfs', batch=False)}
+        if vectorized.np is not None:
+            reports['batch'] = self.explore(engine, batch=True)
+            self.assertEqual(reports['batch']['level_widths'], scalar['level_widths'])
+        for mode, report in reports.items():
+            with self.subTest(mode=mode):
+                for field in ('states', 'transitions', 'undefined_transitions', 'bounds', 'complete'):
+                    self.assertEqual(report[field], scalar[field], field)
+
+    def test_overflow_is_an_error_in_every_mode(self):
+        engine = self.load(OVERFLOW_EQUATIONS)
+        modes = [{'batch': False, 'bits': 64}] + ([{'batch': True, 'bits': 64}] if vectorized.np is not None else [])
+        for options in modes:
+            with self.subTest(**options), self.assertRaises(ValueError):
+                explorer.StateSpaceExplorer(engine, [{}], **options).explore({'x': 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Memo de la conversión a polinomios por ecuación (modo --watch).
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import unittest
+
+from compiler.incremental import ConversionCache
+from compiler.polynomial_converter import PolynomialConverter
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+# F optimizada y definiciones C_n con comparaciones (introducen e_n) y 'if'.
+SUB_DEFS = {
+    'C_{1}': ('<', 'x', 10),
+    'C_{2}': ('if', 'C_{1}', ('+', 'x', 1), 0),
+    'C_{3}': ('!=', 'y', 'x'),
+}
+OPTIMIZED_F = {
+    'x': 'C_{2}',
+    'y': ('if', 'C_{3}', ('-', 'y', 1), ('>=', 'y', 'x')),
+}
+
+def convert(optimized_f, sub_defs, memo=None):
+    converter = PolynomialConverter(optimized_f, sub_defs, memo)
+    system = quiet(converter.convert)
+    return system, converter.existential_vars_count
+
+
+class ConversionCacheTest(unittest.TestCase):
+
+    def compile(self, memo, optimized_f, sub_defs):
+        memo.begin()
+        result = convert(optimized_f, sub_defs, memo)
+        memo.end()
+        return result
+
+    def test_memo_matches_direct_conversion(self):
+        memo = ConversionCache()
+        self.assertEqual(self.compile(memo, OPTIMIZED_F, SUB_DEFS), convert(OPTIMIZED_F, SUB_DEFS))
+        # La segunda compilación sale entera del memo y da el mismo sistema.
+        self.assertEqual(self.compile(memo, OPTIMIZED_F, SUB_DEFS), convert(OPTIMIZED_F, SUB_DEFS))
+        self.assertEqual((memo.converted, memo.reused), (0, len(SUB_DEFS) + len(OPTIMIZED_F)))
+
+    def test_only_changed_equations_are_converted(self):
+        memo = ConversionCache()
+        self.compile(memo, OPTIMIZED_F, SUB_DEFS)
+        edited = dict(OPTIMIZED_F, y=('if', 'C_{3}', ('-', 'y', 2), ('>=', 'y', 'x')))
+        self.assertEqual(self.compile(memo, edited, SUB_DEFS), convert(edited, SUB_DEFS))
+        self.assertEqual((memo.converted, memo.reused), (1, len(SUB_DEFS) + len(OPTIMIZED_F) - 1))
+
+    def test_renumbered_definitions_are_reused(self):
+        # La CSE puede renumerar los C_n de una compilación a otra: la forma de
+        # cada ecuación no cambia, así que se reutiliza con los nombres nuevos.
+        memo = ConversionCache()
+        self.compile(memo, OPTIMIZED_F, SUB_DEFS)
+        renamed = {'C_{1}': ('<', 'x', 10), 'C_{5}': ('if', 'C_{1}', ('+', 'x', 1), 0), 'C_{7}': ('!=', 'y', 'x')}
+        optimized_f = {'x': 'C_{5}', 'y': ('if', 'C_{7}', ('-', 'y', 1), ('>=', 'y', 'x'))}
+        self.assertEqual(self.compile(memo, optimized_f, renamed), convert(optimized_f, renamed))
+        self.assertEqual(memo.converted, 0)
@@ -0,0 +1,61 @@
+"""
+Motor de ecuaciones construido en memoria (from_ir / compile_and_load) frente
+al cargado desde el *_interpreter_input.txt.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import glob
+import io
+import os
+import tempfile
+import unittest
+
+from interpreter import native
+from interpreter.interpreter import EquationEngine, compile_and_load
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TICKS = 500
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+class InMemoryEngineTest(unittest.TestCase):
+
+    def compile(self, path):
+        from compiler import compile_program
+        try:
+            program = compile_program(path)
+            quiet(lambda: program.optimized_f)
+        except (ImportError, SystemExit, RuntimeError) as e:
+            self.skipTest(f"libclang no disponible: {e}")
+        return program
+
+    def test_from_ir_matches_file_round_trip(self):
+        for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*.c"))):
+            with self.subTest(program=os.path.basename(path)):
+                program = self.compile(path)
+                with tempfile.TemporaryDirectory() as tmp:
+                    equations_path = os.path.join(tmp, "programa_interpreter_input.txt")
+                    with open(equations_path, "w", encoding="utf-8") as f:
+                        f.write(quiet(lambda: program.interpreter_text))
+                    from_file = quiet(EquationEngine, equations_path)
+                from_ir = quiet(program.engine)
+                self.assertEqual(from_ir.equations, from_file.equations)
+                self.assertEqual(from_ir.get_state_variables(), from_file.get_state_variables())
+                initial_state = program.ast_map.get('initial_values', {})
+                mismatch = native.compare_engines(from_file, from_ir, TICKS, seed=3, initial_state=initial_state)
+                self.assertEqual(mismatch, -1, f"Los motores difieren en el tick {mismatch}")
+                loaded = quiet(compile_and_load, path)
+                self.assertEqual(native.compare_engines(from_file, loaded, TICKS, seed=4,
+                                                        initial_state=initial_state), -1)
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            quiet(compile_and_load, os.path.join(ROOT, "examples", "no_existe.c"))
+
+
+if __name__ == "__main__":
+    unittest.main()
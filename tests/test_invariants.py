@@ -0,0 +1,71 @@
+"""
+Variables de estado invariantes (--specialize-invariants) y especialización de F.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import unittest
+
+from compiler import invariants
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+class FindInvariantsTest(unittest.TestCase):
+
+    def test_unassigned_and_self_preserving_vars_are_invariant(self):
+        f = {
+            'speed': 'speed',                                   # nunca se asigna
+            'mode': ('if', ('==', 'mode', 0), 0, 'mode'),       # solo recibe el valor que ya tiene
+            'x': ('+', 'x', 'speed'),
+        }
+        constants = invariants.find_invariants(f, ['speed', 'mode', 'x'], {'speed': 2, 'mode': 0, 'x': 0})
+        self.assertEqual(constants, {'speed': 2, 'mode': 0})
+
+    def test_dependence_on_a_changing_var_is_not_invariant(self):
+        # y solo es constante si x lo es; x cambia, así que ninguna lo es.
+        f = {'x': ('+', 'x', 1), 'y': ('+', 'y', 'x')}
+        self.assertEqual(invariants.find_invariants(f, ['x', 'y'], {'x': 0, 'y': 0}), {})
+
+    def test_unknown_initial_value_is_not_invariant(self):
+        self.assertEqual(invariants.find_invariants({'x': 'x'}, ['x'], {}), {})
+
+    def test_specialize_substitutes_and_drops_constants(self):
+        f = {'speed': 'speed', 'x': ('+', 'x', ('*', 'speed', 3))}
+        self.assertEqual(invariants.specialize(f, {'speed': 2}), {'x': ('+', 'x', 6)})
+
+
+class PreLoopAssignmentTest(unittest.TestCase):
+    """S_0 es el estado al entrar en el bucle, no el de los inicializadores."""
+
+    def compile(self, source):
+        from compiler import compile_program
+        try:
+            program = compile_program(source, specialize_invariants=True)
+            quiet(lambda: program.f)
+        except (ImportError, SystemExit, RuntimeError) as e:
+            self.skipTest(f"libclang no disponible: {e}")
+        return program
+
+    def test_assignment_before_loop_is_not_the_initial_value(self):
+        program = self.compile("int x = 0, y = 0;\nint main() { x = 7; for (;;) { y = y + x; } }\n")
+        self.assertNotIn('x', program.ast_map['initial_values'])
+        self.assertEqual(program.constant_state_vars, {})
+        self.assertEqual(program.f['y'], ('+', 'y', 'x'))
+
+    def test_updates_and_loop_init_are_assignments(self):
+        program = self.compile("int x = 0, y = 0, z = 3;\n"
+                               "int main() { x++; for (y = 1;;) { y = y + x + z; } }\n")
+        self.assertEqual(program.ast_map['initial_values'], {'z': 3})
+        self.assertEqual(program.constant_state_vars, {'z': 3})
+
+    def test_reads_before_loop_keep_the_initializer(self):
+        program = self.compile("int x = 4, y = 0;\nint main() { int t = x; for (;;) { y = y + t; } }\n")
+        self.assertEqual(program.ast_map['initial_values']['x'], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
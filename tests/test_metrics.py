@@ -0,0 +1,41 @@
+"""
+Sumidero de métricas para el 'textfile collector' de Prometheus.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import os
+import stat
+import tempfile
+import unittest
+
+from interpreter import metrics
+
+SNAPSHOT = {
+    'ticks_total': 3,
+    'ticks_per_second': 1.5,
+    'latency_buckets': {'0.001': 3, '+Inf': 3},
+    'latency_seconds_sum': 0.0004,
+    'state_changes_total': {'x': 2},
+    'state_change_rate': {'x': 0.5},
+}
+
+
+class PrometheusTextfileSinkTest(unittest.TestCase):
+
+    def write(self, program):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "diophantus.prom")
+            metrics.PrometheusTextfileSink(path, program).write(SNAPSHOT)
+            with open(path, encoding="utf-8") as f:
+                return f.read(), stat.S_IMODE(os.stat(path).st_mode)
+
+    @unittest.skipUnless(os.name == "posix", "Sin permisos POSIX")
+    def test_textfile_is_readable_by_the_collector(self):
+        _, mode = self.write("pong.c")
+        self.assertEqual(mode, metrics.TEXTFILE_MODE)
+
+    def test_label_values_are_escaped(self):
+        text, _ = self.write('dir\\"pong"\n.c')
+        self.assertIn('diophantus_ticks_total{program="dir\\\\\\"pong\\"\\n.c"} 3\n', text)
+        # Cada muestra sigue ocupando una sola línea.
+        self.assertTrue(all(line.startswith(("#", "diophantus_")) for line in text.splitlines()))
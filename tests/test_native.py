@@ -0,0 +1,140 @@
+"""
+El motor nativo frente al evaluador de Python, tick a tick.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import glob
+import io
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from interpreter import native
+from interpreter.interpreter import EquationEngine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TICKS = 2000
+
+# Cuenta atrás con divisiones (también de un negativo, que redondea hacia
+# -infinito): en el cuarto tick d vale 0.
+DIVISION_EQUATIONS = """\
+C_0 := -(d, 1)
+q[t+1] := /(100, d)
+r[t+1] := /(neg(7), d)
+d[t+1] := C_0
+"""
+
+# neg(d) se sale de int64 con d = -2**63 y *(d, 2) con d = 2**62.
+OVERFLOW_EQUATIONS = """\
+q[t+1] := -(neg(d), *(d, 2))
+d[t+1] := -(d, 1)
+"""
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+@unittest.skipUnless(native.find_c_compiler(), "No hay compilador de C")
+class NativeMatchesReferenceTest(unittest.TestCase):
+
+    def assert_lockstep(self, reference, compiled, initial_state=None):
+        self.assertEqual(compiled.backend, 'native')
+        mismatch = native.compare_engines(reference, compiled, TICKS, seed=1, initial_state=initial_state)
+        self.assertEqual(mismatch, -1, f"Los motores difieren en el tick {mismatch}")
+
+    def test_compiled_examples(self):
+        """Los ejemplos, compilados en memoria (necesita libclang)."""
+        from compiler import compile_program
+        for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*.c"))):
+            with self.subTest(program=os.path.basename(path)):
+                try:
+                    program = compile_program(path)
+                    quiet(lambda: program.optimized_f)
+                except (ImportError, SystemExit, RuntimeError) as e:
+                    self.skipTest(f"libclang no disponible: {e}")
+                reference = quiet(program.engine)
+                self.assert_lockstep(reference, quiet(program.engine, backend='native'))
+
+    def test_interpreter_files(self):
+        """Las entradas del intérprete ya generadas en output/."""
+        for path in sorted(glob.glob(os.path.join(ROOT, "output", "*_interpreter_input.txt"))):
+            with self.subTest(file=os.path.basename(path)):
+                reference = quiet(EquationEngine, path)
+                self.assert_lockstep(reference, quiet(EquationEngine, path, backend='native'))
+
+    def test_specialized_variants(self):
+        path = os.path.join(ROOT, "output", "pong_interpreter_input.txt")
+        reference = quiet(EquationEngine, path)
+        compiled = quiet(EquationEngine, path, backend='native', specialize=[{'kbhit': 0}])
+        self.assert_lockstep(reference, compiled)
+
+    def test_division_and_division_by_zero(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "division_interpreter_input.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(DIVISION_EQUATIONS)
+            reference = quiet(EquationEngine, path)
+            compiled = quiet(EquationEngine, path, backend='native')
+        self.assert_lockstep(reference, compiled, {'d': 3})
+
+        state = {'q': 0, 'r': 0, 'd': 2}
+        for engine in (reference, compiled):
+            with self.subTest(backend=engine.backend):
+                self.assertEqual(engine.compute_next_state(state, {}), {'q': 50, 'r': -4, 'd': 1})
+                with self.assertRaises(ZeroDivisionError):
+                    engine.compute_next_state({'q': 0, 'r': 0, 'd': 0}, {})
+                with self.assertRaises(ZeroDivisionError):
+                    engine.step_n(state, [{}] * 5)
+
+    def test_step_n_reports_failing_tick(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "division_interpreter_input.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(DIVISION_EQUATIONS)
+            compiled = quiet(EquationEngine, path, backend='native')
+        self.assertEqual(compiled.step_n({'d': 3}, [{}] * 3), {'q': 100, 'r': -7, 'd': 0})
+        with self.assertRaisesRegex(ZeroDivisionError, "tick 3"):
+            compiled.step_n({'d': 3}, [{}] * 4)
+
+    def test_int64_overflow_is_reported(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "overflow_interpreter_input.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(OVERFLOW_EQUATIONS)
+            reference = quiet(EquationEngine, path)
+            compiled = quiet(EquationEngine, path, backend='native')
+        self.assertEqual(compiled.compute_next_state({'d': 5, 'q': 0}, {}), {'d': 4, 'q': -15})
+        for d in (-(2**63), 2**62):
+            with self.subTest(d=d):
+                # Python sigue con enteros grandes; el motor nativo no puede y lo comunica.
+                reference.compute_next_state({'d': d, 'q': 0}, {})
+                with self.assertRaises(OverflowError):
+                    compiled.compute_next_state({'d': d, 'q': 0}, {})
+        with self.assertRaisesRegex(OverflowError, "tick 0"):
+            compiled.step_n({'d': 2**62, 'q': 0}, [{}] * 2)
+
+    def test_concurrent_steps_keep_their_own_errors(self):
+        """El indicador de error es de cada llamada: un hilo que divide entre 0 no afecta a otro."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "division_interpreter_input.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(DIVISION_EQUATIONS)
+            compiled = quiet(EquationEngine, path, backend='native')
+
+        def run(d):
+            # d < 0 nunca llega a 0; d > 0 divide entre 0 en el tick d.
+            try:
+                return compiled.step_n({'d': d}, [{}] * (2000 if d < 0 else d + 1))
+            except ZeroDivisionError:
+                return ZeroDivisionError
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(run, [-1, 3] * 50))
+        self.assertTrue(all(isinstance(result, dict) for result in results[0::2]))
+        self.assertTrue(all(result is ZeroDivisionError for result in results[1::2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
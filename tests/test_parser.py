@@ -0,0 +1,38 @@
+"""
+Expresiones constantes de los inicializadores (S_0) con la aritmética de C.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import unittest
+
+try:
+    from compiler.parser import _constant_value
+except ImportError:
+    _constant_value = None
+
+def constant(value):
+    return {'type': 'Constant', 'value': value}
+
+def divide(left, right):
+    return {'type': 'BinaryOp', 'op': '/', 'left': constant(left), 'right': constant(right)}
+
+
+@unittest.skipIf(_constant_value is None, "libclang (clang.cindex) no disponible")
+class ConstantValueTest(unittest.TestCase):
+
+    def test_division_truncates_toward_zero(self):
+        for left, right, expected in [(7, 2, 3), (-7, 2, -3), (7, -2, -3), (-7, -2, 3), (0, -5, 0)]:
+            with self.subTest(left=left, right=right):
+                self.assertEqual(_constant_value(divide(left, right)), expected)
+
+    def test_division_is_exact_for_large_values(self):
+        # Con división en coma flotante, 2**62 + 1 pierde el último bit.
+        self.assertEqual(_constant_value(divide(2**62 + 1, 1)), 2**62 + 1)
+        self.assertEqual(_constant_value(divide(-(2**62) - 3, 2)), -(2**61) - 1)
+
+    def test_division_by_zero_is_not_constant(self):
+        self.assertIsNone(_constant_value(divide(1, 0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
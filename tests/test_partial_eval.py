@@ -0,0 +1,76 @@
+"""
+Evaluación parcial de F (variantes especializadas del motor, --specialize)
+frente al plan completo.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from interpreter import native
+from interpreter.interpreter import EquationEngine
+from interpreter.partial_eval import simplify
+
+TICKS = 300
+
+# Con kbhit = 0, C_1, C_2 e y[t+1] descartarían una división entre d, que llega a 0 en el tick 3.
+EQUATIONS = """\
+C_0 := /(100, d)
+C_1 := *(C_0, kbhit)
+C_2 := &&(kbhit, /(7, d))
+x[t+1] := +(x, +(C_1, C_2))
+y[t+1] := if(kbhit, /(1, d), y)
+d[t+1] := -(d, 1)
+"""
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+class SimplifyTest(unittest.TestCase):
+
+    def test_division_free_operands_are_dropped(self):
+        self.assertEqual(simplify(('*', 'x', 0)), 0)
+        self.assertEqual(simplify(('&&', 0, ('+', 'x', 1))), 0)
+        self.assertEqual(simplify(('||', ('<', 'x', 2), 3)), 1)
+        self.assertEqual(simplify(('if', 1, 'x', ('/', 'y', 2))), 'x')
+
+    def test_operands_that_may_divide_by_zero_are_kept(self):
+        for expr in [('*', ('/', 1, 'd'), 0), ('&&', 0, ('/', 7, 'd')), ('||', 1, ('/', 7, 'd')),
+                     ('if', 0, ('/', 1, 'd'), 'y'), ('-', ('/', 1, 'd'), ('/', 1, 'd'))]:
+            with self.subTest(expr=expr):
+                self.assertIsInstance(simplify(expr), tuple)
+        self.assertEqual(simplify(('/', 4, 0)), ('/', 4, 0))
+
+
+class SpecializedVariantTest(unittest.TestCase):
+
+    def load(self, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "division_interpreter_input.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(EQUATIONS)
+            return quiet(EquationEngine, path, **options)
+
+    def test_variant_matches_general_engine(self):
+        reference = self.load()
+        specialized = self.load(specialize=[{'kbhit': 0}])
+        self.assertEqual(len(specialized.variants), 1)
+        for d in (5, 40, -3):
+            with self.subTest(d=d):
+                mismatch = native.compare_engines(reference, specialized, TICKS, seed=d,
+                                                  initial_state={'d': d})
+                self.assertEqual(mismatch, -1, f"Los motores difieren en el tick {mismatch}")
+
+    def test_variant_raises_on_division_by_zero(self):
+        specialized = self.load(specialize=[{'kbhit': 0}])
+        with self.assertRaises(ZeroDivisionError):
+            specialized.compute_next_state({'x': 0, 'y': 0, 'd': 0}, {'kbhit': 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
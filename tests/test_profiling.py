@@ -0,0 +1,48 @@
+"""
+El perfil por ecuación solo se combina con el evaluador de referencia.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import os
+import unittest
+
+from interpreter.interpreter import EquationEngine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PONG = os.path.join(ROOT, "output", "pong_interpreter_input.txt")
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def test_profile_counts_evaluations(self):
+        engine = quiet(EquationEngine, PONG, profile=True)
+        state = {var: 0 for var in engine.get_state_variables()}
+        for _ in range(3):
+            state = engine.compute_next_state(state, {name: 0 for name in engine.get_input_variables()})
+        self.assertTrue(all(stats['evaluations'] == 3 for stats in engine.equation_stats.values()))
+
+    def test_profile_rejects_other_engines(self):
+        for options in ({'backend': 'levels'}, {'backend': 'threads'}, {'specialize': [{'kbhit': 0}]}):
+            with self.subTest(**{key: str(value) for key, value in options.items()}):
+                try:
+                    with self.assertRaises(ValueError):
+                        quiet(EquationEngine, PONG, profile=True, **options)
+                except ImportError as e:
+                    self.skipTest(f"NumPy no disponible: {e}")
+
+    def test_profiled_engine_rejects_later_dispatch(self):
+        engine = quiet(EquationEngine, PONG, profile=True)
+        with self.assertRaises(ValueError):
+            engine.add_specialization({'kbhit': 0})
+        with self.assertRaises(ValueError):
+            engine.enable_native()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Planificación por niveles: mismos resultados que el evaluador de referencia
+(también al dividir entre 0) y el pool de hilos del modo 'threads' se cierra
+con el motor.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from interpreter import native, vectorized
+from interpreter.interpreter import EquationEngine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PONG = os.path.join(ROOT, "output", "pong_interpreter_input.txt")
+TICKS = 500
+BACKENDS = ['threads'] + (['levels'] if vectorized.np is not None else [])
+
+# Cuenta atrás con divisiones: en el cuarto tick d vale 0.
+DIVISION_EQUATIONS = """\
+C_0 := -(d, 1)
+q[t+1] := /(100, d)
+r[t+1] := /(neg(7), d)
+d[t+1] := C_0
+"""
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+class LevelScheduleTest(unittest.TestCase):
+
+    def test_backends_match_reference(self):
+        reference = quiet(EquationEngine, PONG)
+        for backend in BACKENDS:
+            with self.subTest(backend=backend), quiet(EquationEngine, PONG, backend=backend) as engine:
+                self.assertEqual(native.compare_engines(reference, engine, TICKS, seed=2), -1)
+
+    def test_division_by_zero_matches_reference(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "division_interpreter_input.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(DIVISION_EQUATIONS)
+            reference = quiet(EquationEngine, path)
+            engines = [quiet(EquationEngine, path, backend=backend) for backend in BACKENDS]
+        for engine in engines:
+            with self.subTest(backend=engine.backend), engine:
+                self.assertEqual(native.compare_engines(reference, engine, 10, initial_state={'d': 3}), -1)
+                self.assertEqual(engine.compute_next_state({'q': 0, 'r': 0, 'd': 2}, {}), {'q': 50, 'r': -4, 'd': 1})
+                with self.assertRaises(ZeroDivisionError):
+                    engine.compute_next_state({'q': 0, 'r': 0, 'd': 0}, {})
+
+    def test_close_stops_pool(self):
+        with quiet(EquationEngine, PONG, backend='threads') as engine:
+            pool = engine.level_evaluator._pool
+            state = {var: 0 for var in engine.get_state_variables()}
+            engine.compute_next_state(state, {name: 0 for name in engine.get_input_variables()})
+        self.assertTrue(pool._shutdown)
+        self.assertFalse(any(thread.is_alive() for thread in pool._threads))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Cono de influencia (--only): F restringida a las variables de las que dependen
+las pedidas.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import os
+import random
+import unittest
+
+from compiler.slicing import cone_of_influence, slice_function, variables_in
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TICKS = 300
+INPUT_VALUES = [0, 1, 105, 107, 115, 119]
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+class SliceFunctionTest(unittest.TestCase):
+
+    def test_cone_follows_dependencies_across_ticks(self):
+        f_function = {'a': ('+', 'a', 'b'), 'b': ('*', 'c', 'k'), 'c': 'c', 'd': ('-', 'd', 'a')}
+        self.assertEqual(cone_of_influence(f_function, ['a']), {'a', 'b', 'c'})
+        sliced_f, kept, inputs, pruned = slice_function(f_function, ['a', 'b', 'c', 'd'], {'k', 'j'}, ['b'])
+        self.assertEqual((sorted(sliced_f), kept, inputs, pruned), (['b', 'c'], ['b', 'c'], {'k'}, ['a', 'd']))
+        with self.assertRaises(ValueError):
+            slice_function(f_function, ['a', 'b', 'c', 'd'], set(), ['k'])
+
+
+class PongSliceTest(unittest.TestCase):
+
+    def compile(self, **options):
+        from compiler import compile_program
+        try:
+            program = compile_program(os.path.join(ROOT, "examples", "pong.c"), **options)
+            quiet(lambda: program.optimized_f)
+        except (ImportError, SystemExit, RuntimeError) as e:
+            self.skipTest(f"libclang no disponible: {e}")
+        return program
+
+    def test_only_keeps_exactly_the_cone(self):
+        full = self.compile()
+        sliced = self.compile(only=['b', 'c'])
+        # b y c leen d y e; d lee las palas p y q. f y g (el marcador) no las lee nadie del cono.
+        self.assertEqual(sliced.state_vars, ['b', 'c', 'd', 'e', 'p', 'q'])
+        self.assertEqual(sliced.pruned_state_vars, ['f', 'g'])
+        self.assertEqual(sorted(sliced.state_vars + sliced.pruned_state_vars), sorted(full.state_vars))
+        self.assertEqual(sliced.f, {var: full.f[var] for var in sliced.state_vars})
+        for var, expr in sliced.f.items():
+            with self.subTest(var=var):
+                self.assertFalse(variables_in(expr) & set(sliced.pruned_state_vars))
+
+    def test_sliced_engine_matches_full_engine_on_the_cone(self):
+        full = self.compile()
+        sliced = self.compile(only=['b', 'c'])
+        full_engine, sliced_engine = quiet(full.engine), quiet(sliced.engine)
+        initial_values = full.ast_map.get('initial_values', {})
+        state = {var: initial_values.get(var, 0) for var in full.state_vars}
+        sliced_state = {var: state[var] for var in sliced.state_vars}
+        rng = random.Random(0)
+        for tick in range(TICKS):
+            inputs = {var: rng.choice(INPUT_VALUES) for var in full.input_vars}
+            state.update(full_engine.compute_next_state(state, inputs))
+            sliced_state.update(sliced_engine.compute_next_state(sliced_state, inputs))
+            self.assertEqual(sliced_state, {var: state[var] for var in sliced.state_vars}, f"tick {tick}")
+
+
+if __name__ == "__main__":
+    unittest.main()
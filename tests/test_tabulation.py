@@ -0,0 +1,97 @@
+"""
+Tabla de transiciones (python -m interpreter.tabulation) frente al evaluador
+de referencia.
+
+    python -m pytest tests          (o: python -m unittest discover tests)
+"""
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from interpreter import tabulation, vectorized
+from interpreter.interpreter import EquationEngine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Contador módulo 8 que divide entre (c - k): con k = c la transición es indefinida.
+EQUATIONS = """\
+C_0 := /(12, -(c, k))
+c[t+1] := if(==(c, 7), 0, +(c, 1))
+r[t+1] := if(<(C_0, 0), 0, if(>(C_0, 3), 3, C_0))
+"""
+DOMAINS = {'c': (0, 7), 'r': (0, 3)}
+ALPHABET = [{'k': 2}, {'k': 5}, {'k': 9}]
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+class ParseArgumentsTest(unittest.TestCase):
+
+    def test_domains_and_alphabets(self):
+        self.assertEqual(tabulation.parse_domain("b=0:79"), ('b', (0, 79)))
+        self.assertEqual(tabulation.parse_input_values("getch=0,w,s"), ('getch', [0, 119, 115]))
+        self.assertEqual(tabulation.input_alphabet({'b': [0, 1], 'a': [5]}), [{'a': 5, 'b': 0}, {'a': 5, 'b': 1}])
+        for bad in ("b=0", "b=5:1"):
+            with self.subTest(domain=bad), self.assertRaises(ValueError):
+                tabulation.parse_domain(bad)
+
+
+@unittest.skipUnless(vectorized.np is not None, "NumPy no instalado")
+class TransitionTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "contador_interpreter_input.txt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(EQUATIONS)
+        self.engine = quiet(EquationEngine, self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_every_entry_matches_reference(self):
+        table = tabulation.TransitionTable.build(self.engine, DOMAINS, ALPHABET)
+        self.assertEqual(table.undefined, 2 * 4)  # k = 2 y k = 5, con cualquier r
+        for index in range(table.n_states):
+            state = table.decode(index)
+            self.assertEqual(table.encode(state), index)
+            for j, symbol in enumerate(ALPHABET):
+                with self.subTest(state=state, inputs=symbol):
+                    try:
+                        expected = {**state, **self.engine.compute_next_state(state, symbol)}
+                    except ZeroDivisionError:
+                        self.assertEqual(table.table[index, j], tabulation.UNDEFINED)
+                        with self.assertRaises(ZeroDivisionError):
+                            table.compute_next_state(state, symbol)
+                        continue
+                    self.assertEqual(table.compute_next_state(state, symbol), expected)
+
+    def test_run_stops_at_undefined_transition(self):
+        table = tabulation.TransitionTable.build(self.engine, DOMAINS, ALPHABET)
+        start = table.encode({'c': 0, 'r': 0})
+        self.assertEqual(table.decode(table.run(start, [0, 0])), {'c': 2, 'r': 0})
+        with self.assertRaises(ZeroDivisionError):
+            table.run(start, [0, 0, 0])
+
+    def test_budget_is_enforced(self):
+        with self.assertRaises(ValueError):
+            tabulation.TransitionTable.build(self.engine, {'c': (0, 10 ** 6), 'r': (0, 10 ** 3)}, ALPHABET, 1)
+
+    def test_cli_verifies_undefined_entries(self):
+        result = subprocess.run(
+            [sys.executable, "-m", "interpreter.tabulation", self.path, "--domain", "c=0:7", "--domain", "r=0:3",
+             "--input", "k=2,5,9", "--verify", "300"],
+            cwd=ROOT, capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("8 transiciones dividen entre cero", result.stderr)
+        self.assertIn("coincide con el evaluador de referencia en 300 ticks", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()